@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AppsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from apps.instrumentation import install_query_recorder
+
+        connection_created.connect(install_query_recorder, dispatch_uid='apps.install_query_recorder')
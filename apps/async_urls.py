@@ -0,0 +1,23 @@
+"""
+URL configuration for the async (ASGI) variants of the hot read endpoints.
+
+Mounted at `api/async/` with the same sub-paths as the sync API, so a client
+switches by changing its base URL. Serve with an ASGI server
+(e.g. `uvicorn config.asgi:application`) to benefit from them.
+
+`events/` is the live event stream (SSE), which only exists here: each open
+stream is a suspended coroutine, where WSGI would tie up a worker thread.
+"""
+from django.urls import path
+from apps.user import async_views
+from apps.auth.views import user_profile_async
+from apps.dashboard.views import dashboard_async, events_stream
+
+urlpatterns = [
+    path('users/<uuid:public_id>/', async_views.user_async, name="get_user_async"),
+    path('users/search/', async_views.search_users_async, name="search_users_async"),
+    path('users/badge-status/', async_views.badge_status_async, name='badge-status-async'),
+    path('auth/me/', user_profile_async, name="user_profile_async"),
+    path('dashboard/stats/', dashboard_async, name='dashboard_stats_async'),
+    path('events/', events_stream, name='events_stream'),
+]
@@ -0,0 +1,109 @@
+from functools import wraps
+
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.user.models import User
+
+
+def _user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+
+
+class BadgeJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user's TrustBadge in the same query.
+
+    Most authenticated endpoints (profile, badge status, dashboard, profile
+    update) read the badge, which would otherwise cost a second query.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user = User.objects.select_related('badge').get(
+                **{api_settings.USER_ID_FIELD: _user_id(validated_token)}
+            )
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+
+_jwt = BadgeJWTAuthentication()
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of ``JWTAuthentication.authenticate``.
+
+    Token checks are pure CPU and stay inline; only the user lookup touches
+    the database, through the async ORM. The badge is fetched in the same
+    query so async views never trigger a lazy (sync-only) relation load.
+    """
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    raw_token = _jwt.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = _jwt.get_validated_token(raw_token)
+    try:
+        user = await User.objects.select_related('badge').aget(
+            **{api_settings.USER_ID_FIELD: _user_id(validated_token)}
+        )
+    except User.DoesNotExist:
+        raise AuthenticationFailed("User not found")
+
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed("User is inactive")
+    return user
+
+
+def async_jwt_required(view_func):
+    """Authenticate an async view with the JWT bearer token, or return 401."""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await aauthenticate(request)
+        except (InvalidToken, AuthenticationFailed) as exc:
+            # Same body DRF's exception handler would produce
+            data = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            return JsonResponse(data, status=status.HTTP_401_UNAUTHORIZED)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        request.user = user
+
+        async def auser():
+            return user
+        request.auser = auser
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def query_token(view_func):
+    """
+    Let an async view accept the access token as ``?token=`` when there is
+    no Authorization header. Browsers' EventSource can't send headers; keep it to streams,
+    since URLs end up in access logs.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        token = request.GET.get('token')
+        if token and 'HTTP_AUTHORIZATION' not in request.META:
+            request.META['HTTP_AUTHORIZATION'] = f"Bearer {token}"
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
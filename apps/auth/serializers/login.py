@@ -1,17 +1,12 @@
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.settings import api_settings
-from django.contrib.auth.models import update_last_login
 
 from apps.user.serializers import UserSerializer
 
 
 class LoginSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
+        # The parent already issues (and records) the refresh/access pair
+        # and honours UPDATE_LAST_LOGIN
         data = super().validate(attrs)
-        refresh = self.get_token(self.user)
-        data['refresh'] = str(refresh)
-        data['access'] = str(refresh.access_token)
         data['user'] = UserSerializer(self.user).data
-        if api_settings.UPDATE_LAST_LOGIN:
-            update_last_login(None, self.user)
         return data
@@ -2,4 +2,4 @@ from .login import login_user
 from .register import register_user
 from .refresh import refresh
 from .logout import logout_user
-from .profile import user_profile
\ No newline at end of file
+from .profile import user_profile, user_profile_async
@@ -1,17 +1,20 @@
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.response import Response
-from rest_framework import status
 from apps.user.models import User
-from apps.user.serializers import UserSerializer
+from apps.user.utils import own_profile_response
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from django.views.decorators.http import require_GET
+from apps.auth.authentication import BadgeJWTAuthentication, async_jwt_required
+from apps.user.async_views import api_response, serialize_user
 
 
 
 @api_view(['GET'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([BadgeJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def user_profile(request):
-    user = request.user
-    serializer = UserSerializer(user)
-    return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+    return own_profile_response(request)
+
+@require_GET
+@async_jwt_required
+async def user_profile_async(request):
+    return api_response(await serialize_user(request.user))
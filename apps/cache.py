@@ -0,0 +1,335 @@
+"""
+Two-tier cache: a small per-process LRU in front of the shared Django cache.
+
+Entries are tagged (e.g. ``user:<public_id>``). Invalidating a tag bumps its
+version in the shared cache, which makes every entry stored under an older
+version a miss in every process, and evicts matching local entries at once
+in the current process. Local entries also expire after
+``settings.LOCAL_CACHE_TTL`` seconds, which bounds how long another worker
+can serve a value after an invalidation.
+
+``get_or_set`` is single-flight: concurrent misses for the same key compute
+the value once per process (a lock) and, across processes, once per
+``settings.CACHE_LOCK_TIMEOUT`` (a lease taken with ``cache.add``).
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+MISSING = object()
+
+DEFAULT_TIMEOUT = 300
+
+
+def user_tag(public_id):
+    """Tag for everything that shows data from one user (detail, search, dashboard)."""
+    return f"user:{public_id}"
+
+
+class LocalLRU:
+    """Thread-safe in-process LRU with per-entry expiry and a tag index."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, tags, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags, ttl):
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, tuple(tags), time.monotonic() + ttl)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class TieredCache:
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.local = LocalLRU(getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 1024))
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def _data_key(key):
+        return f"tc:{key}"
+
+    @staticmethod
+    def _tag_key(tag):
+        return f"tag:{tag}"
+
+    @staticmethod
+    def _lock_key(key):
+        return f"tc-lock:{key}"
+
+    # --------------------------- Tag versions --------------------------- #
+    def _tag_versions(self, tags, known=None):
+        """
+        Current version of each tag; tags never seen before are initialised.
+        ``known`` holds tag-key values already fetched in the same round trip.
+        """
+        tags = list(tags)
+        known = dict(known or {})
+        missing = [self._tag_key(t) for t in tags if self._tag_key(t) not in known]
+        if missing:
+            known.update(self.shared.get_many(missing))
+
+        versions = {}
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            version = known.get(tag_key)
+            if version is None:
+                # First use of this tag: whoever adds first wins
+                self.shared.add(tag_key, uuid.uuid4().hex, timeout=None)
+                version = self.shared.get(tag_key)
+            versions[tag] = version
+        return versions
+
+    def invalidate(self, *tags):
+        """Make every entry carrying any of ``tags`` a miss, in every process."""
+        if not tags:
+            return
+        self.shared.set_many({self._tag_key(t): uuid.uuid4().hex for t in tags}, timeout=None)
+        for tag in tags:
+            self.local.invalidate_tag(tag)
+
+    # ------------------------------ Reads ------------------------------- #
+    def get(self, key, tags=()):
+        """
+        Return the cached value or ``MISSING``. Passing the entry's ``tags``
+        lets their versions be fetched in the same round trip as the value.
+        """
+        value = self.local.get(key)
+        if value is not MISSING:
+            self.stats['local_hits'] += 1
+            return value
+
+        data_key = self._data_key(key)
+        fetched = self.shared.get_many([data_key] + [self._tag_key(t) for t in tags])
+        envelope = fetched.pop(data_key, None)
+        if envelope is not None:
+            stored_versions = envelope['tags']
+            current = self._tag_versions(stored_versions, known=fetched)
+            if current == stored_versions:
+                self.stats['shared_hits'] += 1
+                self.local.set(key, envelope['value'], stored_versions, self._local_ttl())
+                return envelope['value']
+
+        self.stats['misses'] += 1
+        return MISSING
+
+    def get_many(self, entries):
+        """
+        Cached values for ``entries`` (``{key: tags}``) as ``{key: value}``,
+        hits only. Local misses are fetched with their tag versions in one
+        shared round trip.
+        """
+        found = {}
+        remote = {}
+        for key, tags in entries.items():
+            value = self.local.get(key)
+            if value is MISSING:
+                remote[key] = tags
+            else:
+                self.stats['local_hits'] += 1
+                found[key] = value
+        if not remote:
+            return found
+
+        tag_keys = {self._tag_key(t) for tags in remote.values() for t in tags}
+        fetched = self.shared.get_many([self._data_key(key) for key in remote] + list(tag_keys))
+        for key in remote:
+            envelope = fetched.get(self._data_key(key))
+            if envelope is not None:
+                stored_versions = envelope['tags']
+                if self._tag_versions(stored_versions, known=fetched) == stored_versions:
+                    self.stats['shared_hits'] += 1
+                    self.local.set(key, envelope['value'], stored_versions, self._local_ttl())
+                    found[key] = envelope['value']
+                    continue
+            self.stats['misses'] += 1
+        return found
+
+    # ------------------------------ Writes ------------------------------ #
+    def set(self, key, value, tags=(), timeout=DEFAULT_TIMEOUT, versions=None):
+        """
+        Store ``value`` under the given tag versions. ``versions`` should be
+        captured *before* computing the value, so an invalidation that races
+        the computation leaves the stored entry already stale.
+        """
+        versions = dict(versions or {})
+        remaining = [t for t in tags if t not in versions]
+        if remaining:
+            versions.update(self._tag_versions(remaining))
+        self.shared.set(self._data_key(key), {'value': value, 'tags': versions}, timeout=timeout)
+        self.local.set(key, value, versions, min(self._local_ttl(), timeout or self._local_ttl()))
+
+    def delete(self, key):
+        self.shared.delete(self._data_key(key))
+        self.local.delete(key)
+
+    def clear(self):
+        """Drop the local tier (the shared tier is left to its own eviction)."""
+        self.local.clear()
+
+    # -------------------------- Single flight --------------------------- #
+    def get_or_set(self, key, compute, tags=(), value_tags=None, timeout=DEFAULT_TIMEOUT):
+        """
+        Return the cached value for ``key`` or compute, store and return it.
+
+        ``tags`` are known up front; ``value_tags`` is an optional callable
+        returning extra tags from the computed value (e.g. the users listed
+        on a search page). Exceptions from ``compute`` are not cached.
+        """
+        value = self.get(key, tags)
+        if value is not MISSING:
+            return value
+
+        with self._flight(key):
+            # Another thread may have filled it while we waited
+            value = self.get(key, tags)
+            if value is not MISSING:
+                return value
+
+            lock_timeout = getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+            lock_key = self._lock_key(key)
+            leased = self.shared.add(lock_key, 1, timeout=lock_timeout)
+            if not leased:
+                value = self._wait_for(key, tags, lock_timeout)
+                if value is not MISSING:
+                    return value
+
+            try:
+                versions = self._tag_versions(tags)
+                value = compute()
+                extra = list(value_tags(value)) if value_tags else []
+                self.set(key, value, list(tags) + extra, timeout=timeout, versions=versions)
+            finally:
+                if leased:
+                    self.shared.delete(lock_key)
+        return value
+
+    def get_or_set_many(self, entries, compute, timeout=DEFAULT_TIMEOUT):
+        """
+        Values for all of ``entries`` (``{key: tags}``): hits from
+        ``get_many``, the rest from one ``compute(missing_keys)`` call
+        returning ``{key: value}``, stored in one write. Keys it leaves out
+        are absent from the result. Not single-flight: concurrent misses
+        may each compute, which batch readers accept for one round trip.
+        """
+        found = self.get_many(entries)
+        missing = [key for key in entries if key not in found]
+        if not missing:
+            return found
+
+        versions = self._tag_versions({t for key in missing for t in entries[key]})
+        computed = compute(missing)
+        self.shared.set_many({
+            self._data_key(key): {'value': value, 'tags': {t: versions[t] for t in entries[key]}}
+            for key, value in computed.items()
+        }, timeout=timeout)
+        ttl = min(self._local_ttl(), timeout or self._local_ttl())
+        for key, value in computed.items():
+            self.local.set(key, value, {t: versions[t] for t in entries[key]}, ttl)
+        found.update(computed)
+        return found
+
+    def _flight(self, key):
+        return _Flight(self, key)
+
+    def _wait_for(self, key, tags, lock_timeout):
+        """Poll while another process computes ``key``; give up after the lease."""
+        deadline = time.monotonic() + lock_timeout
+        delay = 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            value = self.get(key, tags)
+            if value is not MISSING:
+                return value
+            if not self.shared.get(self._lock_key(key)):
+                break
+            delay = min(delay * 2, 0.1)
+        return MISSING
+
+    def _local_ttl(self):
+        return getattr(settings, 'LOCAL_CACHE_TTL', 2)
+
+
+class _Flight:
+    """Per-key lock shared by the threads missing on the same key."""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+
+    def __enter__(self):
+        cache = self.cache
+        with cache._flights_lock:
+            flight = cache._flights.setdefault(self.key, [threading.Lock(), 0])
+            flight[1] += 1
+        self.flight = flight
+        flight[0].acquire()
+
+    def __exit__(self, *exc):
+        cache = self.cache
+        self.flight[0].release()
+        with cache._flights_lock:
+            self.flight[1] -= 1
+            if self.flight[1] == 0:
+                cache._flights.pop(self.key, None)
+
+
+tiered_cache = TieredCache()
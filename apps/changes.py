@@ -0,0 +1,109 @@
+"""
+Field-level change tracking, so saves write only what changed.
+
+A model that mixes in ``TrackChanges`` remembers the values of its
+concrete fields as loaded (or last saved). ``save()`` without
+``update_fields`` then writes just the changed columns, plus any
+``auto_now`` timestamp, and writes nothing at all (no query, no signals)
+when nothing changed. Receivers get the written columns as the usual
+``update_fields``, so they can ignore saves of fields they don't care
+about. Inserts and explicit ``update_fields`` saves behave as before.
+
+Values are compared after ``field.to_python``, so ``"12.5"`` set on a
+DecimalField holding ``12.50`` is no change. Deferred fields are only
+written if they were assigned.
+"""
+import copy
+import datetime
+import decimal
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.fields.files import FieldFile
+
+_IMMUTABLE = (str, int, float, bool, bytes, decimal.Decimal, datetime.date, datetime.time, datetime.timedelta, uuid.UUID)
+
+
+def _python(field, value):
+    try:
+        return field.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        return value
+
+
+def _frozen(field, value):
+    value = _python(field, value)
+    if value is None or isinstance(value, _IMMUTABLE):
+        return value
+    if isinstance(value, FieldFile):
+        # Compares equal to its name; copying it would copy the instance
+        return value.name
+    # Snapshots must not follow in-place edits (JSON dicts, geometries)
+    return copy.deepcopy(value)
+
+
+class TrackChanges(models.Model):
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember()
+        return instance
+
+    def _tracked(self):
+        for field in self._meta.concrete_fields:
+            if not field.primary_key:
+                yield field
+
+    def _remember(self, attnames=None):
+        """Take the current values as the stored ones (all loaded fields, or ``attnames``)."""
+        snapshot = getattr(self, '_stored', None)
+        if snapshot is None:
+            attnames = None
+        if attnames is None:
+            snapshot = self._stored = {}
+        for field in self._tracked():
+            if field.attname in self.__dict__ and (attnames is None or field.attname in attnames):
+                snapshot[field.attname] = _frozen(field, self.__dict__[field.attname])
+
+    def changed_fields(self):
+        """Names of the fields whose value differs from the stored row (all of them for a new instance)."""
+        stored = getattr(self, '_stored', None)
+        changed = set()
+        for field in self._tracked():
+            if field.attname not in self.__dict__:
+                # Deferred and never assigned
+                continue
+            if stored is None or self._state.adding or field.attname not in stored:
+                changed.add(field.name)
+                continue
+            if _python(field, self.__dict__[field.attname]) != stored[field.attname]:
+                changed.add(field.name)
+        return changed
+
+    def save(self, *args, **kwargs):
+        if kwargs.get('update_fields') is None and not kwargs.get('force_insert') and not self._state.adding:
+            changed = {
+                name for name in self.changed_fields()
+                if not getattr(self._meta.get_field(name), 'auto_now', False)
+            }
+            if not changed:
+                return
+            timestamps = {
+                field.name for field in self._tracked() if getattr(field, 'auto_now', False)
+            }
+            kwargs['update_fields'] = changed | timestamps
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self._remember(
+            None if update_fields is None
+            else {self._meta.get_field(name).attname for name in update_fields}
+        )
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get('fields')
+        self._remember(None if fields is None else {self._meta.get_field(name).attname for name in fields})
@@ -1,3 +1,111 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from decimal import Decimal
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.contrib.gis.geos import Point
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps import events
+from apps.listing.models import Listing
+from apps.messaging import conversations
+from apps.outbox import outbox
+from apps.user.factories import make_user
+
+
+async def read_frames(stream, count, timeout=1.0):
+    """Up to ``count`` SSE frames from ``stream``, as (event, data) pairs."""
+    frames = []
+    try:
+        async with asyncio.timeout(timeout):
+            while len(frames) < count:
+                event, data = (await anext(stream)).decode().strip().split('\n')
+                frames.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+    except TimeoutError:
+        pass
+    return frames
+
+
+@override_settings(EVENTS_BROKER='local', EVENTS_KEEPALIVE_SECONDS=60, SEMANTIC_SEARCH_ENABLED=False)
+class LiveEventTests(TestCase):
+    """
+    The live event stream (SSE). Events are published on commit, so writes
+    run under captureOnCommitCallbacks(execute=True).
+    """
+
+    def setUp(self):
+        self.farmer = make_user('farmer')
+        self.buyer = make_user('buyer')
+
+    async def test_stream_endpoint(self):
+        """The stream needs a token (header or ?token=) and starts with a retry hint"""
+        response = await self.async_client.get('/api/async/events/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = RefreshToken.for_user(self.farmer).access_token
+        response = await self.async_client.get(f'/api/async/events/?token={token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), f'retry: {events.RETRY_MS}\n\n'.encode())
+
+        events.hub.deliver(self.farmer.pk, events.encode('stats', {'messages_unread': 1}))
+        self.assertEqual(await anext(stream), b'event: stats\ndata: {"messages_unread": 1}\n\n')
+        await stream.aclose()
+
+    def test_stream_gives_back_the_request_thread(self):
+        """Once a stream has started, the thread its request was served on has exited"""
+        async def open_stream():
+            # As ASGIHandler runs every request
+            async with ThreadSensitiveContext():
+                request_thread = await sync_to_async(threading.current_thread)()
+                stream = events.stream(self.farmer.pk)
+                await anext(stream)
+                await sync_to_async(request_thread.join, thread_sensitive=False)(1)
+                alive = request_thread.is_alive()
+                await stream.aclose()
+            return request_thread, alive
+
+        request_thread, alive = asyncio.run(open_stream())
+
+        self.assertIsNot(request_thread, threading.main_thread())
+        self.assertFalse(alive)
+
+    def test_commits_push_events_to_open_streams(self):
+        """Messages, listing counts and badge changes reach the user's stream, and no one else's"""
+        loop = asyncio.new_event_loop()
+        open_before = len(events.hub)
+        farmer_stream, buyer_stream = events.stream(self.farmer.pk), events.stream(self.buyer.pk)
+        try:
+            # Subscribed once the retry hint is out
+            loop.run_until_complete(anext(farmer_stream))
+            loop.run_until_complete(anext(buyer_stream))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                conversations.start(self.buyer, self.farmer, 'Do you have yams?')
+                Listing.objects.create(
+                    owner=self.farmer, title='Yam', category='tubers', quantity=100, unit='tuber',
+                    price=2500, location=Point(3.3792, 6.5244, srid=4326)
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                badge = self.farmer.badge
+                badge.transaction_count, badge.average_rating = 6, Decimal('4.1')
+                badge.calculate_badge_level()
+                outbox.dispatch()
+
+            frames = loop.run_until_complete(read_frames(farmer_stream, 4))
+            self.assertEqual([event for event, _ in frames], ['message', 'stats', 'stats', 'badge'])
+            self.assertEqual(frames[0][1]['preview'], 'Do you have yams?')
+            self.assertEqual(frames[1][1], {'messages_unread': 1})
+            self.assertEqual(frames[2][1], {'active_listings': 1, 'total_listings': 1})
+            self.assertEqual(frames[3][1]['badge_level'], 'bronze')
+            self.assertEqual(loop.run_until_complete(read_frames(buyer_stream, 1, timeout=0.05)), [])
+        finally:
+            loop.run_until_complete(farmer_stream.aclose())
+            loop.run_until_complete(buyer_stream.aclose())
+            loop.close()
+        self.assertEqual(len(events.hub), open_before)
 
-# Create your tests here.
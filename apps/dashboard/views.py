@@ -3,25 +3,38 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from apps.user.models import User
+from apps.listing import tracking
+from apps.listing.models import Listing
+from apps.messaging.conversations import inbox_tag, unread_total
 from apps.user.serializers import UserSerializer
 from django.db.models import Sum
 from django.utils import timezone
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+from apps import events
+from apps.auth.authentication import async_jwt_required, query_token
+from apps.user.async_views import api_response
+from apps.cache import tiered_cache, user_tag
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def dashboard(request):
-    user = request.user
+DASHBOARD_CACHE_TIMEOUT = 60
+
+def build_dashboard(user):
+    """Role-specific stats and quick actions, shared by the sync and async views."""
     role = user.role.lower()
     days_since_joined = (timezone.now() - user.created_at).days
     profile_completion = getattr(user, "profile_completion", 0)
+    messages_unread = unread_total(user)
     
     if role == 'farmer':
+        views, viewers = tracking.owner_week(user)
         stats = {
-            "active_listings": 0,
+            "active_listings": user.listings.filter(status=Listing.Status.ACTIVE).count(),
             "total_sales": 0,
             "total_revenue": 0,
-            "messages_unread": 0,
-            "views_this_week": 0,
+            "messages_unread": messages_unread,
+            "views_this_week": views,
+            "unique_viewers_this_week": viewers,
             "trust_badge": "New User",
             "days_since_joined": days_since_joined
         }
@@ -36,7 +49,7 @@ def dashboard(request):
             "active_searches": 0,
             "total_purchases": 0,
             "suppliers_contacted": 0,
-            "messages_unread": 0,
+            "messages_unread": messages_unread,
             "trust_badge": "New User",
             "days_since_joined": days_since_joined
         }
@@ -48,9 +61,9 @@ def dashboard(request):
     elif role == 'co-ops':
         stats = {
             "member_count": 0,
-            "total_listings": 0,
+            "total_listings": user.listings.count(),
             "total_sales": 0,
-            "messages_unread": 0,
+            "messages_unread": messages_unread,
             "trust_badge": "New User",
             "days_since_joined": days_since_joined
         }
@@ -62,11 +75,49 @@ def dashboard(request):
         stats = {}
         quick_actions = []
 
-    return Response({
+    return {
         "role": role,
         "profile_completion": profile_completion,
         "stats": stats,
         "quick_actions": quick_actions
-    })
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    user = request.user
+    data = tiered_cache.get_or_set(
+        f"dashboard:{user.pk}",
+        lambda: build_dashboard(user),
+        tags=[user_tag(user.pk), inbox_tag(user.pk)],
+        timeout=DASHBOARD_CACHE_TIMEOUT,
+    )
+    return Response(data)
+
+
+@require_GET
+@async_jwt_required
+async def dashboard_async(request):
+    # Listing counts hit the database
+    data = await sync_to_async(build_dashboard, thread_sensitive=False)(request.user)
+    return api_response(data)
+
 
+@require_GET
+@query_token
+@async_jwt_required
+async def events_stream(request):
+    """
+    GET /api/async/events/ - Server-Sent Events for the signed-in user:
+    ``stats`` (dashboard deltas), ``message``, ``badge`` and ``resync``.
+    Authentication opens a connection on the request's thread; the stream
+    closes it and lets the thread go before its first frame, so an idle
+    stream holds neither (see ``events.release_request_thread``). ASGI only.
+    """
+    response = StreamingHttpResponse(events.stream(request.user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
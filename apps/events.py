@@ -0,0 +1,259 @@
+"""
+Live events pushed to connected clients over Server-Sent Events.
+
+``publish(user_id, event, data)`` sends an event to one user's open
+streams once the current transaction commits. A broker carries it to
+every worker process, and each process's ``hub`` hands it to that user's
+streams on their event loop. Events are small: ids, previews, and
+dashboard stat deltas to add to the last full ``GET /api/dashboard/stats/``.
+A client that reconnects, or gets a ``resync`` event, fetches the
+dashboard again.
+
+Brokers (EVENTS_BROKER):
+- ``local``: this process only. Enough for a single ASGI worker, and for
+  tests.
+- ``postgres``: ``pg_notify`` on EVENTS_CHANNEL. One thread per process
+  LISTENs and feeds the local hub, so a message sent through any worker
+  reaches streams held by any other.
+
+An idle stream is one suspended coroutine waiting on an ``asyncio.Event``,
+with a keepalive timer. Django gives every ASGI request a thread of its
+own for its sync work (signal receivers, the async ORM), kept until the
+response is closed; a stream closes that thread's database connections
+and lets it go before its first frame (``release_request_thread``), so
+while idle it holds no thread and no database connection.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger('apps.performance')
+
+# Frames queued for a slow client before it's told to resync instead
+MAX_PENDING = 256
+# Client reconnect delay, sent at the start of every stream
+RETRY_MS = 5000
+RESYNC = b"event: resync\ndata: {}\n\n"
+KEEPALIVE = b": keepalive\n\n"
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_NOTIFY_BYTES = 7999
+
+
+def encode(event, data):
+    """One SSE frame."""
+    return f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n".encode()
+
+
+class Subscriber:
+    """One open stream: frames waiting to be written, and a flag to wake it."""
+
+    __slots__ = ('user_id', 'loop', 'pending', 'ready', 'overflowed')
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.pending = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+
+    def put(self, frame):
+        """Queue ``frame``; runs on the subscriber's event loop."""
+        if self.overflowed:
+            return
+        if len(self.pending) >= MAX_PENDING:
+            self.pending.clear()
+            self.pending.append(RESYNC)
+            self.overflowed = True
+        else:
+            self.pending.append(frame)
+        self.ready.set()
+
+    def take(self):
+        frames = list(self.pending)
+        self.pending.clear()
+        self.overflowed = False
+        self.ready.clear()
+        return frames
+
+
+def _put_all(subscribers, frame):
+    for subscriber in subscribers:
+        subscriber.put(frame)
+
+
+class Hub:
+    """This process's open streams, by user."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        """A new subscriber on the running event loop."""
+        subscriber = Subscriber(str(user_id), asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[subscriber.user_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            streams = self._subscribers.get(subscriber.user_id)
+            if streams is not None:
+                streams.discard(subscriber)
+                if not streams:
+                    del self._subscribers[subscriber.user_id]
+
+    def deliver(self, user_id, frame):
+        """Hand ``frame`` to ``user_id``'s streams; safe to call from any thread."""
+        with self._lock:
+            streams = list(self._subscribers.get(str(user_id), ()))
+        by_loop = defaultdict(list)
+        for subscriber in streams:
+            by_loop[subscriber.loop].append(subscriber)
+        # One wake-up per event loop, however many streams it holds
+        for loop, subscribers in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_put_all, subscribers, frame)
+            except RuntimeError:
+                # The event loop has shut down
+                for subscriber in subscribers:
+                    self.unsubscribe(subscriber)
+        return len(streams)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(streams) for streams in self._subscribers.values())
+
+
+hub = Hub()
+
+
+class LocalBroker:
+    """Deliver straight to this process's streams."""
+
+    def send(self, user_id, frame):
+        hub.deliver(user_id, frame)
+
+    def start(self):
+        pass
+
+
+class PostgresBroker:
+    """Fan events out to every process with LISTEN/NOTIFY."""
+
+    def __init__(self, channel, alias='default'):
+        self.channel = channel
+        self.alias = alias
+        self._started = False
+        self._lock = threading.Lock()
+
+    def send(self, user_id, frame):
+        payload = json.dumps([user_id, frame.decode()])
+        if len(payload.encode()) > MAX_NOTIFY_BYTES:
+            logger.warning("Event for %s dropped: %d bytes is over the NOTIFY limit", user_id, len(payload))
+            return
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def start(self):
+        """Start this process's listener thread, once."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._listen_forever, name='events-listen', daemon=True).start()
+
+    def _listen_forever(self):
+        import psycopg
+        from psycopg import sql
+
+        params = connections[self.alias].get_connection_params()
+        while True:
+            try:
+                with psycopg.connect(**params, autocommit=True) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                    for notify in conn.notifies():
+                        user_id, frame = json.loads(notify.payload)
+                        hub.deliver(user_id, frame.encode())
+            except Exception:
+                logger.exception("Event listener lost its connection; reconnecting")
+                time.sleep(1)
+
+
+_brokers = {}
+
+
+def get_broker():
+    """This process's broker for EVENTS_BROKER."""
+    name = settings.EVENTS_BROKER
+    if name not in _brokers:
+        _brokers[name] = PostgresBroker(settings.EVENTS_CHANNEL) if name == 'postgres' else LocalBroker()
+    return _brokers[name]
+
+
+def publish(user_id, event, data):
+    """Send ``event`` to ``user_id``'s open streams once the current transaction commits."""
+    user_id, frame = str(user_id), encode(event, data)
+
+    def send():
+        # Never fail the request: clients resync when they reconnect
+        try:
+            get_broker().send(user_id, frame)
+        except Exception:
+            logger.exception("Publishing %s event to %s failed", event, user_id)
+
+    transaction.on_commit(send)
+
+
+async def release_request_thread():
+    """
+    Close the database connections of the thread serving this request and
+    let the thread go.
+
+    ``ASGIHandler`` runs each request in a ``ThreadSensitiveContext``: the
+    first thread-sensitive sync call (the ``request_started`` receivers,
+    the async ORM lookup in ``aauthenticate``, sync middleware hooks)
+    starts a thread that serves the request until its response is closed,
+    with whatever connection it opened. Once a streaming response has
+    started nothing runs there until the stream ends, and then Django
+    starts a new thread for ``request_finished`` if it needs one.
+
+    Does nothing outside such a context (the test client, a plain loop).
+    """
+    # asgiref keeps the executor per context; it has no public API for this
+    context = SyncToAsync.thread_sensitive_context.get(None)
+    if context is None or context not in SyncToAsync.context_to_thread_executor:
+        return
+    await sync_to_async(connections.close_all)()
+    executor = SyncToAsync.context_to_thread_executor.pop(context, None)
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+async def stream(user_id, keepalive=None):
+    """SSE frames for ``user_id``'s events until the client goes away."""
+    keepalive = keepalive or settings.EVENTS_KEEPALIVE_SECONDS
+    await release_request_thread()
+    get_broker().start()
+    subscriber = hub.subscribe(user_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n".encode()
+        while True:
+            try:
+                async with asyncio.timeout(keepalive):
+                    await subscriber.ready.wait()
+            except TimeoutError:
+                yield KEEPALIVE
+                continue
+            for frame in subscriber.take():
+                yield frame
+    finally:
+        hub.unsubscribe(subscriber)
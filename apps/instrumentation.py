@@ -0,0 +1,161 @@
+"""
+Per-request performance instrumentation.
+
+``PerformanceMiddleware`` opens a ``RequestTimings`` for each request. While
+it is open, every SQL query on any connection is counted and timed (through
+a connection execute wrapper), and code can attribute time to named spans:
+
+    with timed('serializer'):
+        data = UserSerializer(user).data
+
+    with timed('semantic'):
+        hits = semantic.search(query)
+
+The totals are emitted as a ``Server-Timing`` header and a JSON log line:
+``serializer`` always, other spans when the request recorded them.
+"""
+import json
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+
+logger = logging.getLogger('apps.performance')
+
+# Enough to explain an N+1 without letting one request hoard memory
+MAX_RECORDED_QUERIES = 500
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('spans', 'db_count', 'db_time', 'queries')
+
+    def __init__(self):
+        self.spans = defaultdict(float)
+        self.db_count = 0
+        self.db_time = 0.0
+        # (alias, sql, params, many, seconds)
+        self.queries = []
+
+
+def current_timings():
+    return _current.get()
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(span):
+    """
+    Add the block's wall time to ``span`` on the current request, if any.
+    SQL run inside the block (e.g. a lazy queryset) stays under ``db``.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    db_before = timings.db_time
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        timings.spans[span] += elapsed - (timings.db_time - db_before)
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper: time each query against the current request."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = perf_counter() - start
+        timings.db_count += 1
+        timings.db_time += duration
+        if len(timings.queries) < MAX_RECORDED_QUERIES:
+            timings.queries.append((context['connection'].alias, sql, params, many, duration))
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver; covers every thread's connections."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _spans(timings):
+    """``(span, seconds)``: ``serializer`` first, then whatever else was timed."""
+    spans = {'serializer': 0.0, **timings.spans}
+    return [('serializer', spans.pop('serializer'))] + sorted(spans.items())
+
+
+def server_timing_header(timings, total):
+    entries = [f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_count} queries"']
+    for span, seconds in _spans(timings):
+        entries.append(f'{span};dur={seconds * 1000:.1f}')
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def timing_record(request, response, timings, total):
+    match = getattr(request, 'resolver_match', None)
+    record = {
+        "event": "request_timing",
+        "method": request.method,
+        "path": request.path,
+        "url_name": match.url_name if match else None,
+        "status": response.status_code,
+        "total_ms": round(total * 1000, 2),
+        "db_ms": round(timings.db_time * 1000, 2),
+        "db_queries": timings.db_count,
+    }
+    for span, seconds in _spans(timings):
+        record[f"{span}_ms"] = round(seconds * 1000, 2)
+    return record
+
+
+def log_request(record):
+    logger.info(json.dumps(record))
+
+
+def explain_queries(timings, limit):
+    """EXPLAIN the slowest SELECTs of a finished request (never ANALYZE)."""
+    selects = [q for q in timings.queries if not q[3] and q[1].lstrip().upper().startswith('SELECT')]
+    selects.sort(key=lambda q: q[4], reverse=True)
+
+    explained = []
+    for alias, sql, params, _, duration in selects[:limit]:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql, params)
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception as exc:
+            plan = f"EXPLAIN failed: {exc}"
+        explained.append({
+            "db": alias,
+            "sql": sql,
+            "duration_ms": round(duration * 1000, 2),
+            "plan": plan,
+        })
+    return explained
+
+
+def log_slow_request(record, timings, limit):
+    logger.warning(json.dumps({
+        **record,
+        "event": "slow_request",
+        "queries": explain_queries(timings, limit),
+    }))
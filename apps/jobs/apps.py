@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self):
+        from django.conf import settings
+        from django.utils.module_loading import autodiscover_modules
+
+        # Register every app's @task functions (apps/<app>/tasks.py)
+        autodiscover_modules('tasks')
+
+        if settings.METRICS_ENABLED:
+            from apps import metrics
+            from apps.jobs import queue
+
+            metrics.register_queue_depth('jobs', queue.depth)
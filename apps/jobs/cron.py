@@ -0,0 +1,71 @@
+"""
+Five-field cron expressions: minute, hour, day of month, month, day of week.
+
+Fields take ``*``, numbers, ranges (``1-5``), steps (``*/15``, ``8-18/2``)
+and comma lists. Day of week runs 0-6 from Sunday (7 is Sunday too). As
+in cron, when both day fields are restricted a day matching either runs.
+Times are in TIME_ZONE.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+# (low, high) for each field
+RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# How far ahead to look for a match before calling the expression impossible (Feb 30)
+MAX_DAYS = 4 * 366
+
+
+def _field(text, low, high):
+    values = set()
+    for part in text.split(','):
+        part, _, step = part.partition('/')
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(v) for v in part.split('-', 1))
+        else:
+            start = end = int(part)
+            if step:
+                end = high
+        step = int(step) if step else 1
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"{text!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse(expr):
+    """``(minutes, hours, days, months, weekdays, any_day, any_weekday)`` for ``expr``."""
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f"{expr!r}: expected 5 fields, got {len(fields)}")
+    minutes, hours, days, months, weekdays = (
+        _field(text, low, high) for text, (low, high) in zip(fields, RANGES)
+    )
+    if 7 in weekdays:
+        weekdays = (weekdays - {7}) | {0}
+    return minutes, hours, days, months, weekdays, fields[2] == '*', fields[4] == '*'
+
+
+def next_after(expr, after):
+    """The first time ``expr`` fires strictly after ``after``."""
+    minutes, hours, days, months, weekdays, any_day, any_weekday = parse(expr)
+    minutes, hours = sorted(minutes), sorted(hours)
+    after = timezone.localtime(after)
+    start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    day = start.date()
+    for _ in range(MAX_DAYS):
+        weekday = (day.weekday() + 1) % 7
+        if any_day or any_weekday:
+            day_matches = day.day in days and weekday in weekdays
+        else:
+            day_matches = day.day in days or weekday in weekdays
+        if day.month in months and day_matches:
+            for hour in hours:
+                for minute in minutes:
+                    candidate = datetime.combine(day, time(hour, minute), tzinfo=start.tzinfo)
+                    if candidate >= start:
+                        return candidate
+        day += timedelta(days=1)
+    raise ValueError(f"{expr!r} never fires")
@@ -0,0 +1,70 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """One unit of background work; see ``apps.jobs.queue``."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    queue = models.CharField(max_length=50, default='default')
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Raw bytes the task needs (an uploaded photo); dropped once the job is done
+    payload = models.BinaryField(null=True, blank=True)
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    # At most one queued or running job per key; enqueueing a duplicate is a no-op
+    unique_key = models.CharField(max_length=200, null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=Q(status__in=['queued', 'running']),
+                name='job_unique_pending',
+            ),
+        ]
+        indexes = [
+            # The dequeue scan: only queued rows, in the order they're taken
+            models.Index(
+                fields=['queue', '-priority', 'run_at', 'id'],
+                condition=Q(status='queued'),
+                name='job_ready',
+            ),
+            # Stale locks of crashed workers
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='job_running'),
+            # Purging finished jobs
+            models.Index(fields=['finished_at'], condition=Q(status__in=['done', 'failed']), name='job_finished'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class Schedule(models.Model):
+    """A cron entry from JOBS_SCHEDULE and when it is next due."""
+    name = models.CharField(max_length=100, primary_key=True)
+    task = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    cron = models.CharField(max_length=100)
+    next_run_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.cron})"
@@ -0,0 +1,285 @@
+"""
+A background job queue in PostgreSQL.
+
+``enqueue`` inserts a ``Job`` row in the caller's transaction, so work for
+a change that rolls back never runs. Workers (``python manage.py
+run_jobs``) claim a batch with one statement:
+
+    UPDATE jobs_job SET status = 'running' ... WHERE id IN (
+        SELECT id FROM jobs_job WHERE status = 'queued' AND run_at <= now
+        ORDER BY priority DESC, run_at, id LIMIT n FOR UPDATE SKIP LOCKED
+    ) RETURNING ...
+
+``SKIP LOCKED`` makes concurrent workers pass over each other's rows
+instead of waiting on them, so every job goes to exactly one worker and
+adding workers adds throughput. The finished jobs of a batch are marked
+done with one more UPDATE: two queries per batch, not per job.
+
+A job that raises is retried after an exponential backoff with jitter
+until it has run ``max_attempts`` times, then left ``failed`` with its
+traceback. A job whose worker died stays ``running`` until
+JOBS_LOCK_TIMEOUT_SECONDS have passed and is then queued again, so tasks
+must be safe to run twice.
+
+Tasks are registered with ``@task`` in each app's ``tasks.py``; cron
+entries come from JOBS_SCHEDULE.
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.jobs import cron
+from apps.jobs.models import Job, Schedule
+
+logger = logging.getLogger('apps.performance')
+
+ENQUEUE_BATCH = 1000
+PURGE_BATCH = 10_000
+# Tail of the traceback kept on a failed job
+MAX_ERROR_CHARS = 4000
+
+
+class Task:
+    __slots__ = ('name', 'func', 'queue', 'priority', 'max_attempts')
+
+    def __init__(self, name, func, queue, priority, max_attempts):
+        self.name = name
+        self.func = func
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+
+# name -> Task; filled by @task as apps' tasks modules are imported
+TASKS = {}
+
+
+def task(name, queue='default', priority=0, max_attempts=5):
+    """
+    Register the decorated function as task ``name``. It is called with
+    the job's kwargs (and ``payload=`` bytes when the job has a payload);
+    ``func.enqueue(kwargs, ...)`` queues it.
+    """
+    def register(func):
+        TASKS[name] = Task(name, func, queue, priority, max_attempts)
+        func.enqueue = partial(enqueue, name)
+        return func
+    return register
+
+
+def _build(name, kwargs=None, *, payload=None, queue=None, priority=None, run_at=None, delay=None, unique_key=None):
+    try:
+        spec = TASKS[name]
+    except KeyError:
+        raise ValueError(f"Unknown task {name!r}") from None
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+    return Job(
+        queue=queue or spec.queue,
+        task=name,
+        kwargs=kwargs or {},
+        payload=payload,
+        priority=spec.priority if priority is None else priority,
+        run_at=run_at,
+        max_attempts=spec.max_attempts,
+        unique_key=unique_key,
+    )
+
+
+def enqueue(name, kwargs=None, **options):
+    """
+    Queue task ``name`` with ``kwargs`` (JSON). Options: ``payload``
+    (bytes), ``queue``, ``priority``, ``run_at`` or ``delay`` (seconds),
+    and ``unique_key``: while a job with the same key is queued or
+    running, this one is skipped. Returns the ``Job``; a keyed job gets
+    no pk, since it may have been skipped.
+    """
+    job = _build(name, kwargs, **options)
+    if job.unique_key is None:
+        job.save(force_insert=True)
+    else:
+        Job.objects.bulk_create([job], ignore_conflicts=True)
+    return job
+
+
+def enqueue_many(name, kwargs_list, **options):
+    """Queue one job of task ``name`` per kwargs dict, in batched INSERTs."""
+    jobs = [_build(name, kwargs, **options) for kwargs in kwargs_list]
+    Job.objects.bulk_create(jobs, batch_size=ENQUEUE_BATCH, ignore_conflicts=options.get('unique_key') is not None)
+    return len(jobs)
+
+
+# ---------------- Workers ----------------
+
+def dequeue(worker, queues, limit):
+    """Claim up to ``limit`` due jobs from ``queues`` for ``worker``, highest priority first."""
+    table = Job._meta.db_table
+    # Python's clock, not now(): inside a transaction now() is when it began
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {table}
+               SET status = %s, attempts = attempts + 1, locked_by = %s, locked_at = %s
+             WHERE id IN (
+                   SELECT id FROM {table}
+                    WHERE status = %s AND queue = ANY(%s) AND run_at <= %s
+                    ORDER BY priority DESC, run_at, id
+                    LIMIT %s
+                      FOR UPDATE SKIP LOCKED
+             )
+            RETURNING id, task, kwargs, payload, priority, run_at, attempts, max_attempts
+            """,
+            [Job.Status.RUNNING, worker, now, Job.Status.QUEUED, list(queues), now, limit],
+        )
+        rows = cursor.fetchall()
+    jobs = [
+        Job(
+            id=pk,
+            task=name,
+            kwargs=json.loads(kwargs) if isinstance(kwargs, str) else kwargs,
+            payload=bytes(payload) if payload is not None else None,
+            priority=priority,
+            run_at=run_at,
+            attempts=attempts,
+            max_attempts=max_attempts,
+            status=Job.Status.RUNNING,
+        )
+        for pk, name, kwargs, payload, priority, run_at, attempts, max_attempts in rows
+    ]
+    # RETURNING doesn't keep the subquery's order
+    jobs.sort(key=lambda job: (-job.priority, job.run_at, job.pk))
+    return jobs
+
+
+def perform(job):
+    """Run ``job``'s task; exceptions propagate to the worker."""
+    spec = TASKS.get(job.task)
+    if spec is None:
+        # Possibly a newer release enqueued it; retried until this worker has it
+        raise LookupError(f"No task registered as {job.task!r}")
+    kwargs = dict(job.kwargs)
+    if job.payload is not None:
+        kwargs['payload'] = job.payload
+    return spec.func(**kwargs)
+
+
+def complete(ids):
+    """Mark jobs done, in one UPDATE; their payloads are dropped."""
+    if not ids:
+        return 0
+    return Job.objects.filter(pk__in=ids).update(
+        status=Job.Status.DONE,
+        finished_at=timezone.now(),
+        payload=None,
+        locked_by='',
+    )
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: doubling, capped, with jitter."""
+    delay = min(settings.JOBS_RETRY_MAX_SECONDS, settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    # Spread out retries of jobs that failed together
+    return delay * random.uniform(0.5, 1.5)
+
+
+def retry_or_fail(job, error):
+    """Queue ``job`` again after a backoff, or mark it failed once out of attempts."""
+    now = timezone.now()
+    trace = ''.join(traceback.format_exception(error))[-MAX_ERROR_CHARS:]
+    jobs = Job.objects.filter(pk=job.pk)
+    if job.attempts >= job.max_attempts:
+        jobs.update(status=Job.Status.FAILED, finished_at=now, last_error=trace, locked_by='')
+        logger.error("Job %s (%s) failed after %d attempts", job.pk, job.task, job.attempts)
+        return False
+    jobs.update(
+        status=Job.Status.QUEUED,
+        run_at=now + timedelta(seconds=backoff(job.attempts)),
+        last_error=trace,
+        locked_by='',
+        locked_at=None,
+    )
+    return True
+
+
+def reap_stale():
+    """Queue again the jobs of workers that died mid-job; returns how many."""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.Status.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT_SECONDS),
+    )
+    # A job that keeps killing its worker is given up on like one that keeps raising
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED, finished_at=now, last_error="Worker lost", locked_by='',
+    )
+    requeued = stale.update(status=Job.Status.QUEUED, run_at=now, locked_by='', locked_at=None)
+    if failed or requeued:
+        logger.warning("Reaped stale jobs: %d queued again, %d failed", requeued, failed)
+    return requeued
+
+
+def depth():
+    """Jobs due and waiting for a worker (the ``queue_depth{queue="jobs"}`` gauge)."""
+    return Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=timezone.now()).count()
+
+
+def purge(days=None):
+    """Delete jobs finished more than ``days`` (JOBS_KEEP_FINISHED_DAYS) ago, in batches."""
+    days = settings.JOBS_KEEP_FINISHED_DAYS if days is None else days
+    finished = Job.objects.filter(
+        status__in=[Job.Status.DONE, Job.Status.FAILED],
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    )
+    deleted = 0
+    while True:
+        ids = list(finished.values_list('pk', flat=True)[:PURGE_BATCH])
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(pk__in=ids).delete()[0]
+
+
+# ---------------- Cron ----------------
+
+def sync_schedules(entries=None):
+    """Make ``Schedule`` match JOBS_SCHEDULE (``{name: {'cron', 'task', 'kwargs'}}``)."""
+    entries = settings.JOBS_SCHEDULE if entries is None else entries
+    now = timezone.now()
+    for name, entry in entries.items():
+        wanted = {'task': entry['task'], 'kwargs': entry.get('kwargs', {}), 'cron': entry['cron']}
+        schedule = Schedule.objects.filter(name=name).first()
+        if schedule is None:
+            Schedule.objects.create(name=name, next_run_at=cron.next_after(wanted['cron'], now), **wanted)
+        elif any(getattr(schedule, field) != value for field, value in wanted.items()):
+            for field, value in wanted.items():
+                setattr(schedule, field, value)
+            schedule.next_run_at = cron.next_after(schedule.cron, now)
+            schedule.save()
+    Schedule.objects.exclude(name__in=list(entries)).delete()
+
+
+def run_due_schedules():
+    """
+    Enqueue every schedule that is due and move it to its next time.
+    Workers ticking at once each lock different rows (SKIP LOCKED), so a
+    schedule fires once; runs missed while no worker was up fire once.
+    """
+    now = timezone.now()
+    fired = 0
+    with transaction.atomic():
+        due = Schedule.objects.select_for_update(skip_locked=True).filter(next_run_at__lte=now)
+        for schedule in due:
+            enqueue(schedule.task, schedule.kwargs, unique_key=f"schedule:{schedule.name}")
+            schedule.last_run_at = now
+            schedule.next_run_at = cron.next_after(schedule.cron, now)
+            schedule.save(update_fields=['last_run_at', 'next_run_at'])
+            fired += 1
+    return fired
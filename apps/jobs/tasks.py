@@ -0,0 +1,11 @@
+from apps.jobs import queue
+
+
+@queue.task('jobs.noop')
+def noop(**kwargs):
+    """Does nothing; what `bench_jobs` measures the queue itself with."""
+
+
+@queue.task('jobs.purge', priority=-10)
+def purge():
+    queue.purge()
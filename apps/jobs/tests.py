@@ -0,0 +1,146 @@
+import base64
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps import metrics
+from apps.jobs import cron, queue
+from apps.jobs.models import Job, Schedule
+from apps.jobs.worker import Worker
+from apps.user.factories import make_user
+
+
+class JobQueueTests(TestCase):
+    """
+    The background job queue. TestCase holds one connection, so the tests
+    run a burst worker in the test's own thread (concurrency=1);
+    ``bench_jobs`` is where many workers race for the same rows.
+    """
+
+    def setUp(self):
+        self.calls = []
+        tasks = mock.patch.dict(queue.TASKS)
+        tasks.start()
+        self.addCleanup(tasks.stop)
+
+        @queue.task('test.record')
+        def record(label):
+            self.calls.append(label)
+
+        @queue.task('test.flaky', max_attempts=2)
+        def flaky():
+            raise RuntimeError('flaky')
+
+    def test_priorities_delays_and_retries(self):
+        """Workers run due jobs by priority, skip duplicates, retry failures and then give up"""
+        queue.enqueue('test.record', {'label': 'low'}, priority=-1)
+        queue.enqueue('test.record', {'label': 'high'}, priority=5)
+        queue.enqueue('test.record', {'label': 'later'}, delay=3600)
+        queue.enqueue('test.record', {'label': 'once'}, unique_key='record:once')
+        queue.enqueue('test.record', {'label': 'twice'}, unique_key='record:once')
+        failing = queue.enqueue('test.flaky')
+
+        worker = Worker(concurrency=1, batch_size=10, burst=True).run()
+
+        self.assertEqual(self.calls, ['high', 'once', 'low'])
+        self.assertEqual((worker.done, worker.failed), (3, 1))
+        self.assertEqual(Job.objects.get(kwargs__label='later').status, Job.Status.QUEUED)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Job.Status.QUEUED, 1))
+        self.assertGreater(failing.run_at, timezone.now())
+        self.assertIn('RuntimeError: flaky', failing.last_error)
+
+        # Due again: its second failure is its last
+        Job.objects.filter(pk=failing.pk).update(run_at=timezone.now())
+        Worker(concurrency=1, burst=True).run()
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Job.Status.FAILED, 2))
+
+    @override_settings(JOBS_POLL_SECONDS=0)
+    def test_database_error_while_acknowledging_keeps_the_worker_alive(self):
+        """A failover mid-batch is logged and backed off from, like one while dequeuing"""
+        job = queue.enqueue('test.record', {'label': 'once'})
+
+        with mock.patch.object(queue, 'complete', side_effect=OperationalError('server closed the connection')), \
+                self.assertLogs('apps.performance', 'ERROR') as logs:
+            worker = Worker(concurrency=1, burst=True).run()
+
+        self.assertEqual(self.calls, ['once'])
+        self.assertEqual(worker.done, 0)
+        self.assertIn('could not reach the queue', logs.output[0])
+        # Unacknowledged: its lock goes stale and it runs again
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.RUNNING)
+
+    @override_settings(CLOUDINARY_STUB_UPLOADS=True)
+    def test_profile_work_runs_in_the_queue(self):
+        """The profile photo upload leaves the request for the job queue"""
+        user = make_user()
+        client = APIClient()
+        client.force_authenticate(user=user)
+        png = base64.b64decode(
+            'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+        )
+        photo = SimpleUploadedFile('photo.png', png, content_type='image/png')
+
+        response = client.patch('/api/auth/profile/', {'profile_photo': photo, 'bio': 'Yams'}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(user.bio, 'Yams')
+        self.assertFalse(user.profile_photo)
+        self.assertEqual(list(Job.objects.values_list('task', flat=True)), ['user.upload_profile_photo'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Worker(concurrency=1, burst=True).run()
+
+        user.refresh_from_db()
+        self.assertIn('res.cloudinary.com/stub', user.profile_photo.name)
+        self.assertFalse(Job.objects.exclude(status=Job.Status.DONE).exists())
+        self.assertFalse(Job.objects.filter(payload__isnull=False).exists())
+
+    def test_cron_schedules(self):
+        """Cron expressions give the next run; a due schedule enqueues once and moves on"""
+        now = datetime(2026, 10, 19, 10, 7, tzinfo=dt_timezone.utc)  # a Monday
+        self.assertEqual(cron.next_after('*/5 * * * *', now), datetime(2026, 10, 19, 10, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(cron.next_after('30 3 * * 0', now), datetime(2026, 10, 25, 3, 30, tzinfo=dt_timezone.utc))
+        with self.assertRaises(ValueError):
+            cron.parse('60 * * * *')
+
+        queue.sync_schedules({'tick': {'cron': '* * * * *', 'task': 'test.record', 'kwargs': {'label': 'tick'}}})
+        Schedule.objects.filter(name='tick').update(next_run_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(queue.run_due_schedules(), 1)
+        self.assertEqual(queue.run_due_schedules(), 0)
+        self.assertEqual(Job.objects.filter(task='test.record').count(), 1)
+        self.assertGreater(Schedule.objects.get(name='tick').next_run_at, timezone.now())
+
+        # Entries dropped from JOBS_SCHEDULE are removed
+        queue.sync_schedules()
+        self.assertEqual(set(Schedule.objects.values_list('name', flat=True)), set(settings.JOBS_SCHEDULE))
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_depth_is_counted_when_scraped(self):
+        """Requests don't count the queue; a scrape does"""
+        queue.enqueue('test.record', {'label': 'waiting'})
+        client = APIClient()
+        client.force_authenticate(user=make_user())
+
+        depth = mock.Mock(wraps=queue.depth)
+        with mock.patch.dict(metrics._queue_depth_sources):
+            metrics.register_queue_depth('jobs', depth)
+            client.get('/api/auth/profile/')
+            self.assertEqual(depth.call_count, 0)
+
+            body = metrics.render_metrics()[0].decode()
+
+        self.assertEqual(depth.call_count, 1)
+        self.assertIn('queue_depth{queue="jobs"} 1.0', body)
@@ -0,0 +1,114 @@
+"""
+The job worker behind ``python manage.py run_jobs``.
+
+A worker runs ``concurrency`` threads (just the calling thread for 1),
+each with its own database connection, claiming a batch, running it and
+acknowledging it. Every JOBS_TICK_SECONDS one of them also fires due
+cron schedules and requeues the jobs of dead workers. ``stop()`` lets
+each thread finish its current batch.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+from apps.jobs import queue
+
+logger = logging.getLogger('apps.performance')
+
+
+class Worker:
+    def __init__(self, queues=None, concurrency=None, batch_size=None, burst=False, name=None):
+        self.queues = list(queues or settings.JOBS_QUEUES)
+        self.concurrency = concurrency or settings.JOBS_CONCURRENCY
+        self.batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        # Exit once nothing is due instead of waiting for more
+        self.burst = burst
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.done = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._next_tick = 0.0
+
+    def run(self):
+        """Work until ``stop()`` (or, in burst mode, until the queues are drained)."""
+        queue.sync_schedules()
+        if self.concurrency == 1:
+            self._loop()
+            return self
+        threads = [
+            threading.Thread(target=self._thread_main, name=f"jobs-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _thread_main(self):
+        try:
+            self._loop()
+        finally:
+            # This thread's own database connection
+            connections.close_all()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self._tick()
+                jobs = queue.dequeue(f"{self.name}:{threading.get_ident()}", self.queues, self.batch_size)
+                if jobs:
+                    # Acknowledging the batch needs the database too
+                    self._run(jobs)
+            except Exception:
+                # Database restart or failover: back off and reconnect. Jobs
+                # left unacknowledged run again once their lock goes stale.
+                logger.exception("Job worker %s could not reach the queue", self.name)
+                self._recycle()
+                self._stop.wait(settings.JOBS_POLL_SECONDS)
+                continue
+            if not jobs:
+                if self.burst:
+                    return
+                self._stop.wait(settings.JOBS_POLL_SECONDS)
+                continue
+            self._recycle()
+
+    def _run(self, jobs):
+        done, failed = [], 0
+        for job in jobs:
+            try:
+                queue.perform(job)
+            except Exception as exc:
+                logger.warning("Job %s (%s) raised on attempt %d", job.pk, job.task, job.attempts, exc_info=True)
+                queue.retry_or_fail(job, exc)
+                failed += 1
+            else:
+                done.append(job.pk)
+        queue.complete(done)
+        with self._lock:
+            self.done += len(done)
+            self.failed += failed
+
+    def _recycle(self):
+        # Drop a broken or expired connection; never the one a test runs in
+        if not connection.in_atomic_block:
+            close_old_connections()
+
+    def _tick(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_tick:
+                return
+            self._next_tick = now + settings.JOBS_TICK_SECONDS
+        queue.reap_stale()
+        queue.run_due_schedules()
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class ListingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'listing'
+    name = 'apps.listing'
+
+    def ready(self):
+        from apps.listing import signals  # noqa: F401
@@ -0,0 +1,215 @@
+"""
+Facet counts for marketplace search: how many active listings there are
+per category, state and price bucket, next to the results.
+
+- ``ListingFacetCount`` holds active listings per (category, state, price
+  bucket). Signals keep it current on every save; ``rebuild()`` recomputes
+  it after bulk loads. Any mix of those three filters is answered from it
+  with one query over a few thousand rows, however many listings exist.
+- Filters the table can't answer (a radius, a free min/max price) are
+  counted exactly with GROUP BY, but only while at most FACET_EXACT_LIMIT
+  listings match. Bigger sets fall back to the table for the other
+  filters and the facet is marked ``exact: false``.
+- Each facet ignores its own filter: with ``category=grains`` selected the
+  category facet still shows how many tubers there are to switch to.
+
+Responses are cached per normalized query for FACET_CACHE_SECONDS.
+"""
+import hashlib
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from apps.cache import tiered_cache
+from apps.listing.filters import build_listing_queryset
+from apps.listing.models import PRICE_BUCKETS, Listing, ListingFacetCount, bucket_range, price_bucket
+
+DIMENSIONS = ('category', 'state', 'price')
+# Each facet is counted without its own filter
+OWN_PARAMS = {
+    'category': ('category',),
+    'state': ('state',),
+    'price': ('price_bucket', 'min_price', 'max_price'),
+}
+# Filters the count table can't answer
+QUERY_ONLY_PARAMS = ('min_price', 'max_price', 'location_lat')
+
+# Same buckets as price_bucket(), in SQL (first matching When wins)
+PRICE_BUCKET_SQL = Case(
+    *[When(price__gte=edge, then=Value(i)) for i, edge in reversed(list(enumerate(PRICE_BUCKETS)))],
+    default=Value(0),
+    output_field=IntegerField(),
+)
+
+
+# ---------------- Count table ----------------
+
+def facet_key(listing):
+    """The table row ``listing`` counts in, or None if it isn't active."""
+    if listing.status != Listing.Status.ACTIVE:
+        return None
+    return listing.category, listing.state, price_bucket(listing.price)
+
+
+def stored_facet_key(row):
+    """``facet_key`` of a stored row (``Listing._stored_row``); None for a new listing."""
+    return facet_key(Listing(**row)) if row else None
+
+
+def _adjust(key, delta):
+    category, state, bucket = key
+    rows = ListingFacetCount.objects.filter(category=category, state=state, price_bucket=bucket)
+    if rows.update(count=F('count') + delta) or delta < 0:
+        return
+    # First listing with this key
+    ListingFacetCount.objects.bulk_create(
+        [ListingFacetCount(category=category, state=state, price_bucket=bucket)],
+        ignore_conflicts=True,
+    )
+    rows.update(count=F('count') + delta)
+
+
+def apply_change(old, new):
+    """Move one listing from facet key ``old`` to ``new`` (None: not counted)."""
+    if old == new:
+        return
+    if old is not None:
+        _adjust(old, -1)
+    if new is not None:
+        _adjust(new, 1)
+
+
+def add_listings(listings):
+    """Count newly created ``listings`` in one update per key (bulk inserts skip the signals)."""
+    for key, count in Counter(facet_key(listing) for listing in listings).items():
+        if key is not None:
+            _adjust(key, count)
+
+
+def rebuild():
+    """
+    Recount the table from the listings: after seed_data, bulk imports or
+    ``queryset.update()`` calls, which skip signals. The table lock holds
+    back concurrent saves until the new counts are committed.
+    """
+    counts = (
+        Listing.objects.filter(status=Listing.Status.ACTIVE).order_by()
+        .values('category', 'state', bucket=PRICE_BUCKET_SQL)
+        .annotate(n=Count('pk'))
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {ListingFacetCount._meta.db_table} IN EXCLUSIVE MODE')
+        ListingFacetCount.objects.all().delete()
+        rows = ListingFacetCount.objects.bulk_create([
+            ListingFacetCount(category=c['category'], state=c['state'], price_bucket=c['bucket'], count=c['n'])
+            for c in counts
+        ], batch_size=1000)
+    return len(rows)
+
+
+# ---------------- Facets ----------------
+
+def normalize(params):
+    """
+    The filters that change facet counts, in canonical form: "25000" and
+    "25000.00", or a different parameter order, share one cache entry.
+    Paging and sorting parameters are dropped. Call after validation.
+    """
+    filters = {}
+    for name in ('category', 'state'):
+        if params.get(name):
+            filters[name] = params[name]
+    if params.get('price_bucket') not in (None, ''):
+        filters['price_bucket'] = str(int(params['price_bucket']))
+    for name in ('min_price', 'max_price'):
+        if params.get(name) not in (None, ''):
+            filters[name] = str(Decimal(params[name]).normalize())
+    if params.get('location_lat') and params.get('location_lng'):
+        for name in ('location_lat', 'location_lng', 'radius'):
+            if params.get(name) not in (None, ''):
+                filters[name] = repr(float(params[name]))
+    return filters
+
+
+def _table_counts(filters, dimensions):
+    """Disjunctive counts from the table, for the category/state/bucket part of ``filters``."""
+    selected = {
+        'category': filters.get('category'),
+        'state': filters.get('state'),
+        'price': int(filters['price_bucket']) if 'price_bucket' in filters else None,
+    }
+    rows = ListingFacetCount.objects.filter(count__gt=0).values_list('category', 'state', 'price_bucket', 'count')
+    counts = {dimension: Counter() for dimension in dimensions}
+    for row in rows:
+        for position, dimension in enumerate(DIMENSIONS):
+            if dimension in counts and all(
+                selected[other] is None or row[i] == selected[other]
+                for i, other in enumerate(DIMENSIONS) if other != dimension
+            ):
+                counts[dimension][row[position]] += row[3]
+    return counts
+
+
+def _query_counts(queryset, dimension):
+    value = PRICE_BUCKET_SQL if dimension == 'price' else F(dimension)
+    rows = queryset.order_by().values(value=value).annotate(n=Count('pk'))
+    return Counter({row['value']: row['n'] for row in rows})
+
+
+def _facet(dimension, counts):
+    if dimension == 'price':
+        entries = []
+        for bucket in sorted(counts):
+            low, high = bucket_range(bucket)
+            label = f"₦{low:,.0f} – ₦{high:,.0f}" if high is not None else f"₦{low:,.0f}+"
+            entries.append({'value': bucket, 'label': label, 'min': low, 'max': high, 'count': counts[bucket]})
+        return [e for e in entries if e['count'] > 0]
+    choices = Listing.Category if dimension == 'category' else Listing.State
+    return [
+        {'value': value, 'label': choices(value).label, 'count': count}
+        for value, count in counts.most_common()
+        # Listings without a state can't be filtered to
+        if count > 0 and value
+    ]
+
+
+def compute(filters):
+    """Facets for already-normalized ``filters``."""
+    counts, exact, from_table = {}, {}, []
+    for dimension in DIMENSIONS:
+        others = {k: v for k, v in filters.items() if k not in OWN_PARAMS[dimension]}
+        if not any(name in others for name in QUERY_ONLY_PARAMS):
+            from_table.append(dimension)
+            exact[dimension] = True
+            continue
+        queryset, _, _ = build_listing_queryset(others)
+        limit = settings.FACET_EXACT_LIMIT
+        if queryset.order_by()[:limit + 1].count() <= limit:
+            counts[dimension] = _query_counts(queryset, dimension)
+            exact[dimension] = True
+        else:
+            from_table.append(dimension)
+            exact[dimension] = False
+    if from_table:
+        counts.update(_table_counts(filters, from_table))
+
+    return {
+        'facets': {dimension: _facet(dimension, counts[dimension]) for dimension in DIMENSIONS},
+        'exact': exact,
+    }
+
+
+def facet_counts(params):
+    """Facets for search ``params``, cached per normalized query; raises SearchError."""
+    build_listing_queryset(params)
+    filters = normalize(params)
+    digest = hashlib.sha1(repr(sorted(filters.items())).encode()).hexdigest()
+    return tiered_cache.get_or_set(
+        f"listing-facets:{digest}",
+        lambda: compute(filters),
+        timeout=settings.FACET_CACHE_SECONDS,
+    )
@@ -0,0 +1,101 @@
+"""
+Query parameters shared by listing search, semantic search and facets.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+
+from apps.listing.models import PRICE_BUCKETS, Listing, bucket_range
+from apps.listing.pagination import SORTS
+
+DEFAULT_RADIUS_KM = 50
+MAX_RADIUS_KM = 500
+
+
+class SearchError(ValueError):
+    """Bad search parameter; ``args[0]`` is the ``{"field": ["message"]}`` error dict."""
+
+
+def _decimal(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise SearchError({name: ["A valid number is required."]})
+    return number
+
+
+def price_bucket_param(params):
+    value = params.get('price_bucket')
+    if value in (None, ''):
+        return None
+    try:
+        bucket = int(value)
+    except ValueError:
+        bucket = -1
+    if not 0 <= bucket < len(PRICE_BUCKETS):
+        raise SearchError({"price_bucket": [f"Choose a bucket from 0 to {len(PRICE_BUCKETS) - 1}."]})
+    return bucket
+
+
+def build_listing_queryset(params):
+    """
+    Active listings filtered by ``category``, ``state``, ``price_bucket``
+    (an index into PRICE_BUCKETS), ``min_price``/``max_price`` and
+    ``location_lat``/``location_lng``/``radius`` (km).
+    Returns ``(queryset, point, sort)``; raises SearchError.
+    """
+    queryset = Listing.objects.filter(status=Listing.Status.ACTIVE).select_related('owner__badge')
+
+    category = params.get('category')
+    if category:
+        if category not in Listing.Category.values:
+            raise SearchError({"category": [f"Choose one of: {', '.join(Listing.Category.values)}."]})
+        queryset = queryset.filter(category=category)
+
+    state = params.get('state')
+    if state:
+        if state not in Listing.State.values:
+            raise SearchError({"state": [f"Choose one of: {', '.join(Listing.State.values)}."]})
+        queryset = queryset.filter(state=state)
+
+    bucket = price_bucket_param(params)
+    if bucket is not None:
+        low, high = bucket_range(bucket)
+        queryset = queryset.filter(price__gte=low)
+        if high is not None:
+            queryset = queryset.filter(price__lt=high)
+
+    min_price, max_price = _decimal(params, 'min_price'), _decimal(params, 'max_price')
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+
+    # ---------------- Geo Search --------------------
+    point = None
+    lat, lng = params.get('location_lat'), params.get('location_lng')
+    if lat and lng:
+        try:
+            point = Point(float(lng), float(lat), srid=4326)
+            radius = min(max(float(params.get('radius', DEFAULT_RADIUS_KM)), 0), MAX_RADIUS_KM)
+        except ValueError:
+            raise SearchError({"location": ["Invalid lat/lng format"]})
+        # ST_DWithin on geography: metres, answered by the GiST index
+        queryset = (
+            queryset.filter(location__dwithin=(point, D(km=radius)))
+            .annotate(distance=Distance('location', point))
+        )
+
+    sort = params.get('sort') or ('distance' if point else 'newest')
+    if sort not in SORTS:
+        raise SearchError({"sort": [f"Choose one of: {', '.join(SORTS)}."]})
+    if sort == 'distance' and point is None:
+        raise SearchError({"sort": ["Sorting by distance needs location_lat and location_lng."]})
+    return queryset, point, sort
@@ -0,0 +1,157 @@
+"""
+Bulk listing import from CSV or XLSX, for co-ops listing many members'
+produce at once.
+
+The file is read as a stream (``csv`` over the upload, openpyxl in
+read-only mode for XLSX) and handled ``chunk_size`` rows at a time: each
+chunk is validated by one shared ``ListingCreateSerializer`` and its
+valid rows inserted with ``bulk_create`` in their own transaction. Memory
+holds one chunk and the error report, which keeps at most
+``max_errors`` entries, whatever the file size.
+
+``bulk_create`` skips post_save, so the ``listings_imported`` signal
+tells facet counts, dashboards and the price index about each chunk.
+The semantic index picks imports up on its next ``--refresh``.
+"""
+import codecs
+import csv
+from itertools import islice
+from zipfile import BadZipFile
+
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from apps.listing.models import Listing
+from apps.listing.serializers import ListingCreateSerializer
+from apps.listing.signals import listings_imported
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 1000
+REQUIRED_COLUMNS = ('title', 'category', 'quantity', 'unit', 'price', 'location_lat', 'location_lng')
+COLUMNS = tuple(ListingCreateSerializer.Meta.fields)
+
+
+class ImportFileError(ValueError):
+    """
+    The file as a whole can't be imported; ``args[0]`` is the
+    ``{"file": ["message"]}`` error dict. When reading failed part way,
+    ``report`` is the report of the rows before it, whose listings are
+    already committed; otherwise it is None.
+    """
+
+    def __init__(self, errors, report=None):
+        super().__init__(errors)
+        self.report = report
+
+
+def _column(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def _header(names):
+    header = [_column(name) for name in names]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise ImportFileError({"file": [f"Missing columns: {', '.join(missing)}."]})
+    return header
+
+
+def _record(header, values):
+    """Known, non-empty cells of one row; empty cells fall back to the serializer's defaults."""
+    record = {}
+    for name, value in zip(header, values):
+        if name not in COLUMNS or value is None:
+            continue
+        value = value.strip() if isinstance(value, str) else str(value)
+        if value:
+            record[name] = value
+    return record
+
+
+def _csv_rows(fileobj):
+    # utf-8-sig drops the BOM Excel writes at the start of "CSV UTF-8" files
+    reader = csv.reader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+    header = _header(next(reader, []))
+    for number, values in enumerate(reader, start=2):
+        if any(values):
+            yield number, _record(header, values)
+
+
+def _xlsx_rows(fileobj):
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError):
+        raise ImportFileError({"file": ["Not a readable .xlsx workbook."]})
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for number, values in enumerate(rows, start=2):
+            if any(v not in (None, '') for v in values):
+                yield number, _record(header, values)
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """``(row number, {column: text})`` for each non-empty row of a CSV or XLSX file."""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return _csv_rows(fileobj)
+    if name.endswith('.xlsx'):
+        return _xlsx_rows(fileobj)
+    raise ImportFileError({"file": ["Upload a .csv or .xlsx file."]})
+
+
+def _listing(owner, data):
+    lat, lng = data.pop('location_lat'), data.pop('location_lng')
+    return Listing(owner=owner, location=Point(lng, lat, srid=4326), **data)
+
+
+def import_listings(owner, rows, chunk_size=CHUNK_SIZE, max_errors=MAX_ERRORS, dry_run=False):
+    """
+    Validate ``rows`` (from ``iter_rows``) and create the valid ones as
+    ``owner``'s listings. Invalid rows are skipped and reported. With
+    ``dry_run`` nothing is written. Raises ImportFileError for an
+    unreadable file, with the report so far if earlier chunks were
+    already handled.
+    """
+    report = {
+        'rows': 0, 'valid': 0, 'created': 0, 'failed': 0,
+        'errors': [], 'errors_truncated': False, 'dry_run': dry_run,
+    }
+    # Fields are built once and reused for every row
+    serializer = ListingCreateSerializer()
+    rows = iter(rows)
+    last_row = 1
+    try:
+        while chunk := list(islice(rows, chunk_size)):
+            last_row = chunk[-1][0]
+            valid = []
+            for number, record in chunk:
+                try:
+                    valid.append(_listing(owner, dict(serializer.run_validation(record))))
+                except ValidationError as exc:
+                    report['failed'] += 1
+                    if len(report['errors']) < max_errors:
+                        report['errors'].append({'row': number, 'errors': as_serializer_error(exc)})
+                    else:
+                        report['errors_truncated'] = True
+            report['rows'] += len(chunk)
+            report['valid'] += len(valid)
+            if valid and not dry_run:
+                with transaction.atomic():
+                    Listing.objects.bulk_create(valid)
+                    listings_imported.send(sender=Listing, listings=valid)
+                report['created'] += len(valid)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        # The chunk being read is lost; the ones before it are committed
+        raise ImportFileError(
+            {"file": [f"Could not read past row {last_row} ({exc}); rows up to it were processed."]},
+            report,
+        )
+    return report
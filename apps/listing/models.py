@@ -1,5 +1,189 @@
 from django.db import models
+from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GistIndex
+from django.db.models import Q
+import uuid
+from bisect import bisect_right
+from decimal import Decimal
+
+from apps.user.models import User
+
+ACTIVE = Q(status='active')
+
+# Lower edges of the price facet buckets, in naira
+PRICE_BUCKETS = (0, 1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+
+
+def price_bucket(price):
+    """Index into PRICE_BUCKETS of the bucket ``price`` falls in."""
+    return max(0, bisect_right(PRICE_BUCKETS, price) - 1)
+
+
+def bucket_range(bucket):
+    """``(min, max)`` naira for a bucket; max is exclusive and None for the last one."""
+    upper = PRICE_BUCKETS[bucket + 1] if bucket + 1 < len(PRICE_BUCKETS) else None
+    return Decimal(PRICE_BUCKETS[bucket]), None if upper is None else Decimal(upper)
+
 
 class Listing(models.Model):
-    pass
+    class Category(models.TextChoices):
+        GRAINS = "grains", "Grains & Cereals"
+        TUBERS = "tubers", "Roots & Tubers"
+        VEGETABLES = "vegetables", "Vegetables"
+        FRUITS = "fruits", "Fruits"
+        LEGUMES = "legumes", "Legumes & Nuts"
+        CASH_CROPS = "cash_crops", "Cash Crops"
+        LIVESTOCK = "livestock", "Livestock"
+        POULTRY = "poultry", "Poultry & Eggs"
+        FISH = "fish", "Fish"
+        OTHER = "other", "Other"
+
+    class Unit(models.TextChoices):
+        KG = "kg", "Kilogram"
+        TONNE = "tonne", "Tonne"
+        BAG = "bag", "Bag"
+        BASKET = "basket", "Basket"
+        CRATE = "crate", "Crate"
+        TUBER = "tuber", "Tuber"
+        PIECE = "piece", "Piece"
+        LITRE = "litre", "Litre"
+        HEAD = "head", "Head"
+
+    class Status(models.TextChoices):
+        DRAFT = "draft", "Draft"
+        ACTIVE = "active", "Active"
+        SOLD = "sold", "Sold"
+        EXPIRED = "expired", "Expired"
+
+    class State(models.TextChoices):
+        ABIA = "abia", "Abia"
+        ADAMAWA = "adamawa", "Adamawa"
+        AKWA_IBOM = "akwa_ibom", "Akwa Ibom"
+        ANAMBRA = "anambra", "Anambra"
+        BAUCHI = "bauchi", "Bauchi"
+        BAYELSA = "bayelsa", "Bayelsa"
+        BENUE = "benue", "Benue"
+        BORNO = "borno", "Borno"
+        CROSS_RIVER = "cross_river", "Cross River"
+        DELTA = "delta", "Delta"
+        EBONYI = "ebonyi", "Ebonyi"
+        EDO = "edo", "Edo"
+        EKITI = "ekiti", "Ekiti"
+        ENUGU = "enugu", "Enugu"
+        FCT = "fct", "FCT Abuja"
+        GOMBE = "gombe", "Gombe"
+        IMO = "imo", "Imo"
+        JIGAWA = "jigawa", "Jigawa"
+        KADUNA = "kaduna", "Kaduna"
+        KANO = "kano", "Kano"
+        KATSINA = "katsina", "Katsina"
+        KEBBI = "kebbi", "Kebbi"
+        KOGI = "kogi", "Kogi"
+        KWARA = "kwara", "Kwara"
+        LAGOS = "lagos", "Lagos"
+        NASARAWA = "nasarawa", "Nasarawa"
+        NIGER = "niger", "Niger"
+        OGUN = "ogun", "Ogun"
+        ONDO = "ondo", "Ondo"
+        OSUN = "osun", "Osun"
+        OYO = "oyo", "Oyo"
+        PLATEAU = "plateau", "Plateau"
+        RIVERS = "rivers", "Rivers"
+        SOKOTO = "sokoto", "Sokoto"
+        TARABA = "taraba", "Taraba"
+        YOBE = "yobe", "Yobe"
+        ZAMFARA = "zamfara", "Zamfara"
+
+    SELLER_ROLES = ('farmer', 'co-ops')
+
+    public_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='listings',
+        limit_choices_to={'role__in': SELLER_ROLES},
+    )
+    title = models.CharField(max_length=120)
+    description = models.TextField(blank=True, default='', max_length=2000)
+    category = models.CharField(max_length=20, choices=Category.choices)
+
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    unit = models.CharField(max_length=10, choices=Unit.choices)
+    # Naira per unit
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    # Geography (not geometry): radius filters are in metres and use the GiST index
+    location = gis_models.PointField(geography=True, srid=4326)
+    location_text = models.CharField(max_length=255, blank=True, default='')
+    state = models.CharField(max_length=20, choices=State.choices, blank=True, default='')
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.ACTIVE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        # Marketplace search only ever reads active listings, so the search
+        # indexes are partial: sold and expired rows don't bloat them.
+        indexes = [
+            # Nearby: ST_DWithin / distance ordering
+            GistIndex(fields=['location'], condition=ACTIVE, name='listing_active_geo'),
+            # Category + price range, sorted by price either way (B-trees scan
+            # backwards too); public_id breaks ties for keyset pages
+            models.Index(fields=['category', 'price', 'public_id'], condition=ACTIVE, name='listing_active_cat_price'),
+            # Category feed, newest first
+            models.Index(fields=['category', 'created_at', 'public_id'], condition=ACTIVE, name='listing_active_cat_new'),
+            # Same two orders without a category filter
+            models.Index(fields=['price', 'public_id'], condition=ACTIVE, name='listing_active_price'),
+            models.Index(fields=['created_at', 'public_id'], condition=ACTIVE, name='listing_active_new'),
+            # Produce in my state, cheapest first
+            models.Index(fields=['state', 'price', 'public_id'], condition=ACTIVE, name='listing_active_state_price'),
+            # Seller dashboards: my listings by status
+            models.Index(fields=['owner', 'status'], name='listing_owner_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.quantity} {self.unit} @ ₦{self.price})"
+
+
+class ListingFacetCount(models.Model):
+    """
+    Active listings per (category, state, price bucket), kept current by
+    signals on every listing save. A few thousand rows at most, so facet
+    counts for any combination of these filters are a sum over this table
+    instead of a GROUP BY over every listing.
+    """
+    category = models.CharField(max_length=20, choices=Listing.Category.choices)
+    state = models.CharField(max_length=20, blank=True, default='')
+    price_bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'state', 'price_bucket'], name='listing_facet_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.category}/{self.state or '-'}/{self.price_bucket}: {self.count}"
+
+
+class ListingViewDay(models.Model):
+    """
+    Views of one listing on one (UTC) day, written in batches by
+    ``apps.listing.tracking``. ``viewers`` is a HyperLogLog sketch
+    (``apps.sketches``) of who viewed it: sketches of several days or
+    listings merge into their unique viewer count.
+    """
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='view_days')
+    day = models.DateField()
+    views = models.PositiveBigIntegerField(default=0)
+    viewers = models.BinaryField(default=b'')
+
+    class Meta:
+        constraints = [
+            # Also the index the owner's weekly stats read
+            models.UniqueConstraint(fields=['listing', 'day'], name='listing_view_day'),
+        ]
 
+    def __str__(self):
+        return f"{self.listing_id} {self.day}: {self.views} views"
@@ -0,0 +1,106 @@
+"""
+Keyset ("seek") pagination for marketplace search.
+
+OFFSET pagination reads and discards every skipped row and needs a COUNT(*)
+of the whole match set; at millions of listings both get slower the deeper
+a buyer scrolls. A keyset page instead resumes right after the last row it
+returned (``WHERE (sort_key, public_id) > (last_key, last_id)``), so every
+page is one index range scan of ``page_size`` rows.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from django.db.models import Q
+from rest_framework.utils.urls import replace_query_param
+
+# sort name -> (field, descending, value parser)
+SORTS = {
+    'newest': ('created_at', True, datetime.fromisoformat),
+    'price': ('price', False, Decimal),
+    '-price': ('price', True, Decimal),
+    'distance': ('distance', False, float),
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _key(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'm'):
+        # Distance measure from a geography annotation
+        return value.m
+    return str(value)
+
+
+class KeysetPagination:
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+    cursor_query_param = 'cursor'
+    sorts = SORTS
+    # Unique column that orders rows with equal sort keys
+    unique_field = 'public_id'
+    unique_parse = uuid.UUID
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request, parse):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return parse(value), self.unique_parse(pk)
+        except (ValueError, TypeError, ArithmeticError):
+            raise InvalidCursor(token)
+
+    def paginate_queryset(self, queryset, request, sort):
+        """Return one page of ``queryset`` ordered by ``sort`` (a ``sorts`` key)."""
+        field, descending, parse = self.sorts[sort]
+        self.request = request
+        self.field = field
+        page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request, parse)
+        if cursor is not None:
+            value, pk = cursor
+            op = 'lt' if descending else 'gt'
+            # Descending: key <= v AND (key < v OR id < pk). The first half is
+            # a plain index range bound; the OR only filters rows inside it.
+            queryset = queryset.filter(
+                Q(**{f'{field}__{op}e': value}),
+                Q(**{f'{field}__{op}': value}) | Q(**{f'{self.unique_field}__{op}': pk}),
+            )
+
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}{self.unique_field}')
+        # One extra row tells us whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        payload = json.dumps([_key(getattr(last, self.field)), str(getattr(last, self.unique_field))])
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def get_paginated_data(self, results):
+        return {
+            'next': self.get_next_link(),
+            'results': results,
+        }
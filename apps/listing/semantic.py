@@ -0,0 +1,453 @@
+"""
+Semantic listing search: sentence embeddings in a FAISS index.
+
+Keyword search misses "tomato" vs "tomatoes", "garri" vs "cassava flakes"
+and pidgin phrasing. Here every active listing's text is embedded (on CPU,
+in batches) and stored in a FAISS inner-product index; a query is embedded
+the same way and its nearest neighbours are the candidates.
+
+- ``build_listing_index`` writes the index to ``SEMANTIC_INDEX_DIR``: exact
+  (``IDMap2,Flat``) for small catalogues, ``IVF,SQ8`` from IVF_THRESHOLD
+  listings up (inverted lists, 1 byte per dimension)
+- workers memory-map that file read-only, so N workers share one copy
+  through the page cache, and reload it when a rebuild replaces it
+- listing saves in a worker go into a small in-memory delta; the base copy
+  of a changed listing is tombstoned. ``build_listing_index --refresh``
+  (cron, every minute or so) folds changes into the file for all workers
+- vector ids are the top 63 bits of the listing UUID, so no id map is
+  stored: a candidate is fetched back with a primary-key range scan
+
+Ranking is hybrid: candidates go through the same category/price/radius
+filters as keyword search, and with a location the score blends
+similarity with proximity.
+
+torch, sentence-transformers and faiss are imported on first use, never at
+worker boot.
+"""
+import json
+import logging
+import operator
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from functools import lru_cache, reduce
+from math import sqrt
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from apps.listing.models import Listing
+
+logger = logging.getLogger('apps.performance')
+
+INDEX_FILE = 'listings.faiss'
+META_FILE = 'listings.json'
+# Below this an exact scan is fast enough and recall is 1.0
+IVF_THRESHOLD = 100_000
+# FAISS wants ~40 training vectors per inverted list
+TRAIN_PER_LIST = 40
+
+# vector id = top 63 bits of the UUID (FAISS ids are signed 64-bit)
+ID_SHIFT = 65
+LOW_BITS = (1 << ID_SHIFT) - 1
+
+
+class SemanticUnavailable(RuntimeError):
+    """No index has been built, or it doesn't match the configured embedder."""
+
+
+def vector_id(public_id):
+    return public_id.int >> ID_SHIFT
+
+
+def _candidates_filter(ids):
+    """Primary-key ranges covering every UUID that maps to one of ``ids``."""
+    starts = [int(i) << ID_SHIFT for i in ids]
+    return reduce(operator.or_, (
+        Q(public_id__range=(uuid.UUID(int=start), uuid.UUID(int=start | LOW_BITS))) for start in starts
+    ))
+
+
+def listing_text(listing):
+    """What gets embedded: title, description, category and place."""
+    parts = [listing.title, listing.description, listing.get_category_display(), listing.location_text]
+    return '. '.join(p for p in parts if p)
+
+
+# ---------------- Embedders ----------------
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size):
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+
+class HashingEmbedder:
+    """
+    Offline stand-in: hashed word and character-trigram counts. No sense of
+    synonyms, but deterministic and instant, for tests and load tests.
+    """
+    name = 'hashing'
+    dim = 256
+
+    def encode(self, texts, batch_size=None):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = text.lower().replace('.', ' ').split()
+            grams = words + [w[i:i + 3] for w in words for i in range(max(1, len(w) - 2))]
+            for gram in grams:
+                h = zlib.crc32(gram.encode())
+                vectors[row, h % self.dim] += 1.0 if h & 1 << 31 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """The configured embedder, loaded once per process (a model load takes seconds)."""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            if settings.SEMANTIC_EMBEDDER == 'hashing':
+                _embedder = HashingEmbedder()
+            else:
+                _embedder = SentenceTransformerEmbedder(settings.SEMANTIC_MODEL)
+        return _embedder
+
+
+def embed(texts):
+    """Unit-length float32 vectors for ``texts``, encoded in SEMANTIC_BATCH_SIZE batches."""
+    return get_embedder().encode(texts, settings.SEMANTIC_BATCH_SIZE)
+
+
+@lru_cache(maxsize=1024)
+def embed_query(text):
+    vector = embed([text])[0]
+    vector.setflags(write=False)
+    return vector
+
+
+# ---------------- Index ----------------
+
+class SemanticIndex:
+    """
+    A read-only base index from disk plus an in-memory delta for listings
+    saved since it was built. ``removed`` tombstones base vectors that were
+    changed or taken down.
+    """
+
+    def __init__(self, base, meta, mtime=None):
+        import faiss
+
+        self.base = base
+        self.meta = meta
+        self.mtime = mtime
+        self.delta = faiss.index_factory(base.d, 'IDMap2,Flat', faiss.METRIC_INNER_PRODUCT)
+        self.removed = set()
+        self.lock = threading.Lock()
+
+    @property
+    def dim(self):
+        return self.base.d
+
+    def __len__(self):
+        return self.base.ntotal + self.delta.ntotal
+
+    def add(self, ids, vectors):
+        ids = np.asarray(ids, dtype=np.int64)
+        with self.lock:
+            self.delta.remove_ids(ids)
+            self.delta.add_with_ids(vectors, ids)
+            self.removed.update(ids.tolist())
+
+    def remove(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        with self.lock:
+            self.delta.remove_ids(ids)
+            self.removed.update(ids.tolist())
+
+    def search(self, vector, k):
+        """The ``k`` nearest ``(vector_id, similarity)`` pairs, best first."""
+        query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        hits = {}
+        with self.lock:
+            if self.base.ntotal:
+                # Over-fetch so tombstoned vectors don't eat into k
+                extra = min(len(self.removed), 4 * k)
+                scores, ids = self.base.search(query, min(k + extra, self.base.ntotal))
+                for score, i in zip(scores[0].tolist(), ids[0].tolist()):
+                    if i >= 0 and i not in self.removed:
+                        hits[i] = score
+            if self.delta.ntotal:
+                scores, ids = self.delta.search(query, min(k, self.delta.ntotal))
+                for score, i in zip(scores[0].tolist(), ids[0].tolist()):
+                    if i >= 0:
+                        hits[i] = score
+        return sorted(hits.items(), key=lambda hit: hit[1], reverse=True)[:k]
+
+
+def index_paths(directory=None):
+    directory = directory or settings.SEMANTIC_INDEX_DIR
+    return directory / INDEX_FILE, directory / META_FILE
+
+
+def _set_nprobe(index):
+    import faiss
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = settings.SEMANTIC_NPROBE
+
+
+def load_index(mmap=True):
+    """Read the persisted index; memory-mapped and read-only unless ``mmap`` is False."""
+    import faiss
+
+    index_path, meta_path = index_paths()
+    mtime = index_path.stat().st_mtime
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    base = faiss.read_index(str(index_path), flags)
+    _set_nprobe(base)
+    return SemanticIndex(base, json.loads(meta_path.read_text()), mtime)
+
+
+def save_index(index, meta):
+    """Write atomically: workers never map a half-written file."""
+    import faiss
+
+    index_path, meta_path = index_paths()
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    for path, write in (
+        (index_path, lambda tmp: faiss.write_index(index, str(tmp))),
+        (meta_path, lambda tmp: tmp.write_text(json.dumps(meta, indent=2))),
+    ):
+        tmp = path.with_name(path.name + '.tmp')
+        write(tmp)
+        os.replace(tmp, path)
+
+
+def iter_listings(queryset, chunk_size):
+    """Listings in primary-key order, one chunk at a time (keyset, not OFFSET)."""
+    queryset = queryset.only('public_id', 'title', 'description', 'category', 'location_text').order_by('public_id')
+    last = None
+    while True:
+        chunk = list((queryset.filter(public_id__gt=last) if last else queryset)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1].public_id
+
+
+def _embed_chunk(chunk):
+    ids = np.array([vector_id(listing.public_id) for listing in chunk], dtype=np.int64)
+    return ids, embed([listing_text(listing) for listing in chunk])
+
+
+def ivf_lists(count):
+    return max(1, int(4 * sqrt(count)))
+
+
+def index_factory(count):
+    """Exact search for small catalogues; IVF with 8-bit scalar quantization for large ones."""
+    if count < IVF_THRESHOLD:
+        return 'IDMap2,Flat'
+    return f'IVF{ivf_lists(count)},SQ8'
+
+
+def build(chunk_size=10_000, progress=None):
+    """
+    Embed every active listing and write a fresh index. UUID order is
+    random, so the first chunks double as the IVF training sample.
+    """
+    import faiss
+
+    started = datetime.now(timezone.utc)
+    embedder = get_embedder()
+    listings = Listing.objects.filter(status=Listing.Status.ACTIVE)
+    count = listings.count()
+    factory = index_factory(count)
+    index = faiss.index_factory(embedder.dim, factory, faiss.METRIC_INNER_PRODUCT)
+    train_size = TRAIN_PER_LIST * ivf_lists(count)
+
+    pending = []
+    for chunk in iter_listings(listings, chunk_size):
+        ids, vectors = _embed_chunk(chunk)
+        if not index.is_trained:
+            pending.append((ids, vectors))
+            if sum(len(i) for i, _ in pending) < train_size:
+                continue
+            index.train(np.concatenate([v for _, v in pending]))
+            for pending_ids, pending_vectors in pending:
+                index.add_with_ids(pending_vectors, pending_ids)
+            pending = []
+        else:
+            index.add_with_ids(vectors, ids)
+        if progress:
+            progress(index.ntotal)
+    if pending:
+        # Listings were deleted mid-build: train on what there is
+        index.train(np.concatenate([v for _, v in pending]))
+        for pending_ids, pending_vectors in pending:
+            index.add_with_ids(pending_vectors, pending_ids)
+
+    meta = {
+        'embedder': embedder.name,
+        'dim': embedder.dim,
+        'factory': factory,
+        'count': index.ntotal,
+        'built_at': started.isoformat(),
+        # Listings updated after this are picked up by refresh()
+        'watermark': started.isoformat(),
+    }
+    save_index(index, meta)
+    return meta
+
+
+def refresh(chunk_size=10_000):
+    """
+    Fold listings updated since the last build or refresh into the index
+    file. Returns ``(meta, changed)``. Deleted listings stay in the file
+    until the next full build; search drops them when it checks the
+    database.
+    """
+    started = datetime.now(timezone.utc)
+    current = load_index(mmap=False)
+    index, meta = current.base, current.meta
+    changed = Listing.objects.filter(updated_at__gte=datetime.fromisoformat(meta['watermark']))
+
+    count = 0
+    for chunk in iter_listings(changed, chunk_size):
+        index.remove_ids(np.array([vector_id(listing.public_id) for listing in chunk], dtype=np.int64))
+        active = [listing for listing in chunk if listing.status == Listing.Status.ACTIVE]
+        if active:
+            ids, vectors = _embed_chunk(active)
+            index.add_with_ids(vectors, ids)
+        count += len(chunk)
+
+    meta.update(count=index.ntotal, watermark=started.isoformat())
+    save_index(index, meta)
+    return meta, count
+
+
+# ---------------- Per-worker state ----------------
+
+_index = None
+_checked = 0.0
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """
+    This worker's index, reloaded at most every SEMANTIC_RELOAD_SECONDS if
+    the file was rebuilt. None if no index has been built yet.
+    """
+    global _index, _checked
+    now = time.monotonic()
+    if _index is not None and now - _checked < settings.SEMANTIC_RELOAD_SECONDS:
+        return _index
+    with _index_lock:
+        _checked = now
+        index_path, _ = index_paths()
+        try:
+            mtime = index_path.stat().st_mtime
+        except FileNotFoundError:
+            return _index
+        if _index is None or _index.mtime != mtime:
+            _index = load_index()
+            logger.info(json.dumps({"event": "semantic_index_loaded", "vectors": len(_index), **_index.meta}))
+        return _index
+
+
+def reset():
+    """Drop the loaded index, embedder and query cache (tests, rebuilds)."""
+    global _index, _embedder, _checked
+    with _index_lock:
+        _index, _checked = None, 0.0
+    with _embedder_lock:
+        _embedder = None
+    embed_query.cache_clear()
+
+
+def warm():
+    """Load the model and map the index before traffic (apps.warmup)."""
+    if not settings.SEMANTIC_SEARCH_ENABLED or not index_paths()[0].exists():
+        return
+    get_index()
+    embed_query('warm up')
+
+
+def sync_listing(listing, deleted=False):
+    """
+    Apply one saved or deleted listing to this worker's index. Other
+    workers see it after the next ``build_listing_index --refresh``.
+    """
+    index = _index
+    if index is None:
+        return
+    ids = [vector_id(listing.public_id)]
+    if deleted or listing.status != Listing.Status.ACTIVE:
+        index.remove(ids)
+    else:
+        index.add(ids, embed([listing_text(listing)]))
+
+
+# ---------------- Search ----------------
+
+def search(query, queryset, point=None, limit=20):
+    """
+    Rank ``queryset`` (already filtered by category, price and radius) by
+    similarity to ``query``. With a ``point`` the score blends in
+    proximity: ``(1 - w) * similarity + w / (1 + km / scale)``.
+    Returns ``[(listing, score)]``, best first.
+    """
+    if not settings.SEMANTIC_SEARCH_ENABLED:
+        raise SemanticUnavailable("Semantic search is disabled")
+    index = get_index()
+    if index is None:
+        raise SemanticUnavailable("Semantic index has not been built")
+    vector = embed_query(' '.join(query.lower().split()))
+    if len(vector) != index.dim:
+        raise SemanticUnavailable("Semantic index was built with a different model; rebuild it")
+
+    queryset = queryset.order_by()
+    k = settings.SEMANTIC_CANDIDATES
+    while True:
+        hits = dict(index.search(vector, k))
+        rows = list(queryset.filter(_candidates_filter(hits))) if hits else []
+        # Filters can drop most neighbours (e.g. a small radius): widen the net
+        if len(rows) >= limit or len(hits) < k or k >= settings.SEMANTIC_MAX_CANDIDATES:
+            break
+        k = min(k * 4, settings.SEMANTIC_MAX_CANDIDATES)
+
+    weight, scale = settings.SEMANTIC_GEO_WEIGHT, settings.SEMANTIC_GEO_SCALE_KM
+    ranked = []
+    for listing in rows:
+        similarity = hits.get(vector_id(listing.public_id))
+        if similarity is None:
+            continue
+        score = similarity
+        if point is not None:
+            score = (1 - weight) * similarity + weight / (1 + listing.distance.km / scale)
+        ranked.append((listing, score))
+    ranked.sort(key=lambda pair: pair[1], reverse=True)
+    return ranked[:limit]
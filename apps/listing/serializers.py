@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+from .models import Listing
+from apps.user.models import TrustBadge
+
+
+def owner_summary(owner):
+    """Seller name, role and badge shown on every listing."""
+    try:
+        badge = owner.badge.badge_level
+    except TrustBadge.DoesNotExist:
+        badge = None
+    return {
+        'id': owner.public_id,
+        'full_name': owner.get_full_name(),
+        'role': owner.role,
+        'badge': badge,
+    }
+
+
+class ListingSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(source='public_id', read_only=True)
+    owner = serializers.SerializerMethodField(read_only=True)
+    location_lat = serializers.SerializerMethodField(read_only=True)
+    location_lng = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Listing
+        fields = [
+            'id',
+            'owner',
+            'title',
+            'description',
+            'category',
+            'quantity',
+            'unit',
+            'price',
+            'location_lat',
+            'location_lng',
+            'location_text',
+            'state',
+            'status',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = fields
+
+    def get_owner(self, obj):
+        return owner_summary(obj.owner)
+
+    def get_location_lat(self, obj):
+        return obj.location.y
+
+    def get_location_lng(self, obj):
+        return obj.location.x
+
+
+class ListingCreateSerializer(serializers.ModelSerializer):
+    location_lat = serializers.FloatField(min_value=-90, max_value=90)
+    location_lng = serializers.FloatField(min_value=-180, max_value=180)
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    status = serializers.ChoiceField(
+        choices=[Listing.Status.DRAFT, Listing.Status.ACTIVE],
+        default=Listing.Status.ACTIVE,
+    )
+
+    class Meta:
+        model = Listing
+        fields = [
+            'title',
+            'description',
+            'category',
+            'quantity',
+            'unit',
+            'price',
+            'location_lat',
+            'location_lng',
+            'location_text',
+            'state',
+            'status',
+        ]
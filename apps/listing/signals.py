@@ -0,0 +1,109 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from apps import events
+from apps.cache import tiered_cache, user_tag
+from apps.listing import facets, semantic
+from apps.listing.models import Listing
+
+logger = logging.getLogger('apps.performance')
+
+# What receivers compare a save against: facet counts and price history
+STORED_FIELDS = ('category', 'state', 'price', 'status')
+
+# Sent with ``listings=[...]`` after a bulk_create of new listings (which
+# skips post_save), inside the inserting transaction
+listings_imported = Signal()
+
+
+@receiver([post_save, post_delete], sender=Listing)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """The owner's dashboard counts their listings."""
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: tiered_cache.invalidate(user_tag(owner_id)))
+
+
+@receiver(pre_save, sender=Listing)
+def remember_stored_row(sender, instance, raw=False, **kwargs):
+    """The listing as it is in the database before this save (None when new)."""
+    if raw or instance._state.adding:
+        instance._stored_row = None
+    else:
+        instance._stored_row = Listing.objects.filter(pk=instance.pk).values(*STORED_FIELDS).first()
+
+
+@receiver(post_save, sender=Listing)
+def update_facet_counts(sender, instance, raw=False, **kwargs):
+    """Same transaction as the save, so the counts roll back with it."""
+    if not raw:
+        stored = getattr(instance, '_stored_row', None)
+        facets.apply_change(facets.stored_facet_key(stored), facets.facet_key(instance))
+
+
+@receiver(post_delete, sender=Listing)
+def remove_facet_count(sender, instance, **kwargs):
+    facets.apply_change(facets.facet_key(instance), None)
+
+
+@receiver(listings_imported, sender=Listing)
+def count_imported_listings(sender, listings, **kwargs):
+    facets.add_listings(listings)
+    owner_ids = {listing.owner_id for listing in listings}
+    transaction.on_commit(lambda: tiered_cache.invalidate(*(user_tag(pk) for pk in owner_ids)))
+    for owner_id in owner_ids:
+        owned = [listing for listing in listings if listing.owner_id == owner_id]
+        _publish_counts(owner_id, {
+            'active_listings': sum(listing.status == Listing.Status.ACTIVE for listing in owned),
+            'total_listings': len(owned),
+        })
+
+
+@receiver(post_save, sender=Listing)
+def publish_listing_counts(sender, instance, created, raw=False, **kwargs):
+    """Live dashboard deltas for the owner's listing counts."""
+    if raw:
+        return
+    stored = getattr(instance, '_stored_row', None)
+    was_active = stored is not None and stored['status'] == Listing.Status.ACTIVE
+    delta = {
+        'active_listings': (instance.status == Listing.Status.ACTIVE) - was_active,
+        'total_listings': int(created),
+    }
+    _publish_counts(instance.owner_id, delta)
+
+
+@receiver(post_delete, sender=Listing)
+def publish_removed_listing(sender, instance, **kwargs):
+    delta = {'active_listings': -(instance.status == Listing.Status.ACTIVE), 'total_listings': -1}
+    _publish_counts(instance.owner_id, delta)
+
+
+def _publish_counts(owner_id, delta):
+    delta = {name: change for name, change in delta.items() if change}
+    if delta:
+        events.publish(owner_id, 'stats', delta)
+
+
+@receiver(post_save, sender=Listing)
+def update_semantic_index(sender, instance, **kwargs):
+    """Re-embed the listing in this worker's semantic index once committed."""
+    if settings.SEMANTIC_SEARCH_ENABLED:
+        transaction.on_commit(lambda: _sync(instance))
+
+
+@receiver(post_delete, sender=Listing)
+def remove_from_semantic_index(sender, instance, **kwargs):
+    if settings.SEMANTIC_SEARCH_ENABLED:
+        transaction.on_commit(lambda: _sync(instance, deleted=True))
+
+
+def _sync(listing, deleted=False):
+    # Never fail the request: the next index refresh catches up
+    try:
+        semantic.sync_listing(listing, deleted)
+    except Exception:
+        logger.exception("Semantic index update failed for listing %s", listing.public_id)
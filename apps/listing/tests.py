@@ -1,3 +1,447 @@
-from django.test import TestCase
+import io
+import tempfile
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.cache import tiered_cache
+from apps.listing import facets, imports, semantic, tracking
+from apps.listing.models import Listing, ListingFacetCount, ListingViewDay
+from apps.prices.models import PriceObservation
+from apps.sketches import HyperLogLog
+from apps.user.factories import make_user
+from apps.user.models import UserActivity
+
+
+class ListingSearchTests(TestCase):
+    """Listing creation, search filters and cursor pages"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.farmer = make_user('farmer')
+        self.buyer = make_user('buyer')
+
+    def make_listing(self, title, category, price, lng=3.3792, lat=6.5244, **extra):
+        return Listing.objects.create(
+            owner=self.farmer,
+            title=title,
+            category=category,
+            quantity=10,
+            unit='bag',
+            price=price,
+            location=Point(lng, lat, srid=4326),
+            **extra
+        )
+
+    def test_only_sellers_can_create_listings(self):
+        """Farmers can list produce; buyers get 403"""
+        data = {
+            'title': 'White maize',
+            'category': 'grains',
+            'quantity': '25',
+            'unit': 'bag',
+            'price': '38000',
+            'location_lat': 6.5244,
+            'location_lng': 3.3792,
+            'location_text': 'Epe, Lagos',
+        }
+
+        self.client.force_authenticate(user=self.buyer)
+        self.assertEqual(self.client.post('/api/listings/', data, format='json').status_code,
+                         status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.farmer)
+        response = self.client.post('/api/listings/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['status'], 'active')
+        self.assertEqual(response.data['location_lat'], 6.5244)
+        self.assertTrue(UserActivity.objects.filter(
+            user=self.farmer, action_type=UserActivity.ActionTypes.LISTING_CREATE
+        ).exists())
+
+    def test_search_filters_category_and_price(self):
+        """Only active listings in the category and price range come back, cheapest first"""
+        self.make_listing('Maize', 'grains', 40000)
+        self.make_listing('Rice', 'grains', 20000)
+        self.make_listing('Sorghum', 'grains', 90000)
+        self.make_listing('Old maize', 'grains', 30000, status='sold')
+        self.make_listing('Yam', 'tubers', 30000)
+
+        response = self.client.get('/api/listings/search/', {
+            'category': 'grains', 'min_price': 15000, 'max_price': 50000, 'sort': 'price'
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['title'] for r in response.data['results']], ['Rice', 'Maize'])
+        self.assertIsNone(response.data['next'])
+
+    def test_cursor_pages_cover_every_listing_once(self):
+        """Following `next` walks all listings without gaps or repeats, even with equal prices"""
+        for i in range(7):
+            self.make_listing(f'Beans {i}', 'legumes', 50000 if i % 2 else 60000)
+
+        seen = []
+        url = '/api/listings/search/?sort=-price&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [(r['price'], r['title']) for r in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        self.assertEqual([p for p, _ in seen], sorted((p for p, _ in seen), reverse=True))
+
+        response = self.client.get('/api/listings/search/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_nearby_search_sorted_by_distance(self):
+        """A location search returns listings within the radius, nearest first"""
+        self.make_listing('Ikeja tomatoes', 'vegetables', 25000, lng=3.3515, lat=6.6018)
+        self.make_listing('Epe tomatoes', 'vegetables', 25000, lng=3.9833, lat=6.5833)
+        self.make_listing('Kano tomatoes', 'vegetables', 20000, lng=8.5920, lat=12.0022)
+
+        response = self.client.get('/api/listings/search/', {
+            'location_lat': 6.5244, 'location_lng': 3.3792, 'radius': 100
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([r['title'] for r in results], ['Ikeja tomatoes', 'Epe tomatoes'])
+        self.assertLess(results[0]['distance'], results[1]['distance'])
+
+
+class SemanticListingSearchTests(TestCase):
+    """Semantic listing search (embeddings + FAISS)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        index_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(index_dir.cleanup)
+        overrides = self.settings(
+            SEMANTIC_SEARCH_ENABLED=True,
+            # Stands in for sentence-transformers: no model download
+            SEMANTIC_EMBEDDER='hashing',
+            SEMANTIC_INDEX_DIR=Path(index_dir.name),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        semantic.reset()
+        self.addCleanup(semantic.reset)
+
+        self.farmer = make_user('farmer')
+
+    def make_listing(self, title, description, category='vegetables', lng=8.8583, lat=9.8965, **extra):
+        return Listing.objects.create(
+            owner=self.farmer,
+            title=title,
+            description=description,
+            category=category,
+            quantity=10,
+            unit='basket',
+            price=25000,
+            location=Point(lng, lat, srid=4326),
+            location_text='Jos',
+            **extra
+        )
+
+    def search(self, **params):
+        return self.client.get('/api/listings/semantic/', params)
+
+    def test_ranks_closest_meaning_first(self):
+        """After the index is built, the best match comes first and sold listings never show"""
+        self.make_listing('Tomatoes', 'Fresh Roma tomatoes, picked this week')
+        self.make_listing('Yam', 'Big white yam tubers', category='tubers')
+        self.make_listing('Tomatoes', 'Fresh tomatoes, last season', status='sold')
+
+        self.assertEqual(self.search(q='fresh tomatoes').status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        call_command('build_listing_index', stdout=io.StringIO())
+        response = self.search(q='fresh tomatoes Jos')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([r['title'] for r in results], ['Tomatoes', 'Yam'])
+        self.assertGreater(results[0]['score'], results[1]['score'])
+
+    def test_new_and_sold_listings_update_the_index(self):
+        """A listing saved after the build is searchable at once; marking it sold removes it"""
+        self.make_listing('Yam', 'Big white yam tubers', category='tubers')
+        call_command('build_listing_index', stdout=io.StringIO())
+        self.search(q='yam')  # loads the index in this worker
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pepper = self.make_listing('Scotch bonnet pepper', 'Hot ata rodo pepper')
+        self.assertEqual(self.search(q='ata rodo pepper').data['results'][0]['id'], pepper.public_id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pepper.status = Listing.Status.SOLD
+            pepper.save()
+        ids = [r['id'] for r in self.search(q='ata rodo pepper').data['results']]
+        self.assertNotIn(pepper.public_id, ids)
+        self.assertIn(semantic.vector_id(pepper.public_id), semantic.get_index().removed)
+
+    def test_location_filters_and_boosts(self):
+        """With a location, far listings are filtered out and nearer ones rank higher"""
+        near = self.make_listing('Onions', 'Red onions in bags', lng=8.87, lat=9.90)
+        farther = self.make_listing('Onions', 'Red onions in bags', lng=9.20, lat=9.90)
+        self.make_listing('Onions', 'Red onions in bags', lng=8.5920, lat=12.0022)  # Kano
+        call_command('build_listing_index', stdout=io.StringIO())
+
+        response = self.search(q='red onions', location_lat=9.8965, location_lng=8.8583, radius=100)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data['results']], [near.public_id, farther.public_id])
+
+
+class ListingFacetTests(TestCase):
+    """
+    Listing facet counts. The table is kept up to date by signals, so the
+    tests compare it with a fresh recount after every change.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        tiered_cache.clear()
+        self.farmer = make_user('farmer')
+
+    def make_listing(self, category, state, price, lng=3.3792, lat=6.5244, **extra):
+        return Listing.objects.create(
+            owner=self.farmer,
+            title=f'{category} from {state}',
+            category=category,
+            state=state,
+            quantity=10,
+            unit='bag',
+            price=price,
+            location=Point(lng, lat, srid=4326),
+            **extra
+        )
+
+    def table(self):
+        return set(ListingFacetCount.objects.filter(count__gt=0)
+                   .values_list('category', 'state', 'price_bucket', 'count'))
+
+    def test_signals_keep_counts_in_sync(self):
+        """Creating, repricing, selling and deleting listings keeps the table equal to a recount"""
+        maize = self.make_listing('grains', 'lagos', 38000)
+        self.make_listing('grains', 'lagos', 40000)
+        yam = self.make_listing('tubers', 'oyo', 2500)
+        self.make_listing('grains', 'kano', 30000, status='draft')
+
+        maize.price = 120000
+        maize.save()
+        yam.status = Listing.Status.SOLD
+        yam.save()
+        self.make_listing('fish', 'rivers', 3500).delete()
+
+        self.assertEqual(self.table(), {('grains', 'lagos', 4, 1), ('grains', 'lagos', 6, 1)})
+        counted = self.table()
+        facets.rebuild()
+        self.assertEqual(self.table(), counted)
+
+    def test_each_facet_ignores_its_own_filter(self):
+        """With category=grains selected, categories still show other options; states only count grains"""
+        self.make_listing('grains', 'lagos', 38000)
+        self.make_listing('grains', 'kano', 30000)
+        self.make_listing('grains', 'kano', 600)
+        self.make_listing('tubers', 'lagos', 2500)
+
+        response = self.client.get('/api/listings/facets/', {'category': 'grains'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['facets']
+        self.assertEqual({f['value']: f['count'] for f in result['category']}, {'grains': 3, 'tubers': 1})
+        self.assertEqual({f['value']: f['count'] for f in result['state']}, {'kano': 2, 'lagos': 1})
+        self.assertEqual({f['value']: f['count'] for f in result['price']}, {0: 1, 4: 2})
+        self.assertTrue(all(response.data['exact'].values()))
+
+        # Same query, different spelling: served from the cache
+        with self.assertNumQueries(0):
+            self.client.get('/api/listings/facets/', {'category': 'grains', 'sort': 'price', 'page_size': 5})
+
+    def test_radius_counts_small_result_sets_exactly(self):
+        """A radius filter is counted exactly over the listings inside it"""
+        self.make_listing('vegetables', 'lagos', 25000)
+        self.make_listing('grains', 'lagos', 38000, lng=3.40, lat=6.60)
+        self.make_listing('grains', 'kano', 30000, lng=8.5920, lat=12.0022)
+
+        response = self.client.get('/api/listings/facets/', {
+            'location_lat': 6.5244, 'location_lng': 3.3792, 'radius': 50
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['facets']
+        self.assertEqual({f['value']: f['count'] for f in result['category']}, {'vegetables': 1, 'grains': 1})
+        self.assertEqual({f['value']: f['count'] for f in result['state']}, {'lagos': 2})
+        self.assertEqual(response.data['exact'], {'category': True, 'state': True, 'price': True})
+
+
+class ListingImportTests(TestCase):
+    """Bulk listing import from CSV and XLSX uploads"""
+
+    HEADER = 'title,category,quantity,unit,price,location_lat,location_lng,state\n'
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        tiered_cache.clear()
+        self.coop = make_user('co-ops')
+        self.client.force_authenticate(user=self.coop)
+
+    def upload(self, content, name='listings.csv', **data):
+        return self.client.post(
+            '/api/listings/import/',
+            {'file': SimpleUploadedFile(name, content), **data},
+            format='multipart'
+        )
+
+    def test_valid_rows_imported_and_invalid_rows_reported(self):
+        """Good rows become listings (counted in facets and prices); bad rows come back by row number"""
+        content = (
+            self.HEADER
+            + 'White maize,grains,20,bag,38000,12.0022,8.5920,kano\n'
+            + 'Yam,rocks,5,tuber,2500,7.3775,3.9470,oyo\n'
+            + '\n'
+            + 'Tomatoes,vegetables,3,basket,,9.8965,8.8583,plateau\n'
+            + 'Beans,legumes,10,bag,52000,11.9964,8.5167,kano\n'
+        ).encode()
+
+        response = self.upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (4, 2, 2))
+        self.assertEqual([e['row'] for e in response.data['errors']], [3, 5])
+        self.assertIn('category', response.data['errors'][0]['errors'])
+        self.assertIn('price', response.data['errors'][1]['errors'])
+
+        self.assertEqual(
+            set(Listing.objects.filter(owner=self.coop).values_list('title', 'state')),
+            {('White maize', 'kano'), ('Beans', 'kano')},
+        )
+        self.assertEqual(
+            ListingFacetCount.objects.filter(state='kano').aggregate(n=Sum('count'))['n'], 2
+        )
+        self.assertEqual(PriceObservation.objects.filter(commodity__in=['maize', 'beans']).count(), 2)
+
+    def test_unreadable_rest_of_file_reports_what_was_saved(self):
+        """A read error part way answers with the rows already committed, and logs them"""
+        content = (
+            self.HEADER
+            + 'White maize,grains,20,bag,38000,12.0022,8.5920,kano\n'
+            + 'Beans,legumes,10,bag,52000,11.9964,8.5167,kano\n'
+        ).encode() + b'Yam,tubers,5,tuber,2500,7.3775,3.9470,\xff\xfe\n'
+
+        with mock.patch.object(imports, 'import_listings', partial(imports.import_listings, chunk_size=2)):
+            response = self.upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('row 3', response.data['error']['file'][0])
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (2, 2, 0))
+        self.assertEqual(Listing.objects.filter(owner=self.coop).count(), 2)
+        activity = UserActivity.objects.get(user=self.coop, action_type=UserActivity.ActionTypes.LISTING_CREATE)
+        self.assertEqual((activity.metadata['created'], activity.metadata['complete']), (2, False))
+
+    def test_xlsx_dry_run_and_permissions(self):
+        """An XLSX dry run validates without writing; farmers can't import"""
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['Title', 'Category', 'Quantity', 'Unit', 'Price', 'Location Lat', 'Location Lng'])
+        sheet.append(['Garri', 'tubers', 40, 'bag', 18000, 6.4550, 3.3941])
+        sheet.append(['Palm oil', 'cash_crops', 25, 'litre', 1500, 5.1066, 7.3667])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        response = self.upload(buffer.getvalue(), name='members.xlsx', dry_run='true')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['valid'], response.data['created']), (2, 0))
+        self.assertFalse(Listing.objects.exists())
+
+        response = self.upload(b'title\n', name='listings.txt')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.coop.role = 'farmer'
+        self.coop.save()
+        response = self.upload(self.HEADER.encode())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(VIEW_FLUSH_SECONDS=3600)
+class ListingViewTrackingTests(TestCase):
+    """
+    Listing view counters. Views wait in a per-process buffer, so the tests
+    call tracking.flush() to write them, as the background flusher would.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        tiered_cache.clear()
+        tracking.buffer.drain()
+        self.farmer = make_user('farmer')
+        self.listing = Listing.objects.create(
+            owner=self.farmer, title='Maize', category='grains', quantity=10, unit='bag',
+            price=38000, location=Point(3.3792, 6.5244, srid=4326)
+        )
+        self.buyers = [make_user('buyer') for _ in range(3)]
+
+    def test_views_are_buffered_then_flushed(self):
+        """Views cost no writes until flushed; repeat viewers count once and the owner not at all"""
+        url = f'/api/listings/{self.listing.public_id}/'
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        for buyer in self.buyers:
+            self.client.force_authenticate(user=buyer)
+            self.client.get(url)
+            self.client.get(url)
+        self.client.force_authenticate(user=self.farmer)
+        self.client.get(url)
+        self.assertFalse(ListingViewDay.objects.exists())
+
+        tracking.flush()
+
+        row = ListingViewDay.objects.get(listing=self.listing)
+        self.assertEqual(row.views, 7)
+        response = self.client.get(f'/api/listings/{self.listing.public_id}/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['views'], response.data['unique_viewers']), (7, 4))
+
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.data['stats']['views_this_week'], 7)
+        self.assertEqual(response.data['stats']['unique_viewers_this_week'], 4)
+
+    def test_sketches_merge_across_workers_and_days(self):
+        """Two workers flushing the same day add up; a viewer seen on two days counts once for the week"""
+        today = timezone.now().date()
+        first, second = tracking.ViewBuffer(), tracking.ViewBuffer()
+        for i in range(300):
+            first.record(self.listing.pk, f'u:{i}', day=today)
+            second.record(self.listing.pk, f'u:{i + 200}', day=today)
+            second.record(self.listing.pk, f'u:{i}', day=today - timedelta(days=1))
+        first.flush()
+        second.flush()
+
+        today_row = ListingViewDay.objects.get(listing=self.listing, day=today)
+        self.assertEqual(today_row.views, 600)
+        self.assertAlmostEqual(HyperLogLog.from_bytes(bytes(today_row.viewers)).count(), 500, delta=50)
+
+        stats = tracking.listing_stats(self.listing, days=7)
+        self.assertEqual(stats['views'], 900)
+        self.assertAlmostEqual(stats['unique_viewers'], 500, delta=50)
+        self.assertEqual(len(stats['days']), 2)
 
-# Create your tests here.
@@ -0,0 +1,192 @@
+"""
+Listing view counts without a database write per view.
+
+Each worker keeps a buffer of ``(listing, day) -> [views, sketch]`` in
+memory, where the sketch is a HyperLogLog of viewer keys. Every
+VIEW_FLUSH_SECONDS (or once VIEW_BUFFER_MAX_KEYS listings are pending) a
+background thread drains it into ``ListingViewDay``: missing rows are
+inserted, existing ones locked in key order, and counts added and
+sketches merged (register-wise max) in Python, a few queries per 500
+listings however many views they got. Several workers flushing the same
+row serialize on the row lock; merging is order-independent, so the
+result is the same either way.
+
+Views still in a buffer are not visible yet, and are lost if the worker
+is killed; a graceful exit flushes.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.listing.models import Listing, ListingViewDay
+from apps.sketches import HyperLogLog, merged
+
+logger = logging.getLogger('apps.performance')
+
+WRITE_BATCH = 500
+
+
+def viewer_key(request):
+    """Who is viewing: the user, or a hash of IP and user agent for anonymous visitors."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"u:{user.pk}"
+    ip = (request.META.get('HTTP_X_FORWARDED_FOR') or request.META.get('REMOTE_ADDR') or '').split(',')[0].strip()
+    agent = request.META.get('HTTP_USER_AGENT', '')
+    return "a:" + hashlib.sha1(f"{ip}|{agent}".encode()).hexdigest()
+
+
+def _sketch(data):
+    return HyperLogLog.from_bytes(data) if data else HyperLogLog()
+
+
+def write(pending):
+    """Add drained ``{(listing_id, day): [views, sketch]}`` counts to ``ListingViewDay``."""
+    keys = iter(sorted(pending, key=lambda key: (str(key[0]), key[1])))
+    while batch := list(islice(keys, WRITE_BATCH)):
+        listing_ids = {listing_id for listing_id, _ in batch}
+        # Listings deleted since they were viewed
+        existing = set(Listing.objects.filter(pk__in=listing_ids).values_list('pk', flat=True))
+        batch = [key for key in batch if key[0] in existing]
+        if not batch:
+            continue
+        with transaction.atomic():
+            ListingViewDay.objects.bulk_create(
+                [ListingViewDay(listing_id=listing_id, day=day) for listing_id, day in batch],
+                ignore_conflicts=True,
+            )
+            rows = (
+                ListingViewDay.objects.select_for_update()
+                .filter(listing_id__in=existing, day__in={day for _, day in batch})
+                .order_by('listing_id', 'day')
+            )
+            changed = []
+            for row in rows:
+                entry = pending.get((row.listing_id, row.day))
+                if entry is None:
+                    continue
+                views, sketch = entry
+                row.views += views
+                row.viewers = _sketch(row.viewers).merge(sketch).to_bytes()
+                changed.append(row)
+            ListingViewDay.objects.bulk_update(changed, ['views', 'viewers'])
+
+
+class ViewBuffer:
+    """Per-process view counts waiting to be written."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._flushing = False
+
+    def record(self, listing_id, viewer, day=None):
+        day = day or timezone.now().date()
+        with self._lock:
+            entry = self._pending.get((listing_id, day))
+            if entry is None:
+                entry = self._pending[listing_id, day] = [0, HyperLogLog()]
+            entry[0] += 1
+            entry[1].add(viewer)
+            due = not self._flushing and (
+                len(self._pending) >= settings.VIEW_BUFFER_MAX_KEYS
+                or time.monotonic() - self._last_flush >= settings.VIEW_FLUSH_SECONDS
+            )
+            if due:
+                self._flushing = True
+        if due:
+            threading.Thread(target=self._flush_in_background, name='view-flush', daemon=True).start()
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        return pending
+
+    def _restore(self, pending):
+        with self._lock:
+            for key, (views, sketch) in pending.items():
+                entry = self._pending.setdefault(key, [0, HyperLogLog()])
+                entry[0] += views
+                entry[1].merge(sketch)
+
+    def flush(self):
+        """Write everything pending now; on failure it stays pending for the next flush."""
+        pending = self.drain()
+        if not pending:
+            return 0
+        try:
+            write(pending)
+        except Exception:
+            self._restore(pending)
+            raise
+        return len(pending)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Flushing listing views failed; retrying on the next flush")
+        finally:
+            self._flushing = False
+            # This thread's own database connection
+            connections.close_all()
+
+
+buffer = ViewBuffer()
+record = buffer.record
+flush = buffer.flush
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        logger.exception("Flushing listing views at exit failed")
+
+
+def record_view(listing, request):
+    """Count a view of ``listing`` unless its owner is looking at it."""
+    if listing.owner_id != getattr(request.user, 'pk', None):
+        record(listing.pk, viewer_key(request))
+
+
+# ---------------- Reading ----------------
+
+def listing_stats(listing, days):
+    """Views and unique viewers of ``listing`` per day for the last ``days`` days, and overall."""
+    since = timezone.now().date() - timedelta(days=days - 1)
+    rows = list(
+        ListingViewDay.objects.filter(listing=listing, day__gte=since)
+        .order_by('day').values_list('day', 'views', 'viewers')
+    )
+    return {
+        'views': sum(views for _, views, _ in rows),
+        'unique_viewers': merged(bytes(viewers) for _, _, viewers in rows if viewers).count(),
+        'days': [
+            {'date': day, 'views': views, 'unique_viewers': _sketch(viewers).count()}
+            for day, views, viewers in rows
+        ],
+    }
+
+
+def owner_week(user):
+    """``(views, unique viewers)`` over all of ``user``'s listings in the last 7 days."""
+    since = timezone.now().date() - timedelta(days=6)
+    rows = ListingViewDay.objects.filter(listing__owner=user, day__gte=since).values_list('views', 'viewers')
+    views, sketch = 0, HyperLogLog()
+    for count, viewers in rows:
+        views += count
+        if viewers:
+            sketch.merge(HyperLogLog.from_bytes(viewers))
+    return views, sketch.count()
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.create_listing, name='create_listing'),
+    path('search/', views.search_listings, name='search_listings'),
+    path('semantic/', views.semantic_search_listings, name='semantic_search_listings'),
+    path('facets/', views.listing_facets, name='listing_facets'),
+    path('import/', views.import_listings, name='import_listings'),
+    path('<uuid:public_id>/', views.listing_detail, name='listing_detail'),
+    path('<uuid:public_id>/stats/', views.listing_stats, name='listing_stats'),
+]
@@ -1,3 +1,234 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.shortcuts import get_object_or_404
+
+from apps.listing import facets, imports, semantic, tracking
+from apps.listing.filters import SearchError, build_listing_queryset
+from apps.listing.models import Listing
+from apps.listing.pagination import InvalidCursor, KeysetPagination
+from apps.listing.serializers import ListingCreateSerializer, ListingSerializer, owner_summary
+from apps.user.models import UserActivity
+from apps.user.utils import log_user_activity
+from apps.routers import replica_reads
+from apps.instrumentation import timed
+
+SEMANTIC_LIMIT = 20
+MAX_SEMANTIC_LIMIT = 50
+
+
+def listing_result(listing):
+    """Compact search row for a single listing."""
+    res = {
+        'id': listing.public_id,
+        'title': listing.title,
+        'category': listing.category,
+        'quantity': listing.quantity,
+        'unit': listing.unit,
+        'price': listing.price,
+        'location_lat': listing.location.y,
+        'location_lng': listing.location.x,
+        'location_text': listing.location_text,
+        'state': listing.state,
+        'created_at': listing.created_at,
+        'owner': owner_summary(listing.owner),
+    }
+    if hasattr(listing, 'distance'):
+        res['distance'] = round(listing.distance.km, 3)
+    return res
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@replica_reads
+def search_listings(request):
+    """
+    GET /api/listings/search/
+    Marketplace search: nearby + category + price range over active listings,
+    sorted by distance, price or newest, paginated by cursor.
+    """
+    try:
+        queryset, point, sort = build_listing_queryset(request.query_params)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, sort)
+    except SearchError as exc:
+        return Response({"error": exc.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+    except InvalidCursor:
+        return Response({"error": {"cursor": ["Invalid cursor"]}}, status=status.HTTP_400_BAD_REQUEST)
+
+    with timed('serializer'):
+        results = [listing_result(listing) for listing in page]
+    return Response(paginator.get_paginated_data(results))
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@replica_reads
+def semantic_search_listings(request):
+    """
+    GET /api/listings/semantic/?q=fresh tomatoes Jos
+    Search by meaning (synonyms, pidgin, misspellings) with the same
+    category/price/location filters; best matches first.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": {"q": ["This field is required."]}}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', SEMANTIC_LIMIT)), MAX_SEMANTIC_LIMIT))
+    except ValueError:
+        limit = SEMANTIC_LIMIT
+
+    try:
+        queryset, point, _ = build_listing_queryset(request.query_params)
+        with timed('semantic'):
+            ranked = semantic.search(query, queryset, point, limit)
+    except SearchError as exc:
+        return Response({"error": exc.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+    except semantic.SemanticUnavailable as exc:
+        return Response({"error": {"q": [str(exc)]}}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    with timed('serializer'):
+        results = [dict(listing_result(listing), score=round(score, 4)) for listing, score in ranked]
+    return Response({'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@replica_reads
+def listing_facets(request):
+    """
+    GET /api/listings/facets/
+    Active listing counts per category, state and price bucket for the same
+    filters as search; shown next to the results.
+    """
+    try:
+        data = facets.facet_counts(request.query_params)
+    except SearchError as exc:
+        return Response({"error": exc.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_listing(request):
+    """
+    POST /api/listings/
+    Farmers and co-ops list produce for sale.
+    """
+    user = request.user
+    if user.role not in Listing.SELLER_ROLES:
+        return Response(
+            {"error": {"role": ["Only farmers and co-ops can create listings"]}},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    serializer = ListingCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    lat, lng = data.pop('location_lat'), data.pop('location_lng')
+    listing = Listing.objects.create(
+        owner=user,
+        location=Point(lng, lat, srid=4326),
+        **data
+    )
+
+    log_user_activity(
+        request,
+        user=user,
+        action_type=UserActivity.ActionTypes.LISTING_CREATE,
+        description="Listing created",
+        metadata={"listing_id": str(listing.public_id), "category": listing.category}
+    )
+    return Response(ListingSerializer(listing).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_listings(request):
+    """
+    POST /api/listings/import/  (multipart: file=listings.csv|.xlsx, dry_run=true)
+    Co-ops list many members' produce from one spreadsheet. Valid rows are
+    created, invalid ones reported by row number. A file unreadable part
+    way gets a 400 with the report of the rows committed before it.
+    """
+    user = request.user
+    if user.role != 'co-ops':
+        return Response(
+            {"error": {"role": ["Only co-ops can import listings"]}},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": {"file": ["This field is required."]}}, status=status.HTTP_400_BAD_REQUEST)
+    if upload.size > settings.LISTING_IMPORT_MAX_BYTES:
+        return Response(
+            {"error": {"file": [f"Files are limited to {settings.LISTING_IMPORT_MAX_BYTES // 2 ** 20} MB."]}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+    error = None
+    try:
+        with timed('import'):
+            report = imports.import_listings(user, imports.iter_rows(upload, upload.name), dry_run=dry_run)
+    except imports.ImportFileError as exc:
+        if exc.report is None:
+            return Response({"error": exc.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+        # Unreadable part way: say what was saved, so a retry can skip it
+        error, report = exc.args[0], exc.report
+
+    if report['created'] and not dry_run:
+        log_user_activity(
+            request,
+            user=user,
+            action_type=UserActivity.ActionTypes.LISTING_CREATE,
+            description=f"Imported {report['created']} listings",
+            metadata={
+                "file": upload.name, "created": report['created'], "failed": report['failed'],
+                "complete": error is None,
+            }
+        )
+    if error is not None:
+        return Response({"error": error, **report}, status=status.HTTP_400_BAD_REQUEST)
+    if report['created'] and not dry_run:
+        return Response(report, status=status.HTTP_201_CREATED)
+    return Response(report)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@replica_reads
+def listing_detail(request, public_id):
+    """
+    GET /api/listings/<public_id>/
+    Active listings are public; drafts, sold and expired ones only to their owner.
+    """
+    listing = get_object_or_404(Listing.objects.select_related('owner__badge'), public_id=public_id)
+    if listing.status != Listing.Status.ACTIVE and listing.owner_id != getattr(request.user, 'pk', None):
+        return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+    # Buffered in memory: no write on this request
+    tracking.record_view(listing, request)
+    return Response(ListingSerializer(listing).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def listing_stats(request, public_id):
+    """
+    GET /api/listings/<public_id>/stats/?days=30
+    Views and unique viewers per day for the owner (up to a few seconds behind).
+    """
+    listing = get_object_or_404(Listing, public_id=public_id, owner=request.user)
+    try:
+        days = max(1, min(int(request.query_params.get('days', 7)), 365))
+    except ValueError:
+        return Response({"error": {"days": ["A valid integer is required."]}}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(tracking.listing_stats(listing, days))
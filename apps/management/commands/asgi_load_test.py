@@ -0,0 +1,182 @@
+"""
+Compare how many requests one process keeps in flight under WSGI vs ASGI.
+
+Both runs go through the real Django handlers in-process (no network):
+the sync endpoint through ``WSGIHandler`` on a fixed pool of threads
+(one per sync worker thread, like ``gunicorn --threads``), and the async
+endpoint through ``ASGIHandler`` on a single event loop.
+
+    python manage.py asgi_load_test --email farmer@test.com --endpoint search
+"""
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.user.models import User
+
+ENDPOINTS = {
+    'me': ('/api/auth/me/', '/api/async/auth/me/'),
+    'search': ('/api/users/search/', '/api/async/users/search/'),
+    'badge': ('/api/users/badge-status/', '/api/async/users/badge-status/'),
+    'dashboard': ('/api/dashboard/stats/', '/api/async/dashboard/stats/'),
+}
+
+
+class InFlight:
+    """Thread-safe counter of concurrent requests that remembers its peak."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.current -= 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Load test an endpoint in-process under WSGI and ASGI and compare concurrency per process."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help="User to authenticate as")
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='dashboard')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50, help="Concurrent clients")
+        parser.add_argument('--wsgi-threads', type=int, default=1, help="Threads per sync worker")
+        parser.add_argument('--host', default='localhost', help="Host header (must be in ALLOWED_HOSTS)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.host = options['host']
+        sync_path, async_path = ENDPOINTS[options['endpoint']]
+        total = options['requests']
+
+        wsgi = self.run_wsgi(sync_path, total, options['wsgi_threads'])
+        asgi = asyncio.run(self.run_asgi(async_path, total, options['concurrency']))
+
+        self.stdout.write(
+            f"{'mode':<6}{'requests':>10}{'peak in flight':>16}{'req/s':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}"
+        )
+        for mode, result in (('wsgi', wsgi), ('asgi', asgi)):
+            latencies, errors, peak, elapsed = result
+            self.stdout.write(
+                f"{mode:<6}{total:>10}{peak:>16}{total / elapsed:>10.1f}"
+                f"{percentile(latencies, 50) * 1000:>10.1f}{percentile(latencies, 95) * 1000:>10.1f}{errors:>8}"
+            )
+
+    # ------------------------- WSGI ------------------------- #
+    def run_wsgi(self, path, total, threads):
+        application = get_wsgi_application()
+        in_flight = InFlight()
+        latencies = []
+        errors = 0
+
+        def one_request(_):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': self.host,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': self.host,
+                'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(b''),
+                'wsgi.errors': io.StringIO(),
+            }
+            statuses = []
+            start = time.perf_counter()
+            with in_flight:
+                body = application(environ, lambda status, headers: statuses.append(status))
+                b''.join(body)
+            return time.perf_counter() - start, statuses[0]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for latency, status_line in pool.map(one_request, range(total)):
+                latencies.append(latency)
+                errors += not status_line.startswith('2')
+        return latencies, errors, in_flight.peak, time.perf_counter() - started
+
+    # ------------------------- ASGI ------------------------- #
+    async def run_asgi(self, path, total, concurrency):
+        application = get_asgi_application()
+        in_flight = InFlight()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def one_request():
+            nonlocal errors
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [
+                    (b'host', self.host.encode()),
+                    (b'authorization', f'Bearer {self.token}'.encode()),
+                ],
+                'server': (self.host, 80),
+                'client': ('127.0.0.1', 0),
+            }
+            request_sent = False
+            disconnected = asyncio.Event()
+            status_code = None
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                nonlocal status_code
+                if message['type'] == 'http.response.start':
+                    status_code = message['status']
+
+            async with semaphore:
+                start = time.perf_counter()
+                with in_flight:
+                    await application(scope, receive, send)
+                latencies.append(time.perf_counter() - start)
+            disconnected.set()
+            errors += not (200 <= (status_code or 0) < 300)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(total)))
+        return latencies, errors, in_flight.peak, time.perf_counter() - started
@@ -0,0 +1,58 @@
+"""
+Measure job queue throughput on this database: enqueue N no-op jobs,
+then drain them with a burst worker.
+
+    python manage.py bench_jobs --jobs 50000 --concurrency 8 --batch-size 200
+
+Jobs go to a queue of their own, removed afterwards, so it is safe next
+to real work (though it competes with it for the database).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs import queue
+from apps.jobs.models import Job
+from apps.jobs.worker import Worker
+
+QUEUE = 'bench'
+
+
+class Command(BaseCommand):
+    help = "Benchmark enqueue and dequeue throughput of the job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=20_000)
+        parser.add_argument('--concurrency', type=int, default=4, help="Worker threads")
+        parser.add_argument('--batch-size', type=int, default=100, help="Jobs claimed per query")
+
+    def handle(self, *args, **options):
+        total = options['jobs']
+        Job.objects.filter(queue=QUEUE).delete()
+
+        started = time.perf_counter()
+        queue.enqueue_many('jobs.noop', [{'n': i} for i in range(total)], queue=QUEUE)
+        enqueue_s = time.perf_counter() - started
+        self.stdout.write(f"enqueue:  {total:,} jobs in {enqueue_s:.2f}s  {total / enqueue_s:>10,.0f} jobs/s")
+
+        worker = Worker(
+            queues=[QUEUE],
+            concurrency=options['concurrency'],
+            batch_size=options['batch_size'],
+            burst=True,
+            name='bench',
+        )
+        started = time.perf_counter()
+        worker.run()
+        run_s = time.perf_counter() - started
+        self.stdout.write(
+            f"dequeue:  {worker.done:,} jobs in {run_s:.2f}s  {worker.done / run_s:>10,.0f} jobs/s "
+            f"({options['concurrency']} threads, batches of {options['batch_size']})"
+        )
+
+        left = Job.objects.filter(queue=QUEUE).exclude(status=Job.Status.DONE).count()
+        Job.objects.filter(queue=QUEUE).delete()
+        if left or worker.done != total:
+            self.stderr.write(f"{worker.done:,} runs for {total:,} jobs; {left:,} not done")
+        else:
+            self.stdout.write(self.style.SUCCESS("Every job ran once"))
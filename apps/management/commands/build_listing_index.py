@@ -0,0 +1,43 @@
+"""
+Build or refresh the semantic search index over active listings.
+
+    python manage.py build_listing_index              # full rebuild
+    python manage.py build_listing_index --refresh    # fold in changes since the last run (cron)
+
+Workers pick up the new file within SEMANTIC_RELOAD_SECONDS.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.listing import semantic
+
+
+class Command(BaseCommand):
+    help = "Embed active listings and write the FAISS index that semantic search memory-maps."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true', help="Only re-embed listings changed since the last run")
+        parser.add_argument('--chunk-size', type=int, default=10_000, help="Listings read and embedded per round trip")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['refresh']:
+            if not semantic.index_paths()[0].exists():
+                raise CommandError("No index to refresh; run build_listing_index first")
+            meta, changed = semantic.refresh(options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed {changed:,} changed listings in {time.perf_counter() - started:.1f}s "
+                f"({meta['count']:,} vectors)"
+            ))
+            return
+
+        def progress(done):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{done:>12,} listings  {done / elapsed:>8,.0f}/s")
+
+        meta = semantic.build(options['chunk_size'], progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {meta['count']:,} listings ({meta['factory']}, {meta['embedder']}, {meta['dim']}d) "
+            f"in {time.perf_counter() - started:.1f}s -> {semantic.index_paths()[0]}"
+        ))
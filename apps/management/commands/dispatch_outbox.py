@@ -0,0 +1,35 @@
+"""
+Dispatch domain events from the outbox to their handlers.
+
+    python manage.py dispatch_outbox              # poll every OUTBOX_POLL_SECONDS
+    python manage.py dispatch_outbox --burst      # drain what's due, then exit
+
+Several dispatchers can run at once (SKIP LOCKED); one per host is
+plenty. SIGTERM/SIGINT finish the current batch and exit.
+"""
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from apps.outbox import outbox
+
+
+class Command(BaseCommand):
+    help = "Drain outbox events to their handlers (cache invalidation, badges, live events)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--burst', action='store_true', help="Exit once no event is due")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        topics = ', '.join(sorted(outbox.HANDLERS))
+        self.stdout.write(f"Dispatching outbox events ({topics})")
+        outbox.run(stop, burst=options['burst'])
@@ -0,0 +1,67 @@
+"""
+Import listings for a co-op from a CSV or XLSX file.
+
+    python manage.py import_listings members.xlsx --owner coop@example.com
+    python manage.py import_listings members.csv --owner coop@example.com --dry-run
+
+Same columns and validation as POST /api/listings/import/, without the
+upload size limit.
+"""
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.listing import imports
+from apps.listing.models import Listing
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Bulk-create listings from a CSV or XLSX file, reporting invalid rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--owner', required=True, help="Email of the co-op (or farmer) the listings belong to")
+        parser.add_argument(
+            '--chunk-size', type=int, default=imports.CHUNK_SIZE, help="Rows validated and inserted per transaction",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Validate only")
+        parser.add_argument('--errors', dest='errors_path', help="Write the per-row error report as JSON to this path")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}")
+        if owner.role not in Listing.SELLER_ROLES:
+            raise CommandError(f"{owner.email} is a {owner.role}; only farmers and co-ops own listings")
+
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as fh:
+                report = imports.import_listings(
+                    owner,
+                    imports.iter_rows(fh, options['path']),
+                    chunk_size=options['chunk_size'],
+                    max_errors=10 ** 9 if options['errors_path'] else imports.MAX_ERRORS,
+                    dry_run=options['dry_run'],
+                )
+        except imports.ImportFileError as exc:
+            message = exc.args[0]['file'][0]
+            if exc.report is not None:
+                message += f" Created {exc.report['created']} listings from {exc.report['rows']} rows before it."
+            raise CommandError(message)
+
+        for entry in report['errors'][:20]:
+            self.stdout.write(f"row {entry['row']}: {json.dumps(entry['errors'])}")
+        if options['errors_path']:
+            with open(options['errors_path'], 'w') as fh:
+                json.dump(report['errors'], fh, indent=2)
+        verb = "Validated" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['valid']:,} of {report['rows']:,} rows ({report['failed']:,} failed) "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
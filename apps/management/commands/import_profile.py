@@ -0,0 +1,69 @@
+"""
+Show what a worker imports while it boots and what each import costs.
+
+    python manage.py import_profile                   # top 25 by cumulative time
+    python manage.py import_profile --sort self --top 50
+    python manage.py import_profile --packages        # self time per package
+    python manage.py import_profile --check           # fail over budget / on heavy imports
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.startup import HEAVY_MODULES, measure_boot, package_totals, profile_imports
+
+
+class Command(BaseCommand):
+    help = "Profile worker boot: per-module import cost and total boot time against the budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--sort', choices=('cumulative', 'self'), default='cumulative')
+        parser.add_argument('--filter', default='', help="Only modules starting with this prefix")
+        parser.add_argument('--packages', action='store_true', help="Summarise self time per top-level package")
+        parser.add_argument('--runs', type=int, default=3, help="Boots to time (median is reported)")
+        parser.add_argument('--budget', type=float, help="Boot budget in seconds (default STARTUP_BUDGET_SECONDS)")
+        parser.add_argument('--check', action='store_true', help="Exit non-zero when over budget or heavy modules load")
+        parser.add_argument('--json', dest='json_path', help="Also write the profile as JSON to this path")
+
+    def handle(self, *args, **options):
+        rows = profile_imports()
+        if options['filter']:
+            rows = [r for r in rows if r['module'].startswith(options['filter'])]
+
+        if options['packages']:
+            self.stdout.write(f"{'package':<40}{'self ms':>10}")
+            for package, self_us in package_totals(rows)[:options['top']]:
+                self.stdout.write(f"{package:<40}{self_us / 1000:>10.1f}")
+        else:
+            key = 'cumulative_us' if options['sort'] == 'cumulative' else 'self_us'
+            self.stdout.write(f"{'module':<60}{'self ms':>10}{'cumul. ms':>11}")
+            for row in sorted(rows, key=lambda r: r[key], reverse=True)[:options['top']]:
+                self.stdout.write(
+                    f"{row['module']:<60}{row['self_us'] / 1000:>10.1f}{row['cumulative_us'] / 1000:>11.1f}"
+                )
+
+        boot = measure_boot(runs=options['runs'])
+        budget = options['budget'] or settings.STARTUP_BUDGET_SECONDS
+        self.stdout.write(
+            f"\nBoot: {boot['boot_seconds']:.2f}s in process, {boot['wall_seconds']:.2f}s wall "
+            f"(budget {budget:.2f}s, median of {options['runs']})"
+        )
+        if boot['heavy_modules']:
+            self.stdout.write(self.style.WARNING(
+                f"Heavy modules imported at boot: {', '.join(boot['heavy_modules'])}"
+            ))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump({'boot': boot, 'budget_seconds': budget, 'imports': rows}, fh, indent=2)
+
+        if options['check']:
+            if boot['wall_seconds'] > budget:
+                raise CommandError(f"Boot took {boot['wall_seconds']:.2f}s, budget is {budget:.2f}s")
+            if boot['heavy_modules']:
+                raise CommandError(
+                    f"Boot imports {', '.join(boot['heavy_modules'])}; "
+                    f"import them where they are used (watched: {', '.join(HEAVY_MODULES)})"
+                )
@@ -0,0 +1,280 @@
+"""
+Replay a weighted traffic mix against a running server over real HTTP.
+
+Each virtual user logs in as one of the accounts created by ``seed_data``
+and then picks requests from the mix by weight until the run ends:
+
+    python manage.py seed_data --users 10000
+    CLOUDINARY_STUB_UPLOADS=True gunicorn -c config/gunicorn.conf.py config.wsgi
+    python manage.py load_test --mix loadtest/default_mix.jsonl --concurrency 50 --duration 60
+
+A mix file has one JSON object per line:
+
+    {"name": "search_geo", "weight": 20, "method": "GET",
+     "path": "/api/users/search/?location_lat={lat}&location_lng={lng}&radius=50"}
+
+Optional keys: ``json`` (request body), ``auth`` (send the access token,
+default true) and ``photo`` (attach a tiny PNG as ``profile_photo``).
+Placeholders in ``path`` and ``json`` strings: ``{email}``, ``{password}``,
+``{refresh}``, ``{lat}``, ``{lng}``, ``{state}``, ``{role}``, ``{category}`` and ``{page}``.
+"""
+import asyncio
+import base64
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.listing.models import Listing
+from apps.management.commands.seed_data import EMAIL_DOMAIN, STATES
+
+ROLES = ('farmer', 'buyer', 'co-ops')
+
+# 1x1 transparent PNG: passes ImageField validation without any disk I/O
+TINY_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def load_mix(path):
+    """Parse a jsonl mix file into a list of request specs."""
+    mix = []
+    try:
+        lines = Path(path).read_text().splitlines()
+    except OSError as exc:
+        raise CommandError(f"Cannot read mix file {path}: {exc}")
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            spec = json.loads(line)
+        except ValueError as exc:
+            raise CommandError(f"{path}:{number}: invalid JSON ({exc})")
+        missing = {'name', 'method', 'path'} - spec.keys()
+        if missing:
+            raise CommandError(f"{path}:{number}: missing {', '.join(sorted(missing))}")
+        spec.setdefault('weight', 1)
+        spec.setdefault('auth', True)
+        spec['method'] = spec['method'].upper()
+        mix.append(spec)
+    if not mix:
+        raise CommandError(f"{path} has no requests")
+    return mix
+
+
+def fill(template, values):
+    """Substitute placeholders in a string, or in every string of a JSON body."""
+    if isinstance(template, str):
+        return template.format_map(values)
+    if isinstance(template, dict):
+        return {k: fill(v, values) for k, v in template.items()}
+    if isinstance(template, list):
+        return [fill(v, values) for v in template]
+    return template
+
+
+class Stats:
+    """Latencies, status codes and errors per request name."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.errors = Counter()
+
+    def record(self, name, seconds, status_code):
+        self.latencies[name].append(seconds)
+        self.statuses[name][status_code] += 1
+        if not 200 <= status_code < 400:
+            self.errors[name] += 1
+
+    def record_failure(self, name, seconds, exc):
+        self.latencies[name].append(seconds)
+        self.statuses[name][type(exc).__name__] += 1
+        self.errors[name] += 1
+
+    def summary(self, elapsed):
+        rows = {}
+        names = sorted(self.latencies)
+        for name in names + ['TOTAL']:
+            if name == 'TOTAL':
+                latencies = [s for n in names for s in self.latencies[n]]
+                errors = sum(self.errors.values())
+                statuses = sum(self.statuses.values(), Counter())
+            else:
+                latencies, errors, statuses = self.latencies[name], self.errors[name], self.statuses[name]
+            count = len(latencies)
+            rows[name] = {
+                'requests': count,
+                'rps': round(count / elapsed, 1) if elapsed else 0.0,
+                'error_rate': round(errors / count, 4) if count else 0.0,
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                'max_ms': round(max(latencies, default=0) * 1000, 1),
+                'statuses': {str(k): v for k, v in statuses.items()},
+            }
+        return rows
+
+
+class VirtualUser:
+    def __init__(self, client, email, password, rng):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.access = None
+        self.refresh = None
+
+    def placeholders(self):
+        state, lat, lng, _, scatter = self.rng.choice(STATES)
+        return {
+            'email': self.email,
+            'password': self.password,
+            'refresh': self.refresh or '',
+            'lat': f"{self.rng.gauss(lat, scatter):.5f}",
+            'lng': f"{self.rng.gauss(lng, scatter):.5f}",
+            'state': state,
+            'role': self.rng.choice(ROLES),
+            'category': self.rng.choice(Listing.Category.values),
+            'page': self.rng.randint(1, 3),
+        }
+
+    async def send(self, spec):
+        values = self.placeholders()
+        kwargs = {}
+        if 'json' in spec:
+            kwargs['json'] = fill(spec['json'], values)
+        if spec.get('photo'):
+            kwargs['files'] = {'profile_photo': ('photo.png', TINY_PNG, 'image/png')}
+        headers = {}
+        if spec['auth'] and self.access:
+            headers['Authorization'] = f"Bearer {self.access}"
+
+        response = await self.client.request(spec['method'], fill(spec['path'], values), headers=headers, **kwargs)
+        if response.status_code == 200 and spec['path'].startswith(('/api/auth/login/', '/api/auth/refresh/')):
+            body = response.json()
+            self.access = body.get('access', self.access)
+            self.refresh = body.get('refresh', self.refresh)
+        return response
+
+
+class Command(BaseCommand):
+    help = "Load test a running server with a weighted request mix (asyncio + httpx)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mix', default='loadtest/default_mix.jsonl', help="jsonl request mix")
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=20, help="Virtual users")
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run (after warm-up)")
+        parser.add_argument('--requests', type=int, default=0, help="Stop after this many requests instead")
+        parser.add_argument('--warmup', type=float, default=0.0, help="Seconds of traffic left out of the stats")
+        parser.add_argument('--accounts', type=int, default=1000, help="Seeded accounts to log in as (user0..)")
+        parser.add_argument('--password', default='password123')
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--seed', type=int, default=1, help="Seed for the request sequence")
+        parser.add_argument('--report', help="Also write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        mix = load_mix(options['mix'])
+        if options['concurrency'] <= 0 or options['accounts'] <= 0:
+            raise CommandError("--concurrency and --accounts must be positive")
+
+        stats, elapsed = asyncio.run(self.run(mix, options))
+        summary = stats.summary(elapsed)
+
+        self.stdout.write(
+            f"{'endpoint':<18}{'requests':>10}{'req/s':>9}{'errors':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+        )
+        for name, row in summary.items():
+            self.stdout.write(
+                f"{name:<18}{row['requests']:>10}{row['rps']:>9.1f}{row['error_rate']:>9.1%}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+            )
+
+        if options['report']:
+            Path(options['report']).write_text(json.dumps({
+                'mix': options['mix'],
+                'base_url': options['base_url'],
+                'concurrency': options['concurrency'],
+                'seconds': round(elapsed, 2),
+                'endpoints': summary,
+            }, indent=2))
+
+    async def run(self, mix, options):
+        stats = Stats()
+        weights = [spec['weight'] for spec in mix]
+        budget = options['requests']
+        sent = 0
+        limits = httpx.Limits(max_connections=options['concurrency'], max_keepalive_connections=options['concurrency'])
+
+        async with httpx.AsyncClient(
+            base_url=options['base_url'], timeout=options['timeout'], limits=limits
+        ) as client:
+            users = [
+                VirtualUser(
+                    client,
+                    f"user{i % options['accounts']}@{EMAIL_DOMAIN}",
+                    options['password'],
+                    random.Random(f"{options['seed']}:{i}"),
+                )
+                for i in range(options['concurrency'])
+            ]
+            await asyncio.gather(*(self.log_in(user) for user in users))
+
+            started = time.perf_counter()
+            measure_from = started + options['warmup']
+            deadline = measure_from + options['duration']
+
+            async def loop(user):
+                nonlocal sent
+                while True:
+                    now = time.perf_counter()
+                    if budget:
+                        if sent >= budget:
+                            return
+                        sent += 1
+                    elif now >= deadline:
+                        return
+                    spec = user.rng.choices(mix, weights=weights)[0]
+                    start = time.perf_counter()
+                    try:
+                        response = await user.send(spec)
+                    except httpx.HTTPError as exc:
+                        if start >= measure_from:
+                            stats.record_failure(spec['name'], time.perf_counter() - start, exc)
+                        continue
+                    if start >= measure_from:
+                        stats.record(spec['name'], time.perf_counter() - start, response.status_code)
+
+            await asyncio.gather(*(loop(user) for user in users))
+            elapsed = max(time.perf_counter() - measure_from, 0.0)
+        return stats, elapsed
+
+    async def log_in(self, user):
+        try:
+            response = await user.send({
+                'method': 'POST',
+                'path': '/api/auth/login/',
+                'auth': False,
+                'json': {'email': user.email, 'password': user.password},
+            })
+        except httpx.HTTPError as exc:
+            raise CommandError(f"Cannot reach the server: {exc}")
+        if response.status_code != 200:
+            raise CommandError(
+                f"Login failed for {user.email} ({response.status_code}); run seed_data first "
+                f"or pass --accounts/--password"
+            )
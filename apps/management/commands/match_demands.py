@@ -0,0 +1,37 @@
+"""
+Rematch every open buyer demand against the current listings.
+
+    python manage.py match_demands                      # nightly
+    python manage.py match_demands --workers 8 --chunk-size 1000
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.matching import engine
+
+
+class Command(BaseCommand):
+    help = "Rank the best nearby suppliers for every open demand (KD-tree batch) and store the matches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=engine.CHUNK_SIZE, help="Demands per parallel chunk")
+        parser.add_argument('--workers', type=int, help="Threads querying the KD-trees (default MATCH_WORKERS)")
+        parser.add_argument('--limit', type=int, help="Matches kept per demand (default MATCHES_PER_DEMAND)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(done, written):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"{done:>12,} demands  {written:>12,} matches  {done / elapsed:>8,.0f}/s")
+
+        done, written = engine.run_batch(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            limit=options['limit'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {done:,} demands ({written:,} matches) in {time.perf_counter() - started:.1f}s"
+        ))
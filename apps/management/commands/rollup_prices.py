@@ -0,0 +1,54 @@
+"""
+Fold new price observations into the daily/weekly rollups.
+
+    python manage.py rollup_prices                       # incremental (cron, every few minutes)
+    python manage.py rollup_prices --backfill-listings --full   # first run on an existing catalogue
+
+Chart responses are cached for PRICE_CACHE_SECONDS, so new rollups show
+up within that long.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.prices import observations, rollups
+
+
+class Command(BaseCommand):
+    help = "Compute price index rollups (median, p10/p90, volume) from new price observations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=rollups.BATCH_SIZE, help="Observations per batch")
+        parser.add_argument('--full', action='store_true', help="Recompute every rollup from scratch")
+        parser.add_argument(
+            '--backfill-listings', action='store_true',
+            help="First observe published listings that have no price observation yet",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['backfill_listings']:
+            added = observations.backfill_from_listings()
+            self.stdout.write(f"Observed {added:,} existing listings")
+
+        if options['full']:
+            def progress(commodity, unit, written):
+                self.stdout.write(f"{commodity:>24}/{unit:<8}{written:>12,} rollups")
+
+            written = rollups.rebuild_all(progress)
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {written:,} rollups in {time.perf_counter() - started:.1f}s"
+            ))
+            return
+
+        folded = written = 0
+        while True:
+            count, rows = rollups.run_batch(options['batch_size'])
+            if not count:
+                break
+            folded += count
+            written += rows
+            self.stdout.write(f"{folded:>12,} observations  {written:>12,} rollups")
+        self.stdout.write(self.style.SUCCESS(
+            f"Folded in {folded:,} observations ({written:,} rollups) in {time.perf_counter() - started:.1f}s"
+        ))
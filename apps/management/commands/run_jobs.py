@@ -0,0 +1,51 @@
+"""
+Run background jobs from the PostgreSQL queue.
+
+    python manage.py run_jobs                                   # JOBS_QUEUES, JOBS_CONCURRENCY threads
+    python manage.py run_jobs --queues default --concurrency 8 --batch-size 100
+    python manage.py run_jobs --burst                           # drain what's due, then exit
+
+Run as many of these as needed, on any hosts: workers never take the
+same job. SIGTERM/SIGINT finish the current batches and exit.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Process background jobs (SKIP LOCKED dequeue, retries with backoff, cron schedules)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queues', nargs='+', help="Queues to work (default JOBS_QUEUES)")
+        parser.add_argument('--concurrency', type=int, help="Worker threads (default JOBS_CONCURRENCY)")
+        parser.add_argument('--batch-size', type=int, help="Jobs claimed per query (default JOBS_BATCH_SIZE)")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            queues=options['queues'],
+            concurrency=options['concurrency'],
+            batch_size=options['batch_size'],
+            burst=options['burst'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write("Finishing current batches...")
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.stdout.write(
+            f"Worker {worker.name}: queues {', '.join(worker.queues)}, "
+            f"{worker.concurrency} threads, batches of {worker.batch_size}"
+        )
+        started = time.perf_counter()
+        worker.run()
+        self.stdout.write(self.style.SUCCESS(
+            f"Ran {worker.done:,} jobs ({worker.failed:,} failed attempts) in {time.perf_counter() - started:.1f}s"
+        ))
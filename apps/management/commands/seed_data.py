@@ -0,0 +1,446 @@
+"""
+Generate benchmark data: users, trust badges, activity history and listings.
+
+Rows are generated in vectorized NumPy batches and loaded with PostgreSQL
+``COPY``, so a million users take minutes rather than hours:
+
+- one password hash is computed up front and shared by every user
+- signals are bypassed (badges are generated alongside their users, and
+  listing facet counts are rebuilt at the end)
+- the same ``--seed`` and options always produce the same rows
+
+    python manage.py seed_data --users 1000000 --seed 42
+    python manage.py seed_data --users 500000 --offset 1000000   # append more
+
+Every seeded user logs in with ``--password`` (default ``password123``) as
+``user<n>@seed.naijashield.test``.
+"""
+import csv
+import io
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.listing import facets
+from apps.listing.models import Listing
+from apps.user.models import TrustBadge, User, UserActivity
+
+EMAIL_DOMAIN = 'seed.naijashield.test'
+
+# (state, lat, lng, share of users, scatter in degrees)
+STATES = [
+    ('Lagos', 6.5244, 3.3792, 0.16, 0.12),
+    ('Kano', 12.0022, 8.5920, 0.11, 0.35),
+    ('Oyo', 7.3775, 3.9470, 0.07, 0.40),
+    ('FCT Abuja', 9.0765, 7.3986, 0.06, 0.15),
+    ('Kaduna', 10.5105, 7.4165, 0.07, 0.45),
+    ('Rivers', 4.8156, 7.0498, 0.06, 0.20),
+    ('Plateau', 9.8965, 8.8583, 0.05, 0.35),
+    ('Benue', 7.7322, 8.5391, 0.06, 0.45),
+    ('Enugu', 6.4584, 7.5464, 0.04, 0.25),
+    ('Anambra', 6.2104, 7.0670, 0.04, 0.20),
+    ('Ogun', 7.1475, 3.3619, 0.05, 0.30),
+    ('Kwara', 8.4966, 4.5421, 0.04, 0.40),
+    ('Niger', 9.6139, 6.5569, 0.05, 0.60),
+    ('Borno', 11.8311, 13.1510, 0.04, 0.50),
+    ('Sokoto', 13.0059, 5.2476, 0.04, 0.40),
+    ('Cross River', 4.9589, 8.3269, 0.03, 0.30),
+    ('Delta', 5.5320, 5.8987, 0.03, 0.35),
+]
+# Nigeria's bounding box, so scatter never lands a farm in the sea
+LAT_RANGE = (4.3, 13.85)
+LNG_RANGE = (2.7, 14.6)
+
+ROLES = np.array(['farmer', 'buyer', 'co-ops'])
+ROLE_WEIGHTS = [0.65, 0.25, 0.10]
+
+FIRST_NAMES = np.array([
+    'Chinedu', 'Aisha', 'Tunde', 'Ngozi', 'Ibrahim', 'Funke', 'Emeka', 'Zainab',
+    'Musa', 'Adaeze', 'Segun', 'Hauwa', 'Obinna', 'Bisi', 'Yusuf', 'Chioma',
+    'Kelechi', 'Amina', 'Femi', 'Halima', 'Uche', 'Kemi', 'Sani', 'Nneka',
+])
+LAST_NAMES = np.array([
+    'Okafor', 'Bello', 'Adeyemi', 'Eze', 'Musa', 'Olawale', 'Nwosu', 'Abubakar',
+    'Okonkwo', 'Lawal', 'Ogunleye', 'Danjuma', 'Umeh', 'Balogun', 'Garba', 'Obi',
+])
+BIOS = np.array([
+    'Fresh tomatoes and peppers every week.',
+    'Maize and sorghum in bulk.',
+    'Yam farmer - harvest from August.',
+    'Buying cassava for processing.',
+    'Poultry and eggs, delivery within the state.',
+    'Cooperative of smallholder rice farmers.',
+])
+BUSINESS_SUFFIXES = np.array(['Agro Ventures', 'Farms Ltd', 'Produce Hub', 'Foods Nig. Ltd', 'Traders'])
+
+# Completeness: share of users who filled in each optional field
+LOCATION_RATE = 0.8
+BIO_RATE = 0.5
+FARM_SIZE_RATE = 0.7       # of farmers
+BUSINESS_NAME_RATE = 0.75  # of buyers and co-ops
+
+ACTION_TYPES = np.array([
+    UserActivity.ActionTypes.LOGIN,
+    UserActivity.ActionTypes.LOGIN_FAILED,
+    UserActivity.ActionTypes.PROFILE_UPDATE,
+    UserActivity.ActionTypes.LISTING_CREATE,
+    UserActivity.ActionTypes.LISTING_UPDATE,
+    UserActivity.ActionTypes.PASSWORD_CHANGE,
+])
+ACTION_WEIGHTS = [0.55, 0.08, 0.12, 0.15, 0.08, 0.02]
+ACTION_DESCRIPTIONS = {
+    UserActivity.ActionTypes.LOGIN: 'User logged in',
+    UserActivity.ActionTypes.LOGIN_FAILED: 'Failed login attempt',
+    UserActivity.ActionTypes.PROFILE_UPDATE: 'User updated profile',
+    UserActivity.ActionTypes.LISTING_CREATE: 'Listing created',
+    UserActivity.ActionTypes.LISTING_UPDATE: 'Listing updated',
+    UserActivity.ActionTypes.PASSWORD_CHANGE: 'Password changed',
+}
+# First octets of address blocks used by Nigerian ISPs
+IP_PREFIXES = np.array([41, 102, 105, 129, 154, 197])
+
+# (category, title, unit, typical price in naira per unit)
+PRODUCTS = [
+    (Listing.Category.GRAINS, 'Maize', Listing.Unit.BAG, 38000),
+    (Listing.Category.GRAINS, 'Paddy rice', Listing.Unit.BAG, 55000),
+    (Listing.Category.GRAINS, 'Sorghum', Listing.Unit.BAG, 35000),
+    (Listing.Category.GRAINS, 'Millet', Listing.Unit.BAG, 33000),
+    (Listing.Category.TUBERS, 'Yam', Listing.Unit.TUBER, 2500),
+    (Listing.Category.TUBERS, 'Cassava', Listing.Unit.TONNE, 120000),
+    (Listing.Category.TUBERS, 'Sweet potato', Listing.Unit.BASKET, 9000),
+    (Listing.Category.VEGETABLES, 'Tomatoes', Listing.Unit.BASKET, 25000),
+    (Listing.Category.VEGETABLES, 'Pepper', Listing.Unit.BAG, 30000),
+    (Listing.Category.VEGETABLES, 'Onions', Listing.Unit.BAG, 60000),
+    (Listing.Category.VEGETABLES, 'Okra', Listing.Unit.BASKET, 8000),
+    (Listing.Category.FRUITS, 'Oranges', Listing.Unit.BAG, 15000),
+    (Listing.Category.FRUITS, 'Pineapple', Listing.Unit.PIECE, 900),
+    (Listing.Category.FRUITS, 'Watermelon', Listing.Unit.PIECE, 2500),
+    (Listing.Category.LEGUMES, 'Beans', Listing.Unit.BAG, 95000),
+    (Listing.Category.LEGUMES, 'Groundnut', Listing.Unit.BAG, 70000),
+    (Listing.Category.LEGUMES, 'Soybeans', Listing.Unit.BAG, 60000),
+    (Listing.Category.CASH_CROPS, 'Sesame', Listing.Unit.BAG, 80000),
+    (Listing.Category.CASH_CROPS, 'Cashew nuts', Listing.Unit.TONNE, 1200000),
+    (Listing.Category.LIVESTOCK, 'Goat', Listing.Unit.HEAD, 60000),
+    (Listing.Category.LIVESTOCK, 'Ram', Listing.Unit.HEAD, 120000),
+    (Listing.Category.LIVESTOCK, 'Cattle', Listing.Unit.HEAD, 650000),
+    (Listing.Category.POULTRY, 'Eggs', Listing.Unit.CRATE, 5500),
+    (Listing.Category.POULTRY, 'Broilers', Listing.Unit.HEAD, 7000),
+    (Listing.Category.FISH, 'Catfish', Listing.Unit.KG, 3500),
+    (Listing.Category.FISH, 'Tilapia', Listing.Unit.KG, 3000),
+    (Listing.Category.OTHER, 'Honey', Listing.Unit.LITRE, 6000),
+]
+# Typical quantity on offer per unit
+UNIT_QUANTITIES = {
+    Listing.Unit.KG: 300, Listing.Unit.TONNE: 5, Listing.Unit.BAG: 20, Listing.Unit.BASKET: 30,
+    Listing.Unit.CRATE: 50, Listing.Unit.TUBER: 200, Listing.Unit.PIECE: 100,
+    Listing.Unit.LITRE: 40, Listing.Unit.HEAD: 10,
+}
+LISTING_STATUSES = np.array([
+    Listing.Status.ACTIVE, Listing.Status.SOLD, Listing.Status.EXPIRED, Listing.Status.DRAFT,
+])
+LISTING_STATUS_WEIGHTS = [0.8, 0.12, 0.05, 0.03]
+# STATES names are Listing.State labels
+STATE_VALUES = {label: value for value, label in Listing.State.choices}
+
+# Accounts created over the last two years
+HISTORY_DAYS = 730
+
+
+def seeded_uuids(rng, count):
+    """Version 4 UUIDs drawn from ``rng`` (so they repeat with the seed)."""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hexed = raw.tobytes().hex()
+    return [
+        f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        for h in (hexed[i:i + 32] for i in range(0, count * 32, 32))
+    ]
+
+
+def timestamps(now, seconds_ago):
+    """ISO 8601 UTC strings for ``now - seconds_ago``, vectorized."""
+    moments = np.datetime64(now.replace(tzinfo=None), 's') - seconds_ago.astype('timedelta64[s]')
+    return np.char.add(np.datetime_as_string(moments), '+00:00').tolist()
+
+
+def generate_users(rng, start, count, password_hash, now):
+    """
+    Column-ordered rows for ``count`` users numbered from ``start``, plus
+    the per-user arrays that badges, activity and listings are built from.
+    """
+    index = np.arange(start, start + count)
+    public_ids = seeded_uuids(rng, count)
+
+    weights = np.array([s[3] for s in STATES])
+    state = rng.choice(len(STATES), size=count, p=weights / weights.sum())
+    centres = np.array([(s[1], s[2], s[4]) for s in STATES])[state]
+    lat = np.clip(rng.normal(centres[:, 0], centres[:, 2]), *LAT_RANGE)
+    lng = np.clip(rng.normal(centres[:, 1], centres[:, 2]), *LNG_RANGE)
+    has_location = rng.random(count) < LOCATION_RATE
+
+    role = ROLES[rng.choice(len(ROLES), size=count, p=ROLE_WEIGHTS)]
+    is_farmer = role == 'farmer'
+    first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), count)]
+    last = LAST_NAMES[rng.integers(0, len(LAST_NAMES), count)]
+    bio = BIOS[rng.integers(0, len(BIOS), count)]
+    has_bio = rng.random(count) < BIO_RATE
+    farm_size = np.round(rng.lognormal(1.2, 0.9, count), 2)
+    has_farm_size = is_farmer & (rng.random(count) < FARM_SIZE_RATE)
+    suffix = BUSINESS_SUFFIXES[rng.integers(0, len(BUSINESS_SUFFIXES), count)]
+    has_business = ~is_farmer & (rng.random(count) < BUSINESS_NAME_RATE)
+    age_seconds = rng.integers(0, HISTORY_DAYS * 86400, count)
+
+    created = timestamps(now, age_seconds)
+    state_names = [STATES[s][0] for s in state.tolist()]
+    rows = zip(
+        public_ids,
+        [password_hash] * count,
+        [f"user{i}@{EMAIL_DOMAIN}" for i in index.tolist()],
+        [f"+2348{i:09d}" for i in index.tolist()],
+        first.tolist(),
+        last.tolist(),
+        role.tolist(),
+        ['t'] * count,
+        ['f'] * count,
+        ['f'] * count,
+        created,
+        created,
+        [
+            f"SRID=4326;POINT({x:.6f} {y:.6f})" if ok else None
+            for x, y, ok in zip(lng.tolist(), lat.tolist(), has_location.tolist())
+        ],
+        [name if ok else None for name, ok in zip(state_names, has_location.tolist())],
+        [f"{v:.2f}" if ok else None for v, ok in zip(farm_size.tolist(), has_farm_size.tolist())],
+        [
+            f"{n} {s}" if ok else None
+            for n, s, ok in zip(last.tolist(), suffix.tolist(), has_business.tolist())
+        ],
+        [b if ok else None for b, ok in zip(bio.tolist(), has_bio.tolist())],
+    )
+    people = {
+        'public_ids': public_ids,
+        'age_seconds': age_seconds,
+        'has_location': has_location,
+        'role': role,
+        'lat': lat,
+        'lng': lng,
+        'state': state_names,
+    }
+    return rows, people
+
+
+USER_COLUMNS = (
+    'public_id', 'password', 'email', 'phone_number', 'first_name', 'last_name',
+    'role', 'is_active', 'is_staff', 'is_superuser', 'created_at', 'updated_at',
+    'location', 'location_text', 'farm_size', 'business_name', 'bio',
+)
+
+
+def generate_badges(rng, public_ids, age_seconds, has_location, now):
+    """Badges consistent with ``TrustBadge.calculate_badge_level``."""
+    count = len(public_ids)
+    transactions = rng.negative_binomial(1, 0.08, count)
+    rating = np.round(np.clip(rng.normal(4.3, 0.45, count), 1, 5), 2)
+    level = np.select(
+        [
+            (transactions >= 100) & (rating >= 4.8),
+            (transactions >= 50) & (rating >= 4.7),
+            (transactions >= 20) & (rating >= 4.3),
+            (transactions >= 5) & (rating >= 4.0),
+        ],
+        ['diamond', 'gold', 'silver', 'bronze'],
+        default='new_user',
+    )
+    rated = transactions > 0
+    created = timestamps(now, age_seconds)
+    return zip(
+        public_ids,
+        ['t'] * count,
+        np.where(rng.random(count) < 0.2, 't', 'f').tolist(),
+        np.where(has_location & (rng.random(count) < 0.5), 't', 'f').tolist(),
+        np.where(rng.random(count) < 0.05, 't', 'f').tolist(),
+        transactions.tolist(),
+        [f"{r:.2f}" if ok else None for r, ok in zip(rating.tolist(), rated.tolist())],
+        level.tolist(),
+        created,
+        created,
+    )
+
+
+BADGE_COLUMNS = (
+    'user_id', 'is_phone_verified', 'is_id_verified', 'is_location_verified',
+    'is_community_trusted', 'transaction_count', 'average_rating', 'badge_level',
+    'created_at', 'updated_at',
+)
+
+
+def _after_joining(rng, age_seconds, owner):
+    """Random moments between each owner's account creation and now."""
+    return (age_seconds[owner] * rng.random(len(owner))).astype(np.int64)
+
+
+def generate_activities(rng, public_ids, age_seconds, mean_per_user, now):
+    """A Poisson number of activities per user, each after the account was created."""
+    per_user = rng.poisson(mean_per_user, len(public_ids))
+    total = int(per_user.sum())
+    owner = np.repeat(np.arange(len(public_ids)), per_user)
+    seconds_ago = _after_joining(rng, age_seconds, owner)
+    action = ACTION_TYPES[rng.choice(len(ACTION_TYPES), size=total, p=ACTION_WEIGHTS)]
+    octets = rng.integers(0, 256, size=(total, 3))
+    prefix = IP_PREFIXES[rng.integers(0, len(IP_PREFIXES), total)]
+
+    created = timestamps(now, seconds_ago)
+    rows = zip(
+        [public_ids[o] for o in owner.tolist()],
+        action.tolist(),
+        [ACTION_DESCRIPTIONS[a] for a in action.tolist()],
+        ['{}'] * total,
+        [f"{p}.{a}.{b}.{c}" for p, (a, b, c) in zip(prefix.tolist(), octets.tolist())],
+        created,
+        created,
+    )
+    return rows, total
+
+
+ACTIVITY_COLUMNS = (
+    'user_id', 'action_type', 'description', 'metadata', 'ip_address', 'created_at', 'updated_at',
+)
+
+
+def generate_listings(rng, people, mean_per_seller, now):
+    """
+    A Poisson number of listings per farmer and co-op, placed within a few
+    km of the seller and priced around typical market prices.
+    """
+    sellers = np.flatnonzero(np.isin(people['role'], Listing.SELLER_ROLES))
+    per_seller = rng.poisson(mean_per_seller, len(sellers))
+    owner = np.repeat(sellers, per_seller)
+    total = len(owner)
+
+    product = rng.integers(0, len(PRODUCTS), total)
+    catalogue = [PRODUCTS[i] for i in product.tolist()]
+    base_price = np.array([p[3] for p in catalogue], dtype=float)
+    base_quantity = np.array([UNIT_QUANTITIES[p[2]] for p in catalogue], dtype=float)
+    price = np.round(base_price * rng.lognormal(0, 0.25, total), -1)
+    quantity = np.maximum(1, np.round(base_quantity * rng.lognormal(0, 0.8, total)))
+    lat = np.clip(people['lat'][owner] + rng.normal(0, 0.03, total), *LAT_RANGE)
+    lng = np.clip(people['lng'][owner] + rng.normal(0, 0.03, total), *LNG_RANGE)
+    listing_status = LISTING_STATUSES[rng.choice(len(LISTING_STATUSES), size=total, p=LISTING_STATUS_WEIGHTS)]
+
+    created = timestamps(now, _after_joining(rng, people['age_seconds'], owner))
+    owners = owner.tolist()
+    states = [people['state'][o] for o in owners]
+    rows = zip(
+        seeded_uuids(rng, total),
+        [people['public_ids'][o] for o in owners],
+        [p[1] for p in catalogue],
+        [f"{p[1]} from {state}" for p, state in zip(catalogue, states)],
+        [p[0] for p in catalogue],
+        [f"{q:.2f}" for q in quantity.tolist()],
+        [p[2] for p in catalogue],
+        [f"{v:.2f}" for v in price.tolist()],
+        [f"SRID=4326;POINT({x:.6f} {y:.6f})" for x, y in zip(lng.tolist(), lat.tolist())],
+        states,
+        [STATE_VALUES[state] for state in states],
+        listing_status.tolist(),
+        created,
+        created,
+    )
+    return rows, total
+
+
+LISTING_COLUMNS = (
+    'public_id', 'owner_id', 'title', 'description', 'category', 'quantity', 'unit',
+    'price', 'location', 'location_text', 'state', 'status', 'created_at', 'updated_at',
+)
+
+
+def copy_rows(cursor, model, columns, rows):
+    """``COPY`` rows (``None`` -> NULL) into ``model``'s table."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    quoted = ', '.join(connection.ops.quote_name(model._meta.get_field(c).column) for c in columns)
+    sql = f"COPY {connection.ops.quote_name(model._meta.db_table)} ({quoted}) FROM STDIN WITH (FORMAT csv)"
+    raw = cursor.cursor
+    if hasattr(raw, 'copy'):
+        # psycopg 3
+        with raw.copy(sql) as copy:
+            while chunk := buffer.read(1 << 20):
+                copy.write(chunk)
+    else:
+        # psycopg2
+        raw.copy_expert(sql, buffer)
+
+
+class Command(BaseCommand):
+    help = "Seed users, trust badges, activity and listings for benchmarking (COPY, deterministic by seed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--offset', type=int, default=0, help="Number of the first user (to append to a seeded DB)")
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--activities-per-user', type=float, default=5.0, help="Mean activities per user")
+        parser.add_argument('--listings-per-seller', type=float, default=3.0, help="Mean listings per farmer/co-op")
+        parser.add_argument('--password', default='password123', help="Password shared by every seeded user")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("seed_data loads with COPY and needs PostgreSQL")
+
+        total, offset, batch_size = options['users'], options['offset'], options['batch_size']
+        if total <= 0 or batch_size <= 0:
+            raise CommandError("--users and --batch-size must be positive")
+        if offset + total > 10 ** 9:
+            raise CommandError("Seeded phone numbers only have room for 10^9 users")
+        if User.objects.filter(email=f"user{offset}@{EMAIL_DOMAIN}").exists():
+            raise CommandError(f"user{offset}@{EMAIL_DOMAIN} already exists; pass a larger --offset")
+
+        rng = np.random.default_rng([options['seed'], offset])
+        password_hash = make_password(options['password'])
+        # Fixed reference time so timestamps repeat with the seed
+        now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        started = time.perf_counter()
+        activities = listings = 0
+        with connection.cursor() as cursor:
+            for start in range(offset, offset + total, batch_size):
+                count = min(batch_size, offset + total - start)
+                rows, people = generate_users(rng, start, count, password_hash, now)
+                public_ids, age = people['public_ids'], people['age_seconds']
+                badges = generate_badges(rng, public_ids, age, people['has_location'], now)
+                activity_rows, activity_count = generate_activities(
+                    rng, public_ids, age, options['activities_per_user'], now
+                )
+                listing_rows, listing_count = generate_listings(rng, people, options['listings_per_seller'], now)
+                with transaction.atomic():
+                    copy_rows(cursor, User, USER_COLUMNS, rows)
+                    copy_rows(cursor, TrustBadge, BADGE_COLUMNS, badges)
+                    copy_rows(cursor, UserActivity, ACTIVITY_COLUMNS, activity_rows)
+                    copy_rows(cursor, Listing, LISTING_COLUMNS, listing_rows)
+                activities += activity_count
+                listings += listing_count
+
+                done = start + count - offset
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{done:>12,} users  {activities:>14,} activities  {listings:>12,} listings"
+                    f"  {done / elapsed:>10,.0f} users/s"
+                )
+
+            for model in (User, TrustBadge, UserActivity, Listing):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+        # COPY skips the signals that maintain facet counts
+        facets.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total:,} users, {total:,} badges, {activities:,} activities and {listings:,} listings "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,127 @@
+"""
+Recall and latency benchmark for semantic listing search.
+
+Embeds a sample of active listings, then compares the IVF index used for
+large catalogues against exact search on the same vectors: recall@k and
+per-query latency for each ``nprobe``. Queries are listing titles plus
+their place ("Tomatoes Jos"), or lines from ``--queries-file``.
+
+    python manage.py semantic_benchmark --sample 50000 --queries 200 --k 10
+    python manage.py semantic_benchmark --nprobe 4,16,64 --live --json semantic.json
+
+``--live`` also times full searches (embedding, FAISS, database filter)
+against the built index.
+"""
+import json
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.listing import semantic
+from apps.listing.models import Listing
+
+
+def latency(fn, items):
+    """Run ``fn`` per item; return (results, p50 ms, p95 ms)."""
+    results, timings = [], []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(item))
+        timings.append((time.perf_counter() - start) * 1000)
+    return results, float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+
+class Command(BaseCommand):
+    help = "Measure semantic search recall@k (IVF vs exact) and query latency on a sample of listings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=50_000, help="Active listings to embed")
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--queries-file', help="One query per line instead of generated ones")
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--nprobe', default='1,4,16,64', help="Comma-separated nprobe values to try")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--live', action='store_true', help="Also time full searches against the built index")
+        parser.add_argument('--json', dest='json_path', help="Also write the results as JSON to this path")
+
+    def handle(self, *args, **options):
+        import faiss
+
+        rng = random.Random(options['seed'])
+        k = options['k']
+        listings = []
+        active = Listing.objects.filter(status=Listing.Status.ACTIVE)
+        for chunk in semantic.iter_listings(active, 10_000):
+            listings += chunk
+            if len(listings) >= options['sample']:
+                break
+        listings = listings[:options['sample']]
+        if len(listings) < k:
+            raise CommandError(f"Need at least {k} active listings, found {len(listings)}; run seed_data first")
+
+        started = time.perf_counter()
+        vectors = semantic.embed([semantic.listing_text(listing) for listing in listings])
+        embed_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f"Embedded {len(listings):,} listings in {embed_seconds:.1f}s "
+            f"({len(listings) / embed_seconds:,.0f}/s, {semantic.get_embedder().name})"
+        )
+
+        if options['queries_file']:
+            with open(options['queries_file']) as fh:
+                queries = [line.strip() for line in fh if line.strip()]
+        else:
+            queries = [
+                f"{listing.title} {listing.location_text}".strip()
+                for listing in rng.sample(listings, min(options['queries'], len(listings)))
+            ]
+        query_vectors, embed_p50, embed_p95 = latency(lambda q: semantic.embed([q]), queries)
+        query_vectors = np.vstack(query_vectors)
+
+        dim = vectors.shape[1]
+        exact = faiss.IndexFlatIP(dim)
+        exact.add(vectors)
+        truth, exact_p50, exact_p95 = latency(lambda v: exact.search(v.reshape(1, -1), k)[1][0], query_vectors)
+
+        nlist = semantic.ivf_lists(len(listings))
+        ivf = faiss.index_factory(dim, f'IVF{nlist},SQ8', faiss.METRIC_INNER_PRODUCT)
+        ivf.train(vectors)
+        ivf.add(vectors)
+
+        report = {
+            'listings': len(listings),
+            'queries': len(queries),
+            'k': k,
+            'embedder': semantic.get_embedder().name,
+            'embed_per_second': round(len(listings) / embed_seconds, 1),
+            'query_embed_ms': {'p50': round(embed_p50, 2), 'p95': round(embed_p95, 2)},
+            'exact': {'p50_ms': round(exact_p50, 3), 'p95_ms': round(exact_p95, 3)},
+            'ivf': [],
+        }
+        self.stdout.write(f"\nQuery embedding: p50 {embed_p50:.1f} ms, p95 {embed_p95:.1f} ms")
+        self.stdout.write(f"Exact search:    p50 {exact_p50:.2f} ms, p95 {exact_p95:.2f} ms")
+        self.stdout.write(f"\n{f'IVF{nlist},SQ8':<13}{'nprobe':>10}{f'recall@{k}':>12}{'p50 ms':>10}{'p95 ms':>10}")
+        for nprobe in [int(n) for n in options['nprobe'].split(',')]:
+            faiss.extract_index_ivf(ivf).nprobe = nprobe
+            found, p50, p95 = latency(lambda v: ivf.search(v.reshape(1, -1), k)[1][0], query_vectors)
+            recall = float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+            report['ivf'].append({
+                'nlist': nlist, 'nprobe': nprobe, 'recall': round(recall, 4),
+                'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3),
+            })
+            self.stdout.write(f"{'':<13}{nprobe:>10}{recall:>12.3f}{p50:>10.2f}{p95:>10.2f}")
+
+        if options['live']:
+            queryset = active.select_related('owner__badge')
+            try:
+                _, p50, p95 = latency(lambda q: semantic.search(q, queryset, limit=20), queries)
+            except semantic.SemanticUnavailable as exc:
+                raise CommandError(str(exc))
+            report['live'] = {'p50_ms': round(p50, 2), 'p95_ms': round(p95, 2)}
+            self.stdout.write(f"\nLive search (embed + FAISS + database): p50 {p50:.1f} ms, p95 {p95:.1f} ms")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as fh:
+                json.dump(report, fh, indent=2)
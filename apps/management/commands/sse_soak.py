@@ -0,0 +1,170 @@
+"""
+Soak test the live event stream: open many idle SSE connections in one
+process, measure what they cost, then fan one event out to all of them.
+
+Connections go through the real ``ASGIHandler`` in-process (no network),
+all as one user, so a single publish reaches every stream. At most
+``--concurrency`` are connecting at once, as behind a server's accept
+queue: until its first frame a request holds a thread and a connection.
+
+    python manage.py sse_soak --email farmer@test.com --subscribers 10000 --idle 30
+"""
+import asyncio
+import gc
+import threading
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps import events
+from apps.user.models import User
+
+PATH = '/api/async/events/'
+
+
+class Command(BaseCommand):
+    help = "Hold many idle SSE streams in one process and report memory, threads and fan-out time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help="User to authenticate as")
+        parser.add_argument('--subscribers', type=int, default=10_000)
+        parser.add_argument('--idle', type=float, default=30.0, help="Seconds to hold the streams idle")
+        parser.add_argument('--concurrency', type=int, default=50, help="Streams connecting at once")
+        parser.add_argument('--keepalive', type=float, default=None, help="Override EVENTS_KEEPALIVE_SECONDS")
+        parser.add_argument('--host', default='localhost', help="Host header (must be in ALLOWED_HOSTS)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.host = options['host']
+        if options['keepalive']:
+            settings.EVENTS_KEEPALIVE_SECONDS = options['keepalive']
+        result = asyncio.run(self.soak(user, options['subscribers'], options['idle'], options['concurrency']))
+
+        n = options['subscribers']
+        self.stdout.write(f"streams open:          {result['open']} / {n} (errors {result['errors']})")
+        self.stdout.write(f"connect time:          {result['connect_s']:.1f} s")
+        self.stdout.write(f"memory per stream:     {result['bytes'] / n / 1024:.1f} KiB (Python heap)")
+        self.stdout.write(f"threads:               {result['threads_before']} before, {result['threads_idle']} while idle")
+        self.stdout.write(
+            f"db connections:        {result['connections_before']} before, {result['connections_idle']} while idle"
+        )
+        self.stdout.write(f"keepalives received:   {result['keepalives']}")
+        self.stdout.write(f"fan-out to all:        {result['fanout_ms']:.0f} ms")
+        self.stdout.write(f"streams left open:     {result['left']}")
+
+    async def soak(self, user, total, idle, concurrency):
+        application = get_asgi_application()
+        connecting = asyncio.Semaphore(concurrency)
+        opened = asyncio.Event()
+        disconnect = asyncio.Event()
+        counts = {'open': 0, 'errors': 0, 'events': 0, 'keepalives': 0}
+
+        async def connection():
+            responded = asyncio.Event()
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': PATH,
+                'raw_path': PATH.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [
+                    (b'host', self.host.encode()),
+                    (b'authorization', f'Bearer {self.token}'.encode()),
+                    (b'accept', b'text/event-stream'),
+                ],
+                'server': (self.host, 80),
+                'client': ('127.0.0.1', 0),
+            }
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    counts['open' if message['status'] == 200 else 'errors'] += 1
+                    if counts['open'] + counts['errors'] == total:
+                        opened.set()
+                elif message['type'] == 'http.response.body':
+                    responded.set()
+                    body = message.get('body', b'')
+                    if body.startswith(b'event: soak'):
+                        counts['events'] += 1
+                    elif body == events.KEEPALIVE:
+                        counts['keepalives'] += 1
+
+            async with connecting:
+                task = asyncio.create_task(application(scope, receive, send))
+                await responded.wait()
+            await task
+
+        count_connections = sync_to_async(open_connections, thread_sensitive=False)
+        connections_before = await count_connections()
+        threads_before = threading.active_count()
+        gc.collect()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(connection()) for _ in range(total)]
+        await opened.wait()
+        connect_s = time.perf_counter() - started
+        await asyncio.sleep(1)
+        gc.collect()
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        await asyncio.sleep(idle)
+        threads_idle = threading.active_count()
+        connections_idle = await count_connections()
+
+        started = time.perf_counter()
+        events.hub.deliver(user.pk, events.encode('soak', {'sent_at': time.time()}))
+        while counts['events'] < counts['open']:
+            await asyncio.sleep(0.001)
+        fanout_ms = (time.perf_counter() - started) * 1000
+
+        disconnect.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            'open': counts['open'],
+            'errors': counts['errors'],
+            'connect_s': connect_s,
+            'bytes': held,
+            'threads_before': threads_before,
+            'threads_idle': threads_idle,
+            'connections_before': connections_before,
+            'connections_idle': connections_idle,
+            'keepalives': counts['keepalives'],
+            'fanout_ms': fanout_ms,
+            'left': len(events.hub),
+        }
+
+
+def open_connections():
+    """Connections to this database (pg_stat_activity); closes its own."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
@@ -0,0 +1,277 @@
+"""
+Buyer–supplier matching: for each open demand, the best active listings
+of the same commodity within the buyer's radius.
+
+Candidates are scored (weights in WEIGHTS) on:
+- distance: 1 at the buyer's location, 0 at the edge of the radius
+- trust badge: new_user 0 ... diamond 1
+- profile completion of the supplier (0-100%)
+- stock: how much of the demand the listing covers, if in the same unit
+
+Two ways to find candidates, one scoring:
+- ``match_demand``: a single demand, when it is posted. PostGIS
+  ``ST_DWithin`` over the partial GiST index on active listings, narrowed
+  to titles naming one of the commodity's aliases before the nearest
+  MAX_CANDIDATES are taken.
+- ``run_batch``: every open demand, nightly. Active listings are loaded
+  once per category into a scipy cKDTree per commodity (points on the
+  unit sphere, so chord distance orders like great-circle distance), and
+  demands are queried in chunks on a thread pool; cKDTree queries release
+  the GIL. Each chunk's matches replace the old ones in one transaction.
+"""
+import operator
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, reduce
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.listing.models import Listing
+from apps.matching.models import Demand, Match
+from apps.prices.commodities import commodity_for, title_terms
+from apps.user.models import TrustBadge, User
+
+EARTH_RADIUS_KM = 6371.0088
+WEIGHTS = {'distance': 0.4, 'badge': 0.25, 'profile': 0.15, 'stock': 0.2}
+BADGE_SCORES = {'new_user': 0.0, 'bronze': 0.25, 'silver': 0.5, 'gold': 0.75, 'diamond': 1.0}
+# match_demand scores at most this many of the nearest listings
+MAX_CANDIDATES = 2000
+CHUNK_SIZE = 500
+SUPPLIER_CHUNK = 5000
+
+
+# ---------------- Scoring ----------------
+
+def supplier_scores(users):
+    """``{user pk: (badge score, profile completion %)}`` for ``users`` (badges select_related)."""
+    scores = {}
+    for user in users:
+        try:
+            level = user.badge.badge_level
+        except TrustBadge.DoesNotExist:
+            level = 'new_user'
+        scores[user.pk] = (BADGE_SCORES.get(level, 0.0), user.profile_completion)
+    return scores
+
+
+def rank(distance_km, radius_km, badge, completion, quantity, same_unit, wanted, limit):
+    """
+    Scores of candidate arrays and the indices of the best ``limit``, best
+    first. Stock only counts for listings in the demand's unit.
+    """
+    stock = np.where(same_unit, np.minimum(1.0, quantity / float(wanted)), 0.0)
+    score = (
+        WEIGHTS['distance'] * np.clip(1 - distance_km / radius_km, 0, 1)
+        + WEIGHTS['badge'] * badge
+        + WEIGHTS['profile'] * completion / 100
+        + WEIGHTS['stock'] * stock
+    )
+    if len(score) > limit:
+        best = np.argpartition(-score, limit - 1)[:limit]
+    else:
+        best = np.arange(len(score))
+    best = best[np.argsort(-score[best], kind='stable')]
+    return best, score
+
+
+def _matches(demand_id, listing_ids, owner_ids, distance_km, best, score):
+    return [
+        Match(
+            demand_id=demand_id,
+            listing_id=listing_ids[i],
+            supplier_id=owner_ids[i],
+            rank=position,
+            score=round(float(score[i]), 4),
+            distance_km=round(float(distance_km[i]), 3),
+        )
+        for position, i in enumerate(best, start=1)
+    ]
+
+
+def _replace(demand_ids, matches):
+    """Swap in the new matches for ``demand_ids`` in one transaction."""
+    with transaction.atomic():
+        Match.objects.filter(demand_id__in=demand_ids).delete()
+        Match.objects.bulk_create(matches, batch_size=2000)
+        Demand.objects.filter(pk__in=demand_ids).update(matched_at=timezone.now())
+
+
+# ---------------- One demand (PostGIS) ----------------
+
+def match_demand(demand, limit=None):
+    """Rank suppliers for one demand straight from the database; returns its new matches."""
+    limit = limit or settings.MATCHES_PER_DEMAND
+    listings = (
+        Listing.objects.filter(
+            status=Listing.Status.ACTIVE,
+            category=demand.category,
+            location__dwithin=(demand.location, D(km=demand.radius_km)),
+        )
+        .annotate(distance=Distance('location', demand.location))
+        .select_related('owner__badge')
+        .order_by('distance')
+    )
+    if demand.max_price is not None:
+        listings = listings.filter(price__lte=demand.max_price)
+    terms = title_terms(demand.commodity)
+    if terms:
+        # Before the slice: nearer listings of other commodities must not crowd these out
+        listings = listings.filter(reduce(operator.or_, (Q(title__icontains=term) for term in terms)))
+    candidates = [
+        listing for listing in listings[:MAX_CANDIDATES]
+        if commodity_for(listing.title) == demand.commodity
+    ]
+
+    matches = []
+    if candidates:
+        suppliers = supplier_scores({listing.owner for listing in candidates})
+        distance = np.array([listing.distance.km for listing in candidates])
+        best, score = rank(
+            distance,
+            demand.radius_km,
+            np.array([suppliers[listing.owner_id][0] for listing in candidates]),
+            np.array([suppliers[listing.owner_id][1] for listing in candidates], dtype=float),
+            np.array([float(listing.quantity) for listing in candidates]),
+            np.array([listing.unit == demand.unit for listing in candidates]),
+            demand.quantity,
+            limit,
+        )
+        matches = _matches(
+            demand.pk,
+            [listing.pk for listing in candidates],
+            [listing.owner_id for listing in candidates],
+            distance, best, score,
+        )
+    _replace([demand.pk], matches)
+    return matches
+
+
+# ---------------- All demands (KD-tree) ----------------
+
+def unit_vectors(lat, lng):
+    """Points on the unit sphere for arrays of degrees."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+def chord(km):
+    return 2 * np.sin(np.asarray(km, dtype=float) / (2 * EARTH_RADIUS_KM))
+
+
+def arc_km(chord_length):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord_length / 2, 0, 1))
+
+
+class Supply:
+    """Active listings of one commodity, as arrays, with a KD-tree over their locations."""
+
+    def __init__(self, rows, suppliers):
+        from scipy.spatial import cKDTree
+
+        self.listing_ids = [row[0] for row in rows]
+        self.owner_ids = [row[1] for row in rows]
+        self.quantity = np.array([float(row[2]) for row in rows])
+        self.unit = np.array([row[3] for row in rows])
+        self.price = np.array([float(row[4]) for row in rows])
+        self.badge = np.array([suppliers[row[1]][0] for row in rows])
+        self.completion = np.array([suppliers[row[1]][1] for row in rows], dtype=float)
+        self.points = unit_vectors([row[5].y for row in rows], [row[5].x for row in rows])
+        self.tree = cKDTree(self.points)
+
+    def match(self, demands, limit):
+        """Matches for a chunk of demand rows (see ``_open_demands``); no database access."""
+        centres = unit_vectors([d['location'].y for d in demands], [d['location'].x for d in demands])
+        nearby = self.tree.query_ball_point(centres, chord([d['radius_km'] for d in demands]))
+        matches = []
+        for demand, centre, found in zip(demands, centres, nearby):
+            found = np.asarray(found, dtype=int)
+            if demand['max_price'] is not None and len(found):
+                found = found[self.price[found] <= float(demand['max_price'])]
+            if not len(found):
+                continue
+            distance = arc_km(np.linalg.norm(self.points[found] - centre, axis=1))
+            best, score = rank(
+                distance, demand['radius_km'], self.badge[found], self.completion[found],
+                self.quantity[found], self.unit[found] == demand['unit'], demand['quantity'], limit,
+            )
+            matches += _matches(
+                demand['public_id'],
+                [self.listing_ids[i] for i in found],
+                [self.owner_ids[i] for i in found],
+                distance, best, score,
+            )
+        return matches
+
+
+def _open_demands():
+    fields = ('public_id', 'category', 'commodity', 'quantity', 'unit', 'max_price', 'location', 'radius_km')
+    demands = defaultdict(list)
+    for row in Demand.objects.filter(status=Demand.Status.OPEN).values(*fields).iterator(chunk_size=10_000):
+        demands[row['category'], row['commodity']].append(row)
+    return demands
+
+
+def _supply(category, commodities):
+    """``{commodity: Supply}`` for the active listings of ``category`` that are one of ``commodities``."""
+    rows = defaultdict(list)
+    listings = (
+        Listing.objects.filter(status=Listing.Status.ACTIVE, category=category)
+        .values_list('public_id', 'owner_id', 'quantity', 'unit', 'price', 'location', 'title')
+        .iterator(chunk_size=20_000)
+    )
+    for row in listings:
+        commodity = commodity_for(row[6])
+        if commodity in commodities:
+            rows[commodity].append(row)
+
+    suppliers = {}
+    owner_ids = list({row[1] for group in rows.values() for row in group})
+    for start in range(0, len(owner_ids), SUPPLIER_CHUNK):
+        chunk = User.objects.filter(pk__in=owner_ids[start:start + SUPPLIER_CHUNK]).select_related('badge')
+        suppliers.update(supplier_scores(chunk))
+    return {commodity: Supply(group, suppliers) for commodity, group in rows.items()}
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while chunk := list(islice(items, size)):
+        yield chunk
+
+
+def run_batch(chunk_size=CHUNK_SIZE, workers=None, limit=None, progress=None):
+    """
+    Rematch every open demand. Returns ``(demands, matches)`` written.
+    Demands with no candidates get their old matches cleared.
+    """
+    limit = limit or settings.MATCHES_PER_DEMAND
+    workers = workers or settings.MATCH_WORKERS
+    by_commodity = _open_demands()
+    by_category = defaultdict(set)
+    for category, commodity in by_commodity:
+        by_category[category].add(commodity)
+
+    done = written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for category, commodities in by_category.items():
+            supply = _supply(category, commodities)
+            for commodity in commodities:
+                chunks = list(_chunks(by_commodity[category, commodity], chunk_size))
+                if commodity in supply:
+                    results = pool.map(partial(supply[commodity].match, limit=limit), chunks)
+                else:
+                    results = ([] for _ in chunks)
+                # Writes stay on this thread: database connections are per thread
+                for chunk, matches in zip(chunks, results):
+                    _replace([d['public_id'] for d in chunk], matches)
+                    done += len(chunk)
+                    written += len(matches)
+                    if progress:
+                        progress(done, written)
+    return done, written
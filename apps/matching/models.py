@@ -0,0 +1,71 @@
+import uuid
+
+from django.contrib.gis.db import models as gis_models
+from django.db import models
+
+from apps.listing.models import Listing
+from apps.user.models import User
+
+
+class Demand(models.Model):
+    """
+    What a buyer wants: a commodity, how much and where. Matched against
+    active listings when posted and again by the nightly batch.
+    """
+    class Status(models.TextChoices):
+        OPEN = "open", "Open"
+        CLOSED = "closed", "Closed"
+
+    public_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    buyer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='demands',
+        limit_choices_to={'role': 'buyer'},
+    )
+    # Canonical name (apps.prices.commodities), compared with listing titles
+    commodity = models.CharField(max_length=60)
+    category = models.CharField(max_length=20, choices=Listing.Category.choices)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    unit = models.CharField(max_length=10, choices=Listing.Unit.choices)
+    # Naira per unit; no limit when empty
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    location = gis_models.PointField(geography=True, srid=4326)
+    radius_km = models.PositiveIntegerField(default=100)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    matched_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The batch reads open demands; a buyer reads their own
+            models.Index(fields=['status', 'category'], name='demand_status_category'),
+            models.Index(fields=['buyer', 'created_at'], name='demand_buyer_new'),
+        ]
+
+    def __str__(self):
+        return f"{self.buyer.get_full_name()} wants {self.quantity} {self.unit} {self.commodity}"
+
+
+class Match(models.Model):
+    """One ranked supplier listing for a demand; replaced wholesale on every match run."""
+    demand = models.ForeignKey(Demand, on_delete=models.CASCADE, related_name='matches')
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='matches')
+    supplier = models.ForeignKey(User, on_delete=models.CASCADE, related_name='supply_matches')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    distance_km = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['rank']
+        constraints = [
+            # Also the index a demand's matches are read with, in rank order
+            models.UniqueConstraint(fields=['demand', 'rank'], name='match_demand_rank'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.listing.title} for {self.demand_id} ({self.score:.2f})"
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from apps.listing.models import Listing
+from apps.matching.models import Demand
+
+
+class DemandSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(source='public_id', read_only=True)
+    location_lat = serializers.SerializerMethodField(read_only=True)
+    location_lng = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = Demand
+        fields = [
+            'id',
+            'commodity',
+            'category',
+            'quantity',
+            'unit',
+            'max_price',
+            'location_lat',
+            'location_lng',
+            'radius_km',
+            'status',
+            'matched_at',
+            'created_at',
+        ]
+        read_only_fields = fields
+
+    def get_location_lat(self, obj):
+        return obj.location.y
+
+    def get_location_lng(self, obj):
+        return obj.location.x
+
+
+class DemandCreateSerializer(serializers.ModelSerializer):
+    location_lat = serializers.FloatField(min_value=-90, max_value=90)
+    location_lng = serializers.FloatField(min_value=-180, max_value=180)
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    max_price = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal('0.01'), required=False, allow_null=True,
+    )
+    radius_km = serializers.IntegerField(min_value=1, max_value=500, default=100)
+    category = serializers.ChoiceField(choices=Listing.Category.choices)
+
+    class Meta:
+        model = Demand
+        fields = [
+            'commodity',
+            'category',
+            'quantity',
+            'unit',
+            'max_price',
+            'location_lat',
+            'location_lng',
+            'radius_km',
+        ]
@@ -0,0 +1,9 @@
+from apps.jobs.queue import task
+
+
+@task('matching.match_demands', priority=-10, max_attempts=2)
+def match_demands():
+    """Rematch every open demand, like `match_demands`."""
+    from apps.matching import engine
+
+    engine.run_batch()
@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.cache import tiered_cache
+from apps.listing.models import Listing
+from apps.matching import engine
+from apps.matching.models import Demand, Match
+from apps.user.factories import make_user
+from apps.user.models import TrustBadge
+
+
+class DemandMatchingTests(TestCase):
+    """
+    Buyer-supplier matching. A demand is matched two ways, by PostGIS when
+    it is posted and by a KD-tree in the nightly batch, so the tests check
+    that both agree.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        tiered_cache.clear()
+        self.buyer = make_user('buyer')
+        self.client.force_authenticate(user=self.buyer)
+        self.trusted = self.make_farmer(badge='gold', bio='Maize from Epe')
+        self.newcomer = self.make_farmer()
+
+    def make_farmer(self, badge='new_user', **fields):
+        farmer = make_user('farmer', **fields)
+        TrustBadge.objects.filter(user=farmer).update(badge_level=badge)
+        return farmer
+
+    def make_listing(self, owner, title, lng, lat, quantity=50, price=38000):
+        return Listing.objects.create(
+            owner=owner, title=title, category='grains', quantity=quantity, unit='bag',
+            price=price, location=Point(lng, lat, srid=4326)
+        )
+
+    def post_demand(self, **overrides):
+        data = {
+            'commodity': 'Yellow corn', 'category': 'grains', 'quantity': 40, 'unit': 'bag',
+            'max_price': 45000, 'location_lat': 6.5244, 'location_lng': 3.3792, 'radius_km': 100,
+        }
+        data.update(overrides)
+        return self.client.post('/api/matching/demands/', data, format='json')
+
+    def test_posted_demand_is_matched_nearby(self):
+        """A demand for "Yellow corn" in Lagos ranks nearby maize by trust, stock and distance"""
+        trusted = self.make_listing(self.trusted, 'White maize', 3.45, 6.60)
+        newcomer = self.make_listing(self.newcomer, 'Maize', 3.38, 6.53, quantity=5)
+        self.make_listing(self.newcomer, 'Maize', 3.39, 6.52, price=60000)   # over budget
+        self.make_listing(self.trusted, 'Sorghum', 3.38, 6.52)               # other commodity
+        self.make_listing(self.trusted, 'Maize', 8.59, 12.00)                # Kano, out of range
+
+        response = self.post_demand()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['commodity'], 'maize')
+        ranked = [m['listing']['id'] for m in response.data['matches']]
+        self.assertEqual(ranked, [trusted.public_id, newcomer.public_id])
+        self.assertLess(response.data['matches'][1]['distance_km'], 2)
+
+        response = self.client.get(f"/api/matching/demands/{response.data['id']}/matches/")
+        self.assertEqual([m['listing']['id'] for m in response.data['results']], ranked)
+
+    def test_nearer_listings_of_other_commodities_dont_crowd_out_matches(self):
+        """Only listings of the wanted commodity count toward the nearest MAX_CANDIDATES"""
+        for i in range(5):
+            self.make_listing(self.trusted, 'Sorghum', 3.38, 6.525 + i * 0.001)
+        maize = self.make_listing(self.newcomer, 'Yellow maize', 3.60, 6.80)
+
+        with mock.patch.object(engine, 'MAX_CANDIDATES', 3):
+            response = self.post_demand()
+
+        self.assertEqual([m['listing']['id'] for m in response.data['matches']], [maize.public_id])
+
+    def test_batch_agrees_with_single_demand_matching(self):
+        """
+        The nightly KD-tree batch picks up new listings and ranks like PostGIS; sellers can't post demands
+        """
+        self.make_listing(self.trusted, 'White maize', 3.45, 6.60)
+        demand_id = self.post_demand().data['id']
+        self.make_listing(self.newcomer, 'Maize', 3.38, 6.53, quantity=5)
+        self.make_listing(self.trusted, 'Maize grains', 3.60, 6.80)
+
+        self.assertEqual(engine.run_batch(), (1, 3))
+        batch = list(Match.objects.filter(demand_id=demand_id).values_list('listing_id', 'score'))
+        engine.match_demand(Demand.objects.get(pk=demand_id))
+        single = list(Match.objects.filter(demand_id=demand_id).values_list('listing_id', 'score'))
+        self.assertEqual([listing for listing, _ in batch], [listing for listing, _ in single])
+        for (_, batch_score), (_, single_score) in zip(batch, single):
+            self.assertAlmostEqual(batch_score, single_score, places=2)
+
+        self.client.force_authenticate(user=self.trusted)
+        self.assertEqual(self.post_demand().status_code, status.HTTP_403_FORBIDDEN)
+
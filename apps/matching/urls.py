@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('demands/', views.demands, name='demands'),
+    path('demands/<uuid:public_id>/matches/', views.matches, name='demand_matches'),
+]
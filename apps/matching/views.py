@@ -0,0 +1,76 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+from django.contrib.gis.geos import Point
+from django.shortcuts import get_object_or_404
+
+from apps.listing.views import listing_result
+from apps.matching import engine
+from apps.matching.models import Demand, Match
+from apps.matching.serializers import DemandCreateSerializer, DemandSerializer
+from apps.prices.commodities import commodity_for
+from apps.routers import replica_reads
+from apps.instrumentation import timed
+
+
+def match_result(match):
+    return {
+        'rank': match.rank,
+        'score': match.score,
+        'distance_km': match.distance_km,
+        'listing': listing_result(match.listing),
+    }
+
+
+def demand_matches(demand):
+    """A demand's stored matches in rank order, listings and sellers JOINed."""
+    matches = Match.objects.filter(demand=demand).select_related('listing__owner__badge').order_by('rank')
+    return [match_result(match) for match in matches]
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def demands(request):
+    """
+    GET  /api/matching/demands/ - the buyer's demands
+    POST /api/matching/demands/ - post a demand; matched straight away and nightly
+    """
+    user = request.user
+    if user.role != 'buyer':
+        return Response(
+            {"error": {"role": ["Only buyers can post demands"]}},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if request.method == 'GET':
+        own = Demand.objects.filter(buyer=user).order_by('-created_at')[:100]
+        return Response({'results': DemandSerializer(own, many=True).data})
+
+    serializer = DemandCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    lat, lng = data.pop('location_lat'), data.pop('location_lng')
+    data['commodity'] = commodity_for(data['commodity'])
+    demand = Demand.objects.create(buyer=user, location=Point(lng, lat, srid=4326), **data)
+    with timed('matching'):
+        engine.match_demand(demand)
+    return Response(
+        dict(DemandSerializer(demand).data, matches=demand_matches(demand)),
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def matches(request, public_id):
+    """
+    GET /api/matching/demands/<public_id>/matches/
+    The best suppliers for one of the buyer's demands, best first.
+    """
+    demand = get_object_or_404(Demand, public_id=public_id, buyer=request.user)
+    return Response({'demand': DemandSerializer(demand).data, 'results': demand_matches(demand)})
@@ -0,0 +1,123 @@
+"""
+Conversations, messages and unread counts.
+
+Unread counts are never computed by counting messages. Each participant
+row keeps the unread count of its own conversation, and ``Inbox`` keeps
+the total over all of a user's conversations. Both are changed with
+``UPDATE ... SET unread = unread + n`` in the transaction that sends or
+reads, so they stay exact under concurrent sends. The lock order is
+always participant rows, then the inbox row, so a send and a read can't
+deadlock. The dashboard reads one ``Inbox`` row.
+
+The inbox is a keyset scan of ``Participant`` on (user, last_message_at).
+Each row carries the other participant and the latest message, so a page
+is one query whether a user has ten conversations or ten thousand.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+from apps import events
+from apps.cache import tiered_cache
+from apps.listing.pagination import KeysetPagination
+from apps.messaging.models import PREVIEW_LENGTH, Conversation, Inbox, Message, Participant
+
+
+def inbox_tag(public_id):
+    """Tag for cached data that shows a user's unread count (the dashboard)."""
+    return f"inbox:{public_id}"
+
+
+class InboxPagination(KeysetPagination):
+    sorts = {'recent': ('last_message_at', True, datetime.fromisoformat)}
+    unique_field = 'conversation_id'
+
+
+class MessagePagination(KeysetPagination):
+    page_size = 30
+    max_page_size = 100
+    sorts = {'newest': ('created_at', True, datetime.fromisoformat)}
+    unique_field = 'id'
+    unique_parse = int
+
+
+def send(participant, body):
+    """Post ``body`` as ``participant.user`` and count it as unread for the peer."""
+    with transaction.atomic():
+        message = Message.objects.create(
+            conversation_id=participant.conversation_id,
+            sender_id=participant.user_id,
+            body=body,
+        )
+        sent_at = message.created_at
+        Conversation.objects.filter(pk=participant.conversation_id).update(
+            last_message=body[:PREVIEW_LENGTH],
+            last_sender_id=participant.user_id,
+            last_message_at=sent_at,
+        )
+        # Both sides move to the top of their inbox; only the peer gets an unread
+        Participant.objects.filter(conversation_id=participant.conversation_id).update(
+            last_message_at=sent_at,
+            unread=Case(When(user_id=participant.peer_id, then=F('unread') + 1), default=F('unread')),
+        )
+        Inbox.objects.filter(user_id=participant.peer_id).update(unread=F('unread') + 1)
+        peer_tag = inbox_tag(participant.peer_id)
+        transaction.on_commit(lambda: tiered_cache.invalidate(peer_tag))
+        events.publish(participant.peer_id, 'message', {
+            'conversation': participant.conversation_id,
+            'id': message.id,
+            'sender': participant.user_id,
+            'preview': body[:PREVIEW_LENGTH],
+            'created_at': sent_at,
+        })
+        events.publish(participant.peer_id, 'stats', {'messages_unread': 1})
+    return message
+
+
+def start(sender, recipient, body, listing=None):
+    """
+    Send ``body`` to ``recipient``, in the existing conversation between
+    the two (about ``listing``) or a new one. Returns ``(participant, message)``
+    with the sender's participant row.
+    """
+    key = Conversation.key_for(sender.pk, recipient.pk, listing.pk if listing else None)
+    now = timezone.now()
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(key=key, defaults={'listing': listing})
+        if created:
+            participant, _ = Participant.objects.bulk_create([
+                Participant(conversation=conversation, user=sender, peer=recipient, last_message_at=now),
+                Participant(conversation=conversation, user=recipient, peer=sender, last_message_at=now),
+            ])
+            Inbox.objects.bulk_create([Inbox(user=sender), Inbox(user=recipient)], ignore_conflicts=True)
+        else:
+            participant = Participant.objects.get(conversation=conversation, user=sender)
+        message = send(participant, body)
+    return participant, message
+
+
+def mark_read(participant):
+    """Mark ``participant``'s conversation read; returns how many messages were unread."""
+    with transaction.atomic():
+        unread = (
+            Participant.objects.select_for_update()
+            .filter(pk=participant.pk)
+            .values_list('unread', flat=True)
+            .get()
+        )
+        if unread:
+            Participant.objects.filter(pk=participant.pk).update(unread=0, last_read_at=timezone.now())
+            Inbox.objects.filter(user_id=participant.user_id).update(unread=F('unread') - unread)
+            tag = inbox_tag(participant.user_id)
+            transaction.on_commit(lambda: tiered_cache.invalidate(tag))
+            # The user's other open tabs and devices
+            events.publish(participant.user_id, 'stats', {'messages_unread': -unread})
+    participant.unread = 0
+    return unread
+
+
+def unread_total(user):
+    """Unread messages over all of ``user``'s conversations: one primary key lookup."""
+    return Inbox.objects.filter(user=user).values_list('unread', flat=True).first() or 0
@@ -0,0 +1,86 @@
+import uuid
+
+from django.db import models
+
+from apps.listing.models import Listing
+from apps.user.models import User
+
+PREVIEW_LENGTH = 140
+
+
+class Conversation(models.Model):
+    """Direct messages between two users, optionally about one listing."""
+    public_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # One conversation per pair of users and listing; see ``key_for``
+    key = models.CharField(max_length=110, unique=True, editable=False)
+    listing = models.ForeignKey(
+        Listing,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='conversations',
+    )
+    # The latest message, so the inbox needs no per-row message lookup
+    last_message = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def key_for(user_id, other_id, listing_id=None):
+        low, high = sorted([str(user_id), str(other_id)])
+        return f"{low}:{high}:{listing_id or ''}"
+
+    def __str__(self):
+        return f"Conversation {self.public_id}"
+
+
+class Participant(models.Model):
+    """
+    One user's side of a conversation: where it sorts in their inbox and
+    how many messages they haven't read yet.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
+    # The other participant, JOINed in the same query as the inbox
+    peer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    unread = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField()
+    last_read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='participant_conversation_user'),
+        ]
+        indexes = [
+            # Inbox pages: a user's conversations, most recent first
+            models.Index(fields=['user', '-last_message_at', '-conversation'], name='participant_inbox'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in {self.conversation_id} ({self.unread} unread)"
+
+
+class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
+    body = models.TextField(max_length=2000)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # History pages, newest first
+            models.Index(fields=['conversation', '-created_at', '-id'], name='message_history'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender_id}: {self.body[:40]}"
+
+
+class Inbox(models.Model):
+    """A user's unread messages over all conversations: the sum of their ``Participant.unread``."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='inbox')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
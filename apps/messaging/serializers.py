@@ -0,0 +1,11 @@
+from rest_framework import serializers
+
+
+class MessageCreateSerializer(serializers.Serializer):
+    body = serializers.CharField(max_length=2000)
+
+
+class ConversationStartSerializer(MessageCreateSerializer):
+    recipient = serializers.UUIDField()
+    # The listing the conversation is about, if any
+    listing = serializers.UUIDField(required=False, allow_null=True)
@@ -0,0 +1,86 @@
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.cache import tiered_cache
+from apps.listing.models import Listing
+from apps.messaging.models import Inbox, Participant
+from apps.user.factories import make_user
+
+
+class MessagingTests(TestCase):
+    """
+    Messaging and unread counters. Counts are kept as counters changed in
+    the same transaction as the message; nothing ever counts messages.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        tiered_cache.clear()
+        self.farmer = make_user('farmer')
+        self.listing = Listing.objects.create(
+            owner=self.farmer, title='Yam', category='tubers', quantity=200, unit='tuber',
+            price=2500, location=Point(3.3792, 6.5244, srid=4326)
+        )
+        self.buyers = [make_user('buyer', last_name=str(i)) for i in range(3)]
+
+    def message(self, sender, recipient, body='Is this still available?', listing=None):
+        self.client.force_authenticate(user=sender)
+        data = {'recipient': str(recipient.public_id), 'body': body}
+        if listing:
+            data['listing'] = str(listing.public_id)
+        return self.client.post('/api/messages/', data, format='json')
+
+    def test_unread_counters_follow_sends_and_reads(self):
+        """Sends raise the recipient's counters, reading clears them, and the dashboard follows"""
+        buyer = self.buyers[0]
+        response = self.message(buyer, self.farmer, listing=self.listing)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        conversation = response.data['conversation']
+        # Same pair and listing: same conversation
+        self.assertEqual(self.message(buyer, self.farmer, 'How much for 50?', self.listing).data['conversation'], conversation)
+
+        self.client.force_authenticate(user=self.farmer)
+        self.assertEqual(self.client.get('/api/messages/unread/').data['unread'], 2)
+        self.assertEqual(self.client.get('/api/dashboard/stats/').data['stats']['messages_unread'], 2)
+
+        self.client.post(f'/api/messages/{conversation}/', {'body': '2,400 each'}, format='json')
+        self.assertEqual(Inbox.objects.get(user=buyer).unread, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/messages/{conversation}/read/')
+        self.assertEqual((response.data['marked_read'], response.data['unread']), (2, 0))
+        self.assertEqual(Participant.objects.get(conversation=conversation, user=self.farmer).unread, 0)
+        # The cached dashboard was invalidated by the read
+        self.assertEqual(self.client.get('/api/dashboard/stats/').data['stats']['messages_unread'], 0)
+
+    def test_inbox_and_history_are_keyset_paginated(self):
+        """Inbox pages are one query, most recent first; history is newest first and private"""
+        for buyer in self.buyers:
+            self.message(buyer, self.farmer, f'Hello from {buyer.last_name}')
+
+        self.client.force_authenticate(user=self.farmer)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/messages/', {'page_size': 2})
+        self.assertEqual([c['peer']['id'] for c in response.data['results']], [b.public_id for b in self.buyers[:0:-1]])
+        self.assertEqual(response.data['results'][0]['last_message'], 'Hello from 2')
+        self.assertEqual(response.data['results'][0]['unread'], 1)
+        page_two = self.client.get(response.data['next']).data
+        self.assertEqual([c['peer']['id'] for c in page_two['results']], [self.buyers[0].public_id])
+        self.assertIsNone(page_two['next'])
+
+        conversation = page_two['results'][0]['id']
+        for body in ('one', 'two', 'three'):
+            self.client.post(f'/api/messages/{conversation}/', {'body': body}, format='json')
+        response = self.client.get(f'/api/messages/{conversation}/', {'page_size': 2})
+        self.assertEqual([m['body'] for m in response.data['results']], ['three', 'two'])
+        older = self.client.get(response.data['next']).data
+        self.assertEqual([m['body'] for m in older['results']], ['one', 'Hello from 0'])
+
+        self.client.force_authenticate(user=self.buyers[1])
+        response = self.client.get(f'/api/messages/{conversation}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.inbox, name='inbox'),
+    path('unread/', views.unread, name='messages_unread'),
+    path('<uuid:public_id>/', views.conversation, name='conversation'),
+    path('<uuid:public_id>/read/', views.mark_read, name='conversation_read'),
+]
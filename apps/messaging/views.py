@@ -0,0 +1,131 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+from django.shortcuts import get_object_or_404
+
+from apps.listing.models import Listing
+from apps.listing.pagination import InvalidCursor
+from apps.listing.serializers import owner_summary
+from apps.messaging import conversations
+from apps.messaging.models import Message, Participant
+from apps.messaging.serializers import ConversationStartSerializer, MessageCreateSerializer
+from apps.user.models import User
+from apps.routers import replica_reads
+
+
+def conversation_result(participant):
+    """Inbox row: who it's with, the latest message and the unread count."""
+    conversation = participant.conversation
+    return {
+        'id': participant.conversation_id,
+        'listing': conversation.listing_id,
+        'peer': owner_summary(participant.peer),
+        'last_message': conversation.last_message,
+        'last_message_mine': conversation.last_sender_id == participant.user_id,
+        'last_message_at': participant.last_message_at,
+        'unread': participant.unread,
+    }
+
+
+def message_result(message, user):
+    return {
+        'id': message.id,
+        'sender': message.sender_id,
+        'mine': message.sender_id == user.pk,
+        'body': message.body,
+        'created_at': message.created_at,
+    }
+
+
+def _invalid_cursor():
+    return Response({"error": {"cursor": ["Invalid cursor"]}}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def inbox(request):
+    """
+    GET  /api/messages/ - the user's conversations, most recent first, by cursor
+    POST /api/messages/ - message a user, optionally about a listing
+    """
+    user = request.user
+    if request.method == 'GET':
+        queryset = Participant.objects.filter(user=user).select_related('conversation', 'peer__badge')
+        paginator = conversations.InboxPagination()
+        try:
+            page = paginator.paginate_queryset(queryset, request, 'recent')
+        except InvalidCursor:
+            return _invalid_cursor()
+        return Response(paginator.get_paginated_data([conversation_result(p) for p in page]))
+
+    serializer = ConversationStartSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    if data['recipient'] == user.pk:
+        return Response({"error": {"recipient": ["You can't message yourself"]}}, status=status.HTTP_400_BAD_REQUEST)
+    recipient = User.objects.filter(public_id=data['recipient'], is_active=True).first()
+    if recipient is None:
+        return Response({"error": {"recipient": ["User not found"]}}, status=status.HTTP_400_BAD_REQUEST)
+    listing = None
+    if data.get('listing'):
+        listing = Listing.objects.filter(public_id=data['listing']).first()
+        if listing is None:
+            return Response({"error": {"listing": ["Listing not found"]}}, status=status.HTTP_400_BAD_REQUEST)
+
+    participant, message = conversations.start(user, recipient, data['body'], listing)
+    return Response(
+        {'conversation': participant.conversation_id, 'message': message_result(message, user)},
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def conversation(request, public_id):
+    """
+    GET  /api/messages/<public_id>/ - message history, newest first, by cursor
+    POST /api/messages/<public_id>/ - send a message
+    """
+    participant = get_object_or_404(Participant, conversation_id=public_id, user=request.user)
+    if request.method == 'GET':
+        paginator = conversations.MessagePagination()
+        try:
+            page = paginator.paginate_queryset(
+                Message.objects.filter(conversation_id=public_id), request, 'newest'
+            )
+        except InvalidCursor:
+            return _invalid_cursor()
+        return Response(paginator.get_paginated_data([message_result(m, request.user) for m in page]))
+
+    serializer = MessageCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    message = conversations.send(participant, serializer.validated_data['body'])
+    return Response(message_result(message, request.user), status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_read(request, public_id):
+    """POST /api/messages/<public_id>/read/ - mark a conversation read."""
+    participant = get_object_or_404(Participant, conversation_id=public_id, user=request.user)
+    marked = conversations.mark_read(participant)
+    return Response({
+        'conversation': public_id,
+        'marked_read': marked,
+        'unread': conversations.unread_total(request.user),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@replica_reads
+def unread(request):
+    """GET /api/messages/unread/ - unread messages over all conversations."""
+    return Response({'unread': conversations.unread_total(request.user)})
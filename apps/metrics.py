@@ -0,0 +1,148 @@
+"""
+Prometheus metrics for the hot paths, scraped from ``GET /metrics``.
+
+With several gunicorn workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory before the workers start: every process then writes its samples
+to shared mmap files and the scrape aggregates them (see
+``config/gunicorn.conf.py`` for the ``child_exit`` cleanup hook).
+
+The request path only pays for one ``Histogram.observe``. Process-level
+gauges (DB pool, cache hit counts) are refreshed at most every
+``METRICS_REFRESH_SECONDS`` per process. Queue depths are shared by every
+process and cost a query each, so they are counted only when scraped.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from apps.cache import tiered_cache
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by URL name',
+    ['url_name', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+PASSWORD_HASH_TIME = Histogram(
+    'password_hash_duration_seconds',
+    'Time spent hashing or verifying passwords (login and register)',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2),
+)
+
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Tiered cache lookups by result (local_hits, shared_hits, misses)',
+    ['result'],
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Connection pool size, idle connections and waiting requests per database',
+    ['db', 'state'],
+    multiprocess_mode='livesum',
+)
+
+# name -> callable returning the current depth; see register_queue_depth()
+_queue_depth_sources = {}
+
+_refresh_lock = threading.Lock()
+_last_refresh = 0.0
+_last_cache_stats = {}
+
+
+def register_queue_depth(queue, source):
+    """Export ``source()`` as ``queue_depth{queue="<queue>"}``, called at scrape time."""
+    _queue_depth_sources[queue] = source
+
+
+class QueueDepthCollector:
+    """``queue_depth{queue}``, counted by the process answering the scrape."""
+
+    def describe(self):
+        # Without this, registering would call collect() and query at import
+        return [self._family()]
+
+    def collect(self):
+        family = self._family()
+        for queue, source in list(_queue_depth_sources.items()):
+            try:
+                family.add_metric([queue], source())
+            except Exception:
+                # A broken source must not fail the whole scrape
+                pass
+        yield family
+
+    @staticmethod
+    def _family():
+        return GaugeMetricFamily('queue_depth', 'Pending items per background queue', labels=['queue'])
+
+
+_queue_depths = QueueDepthCollector()
+REGISTRY.register(_queue_depths)
+
+
+def observe_request(url_name, method, seconds):
+    REQUEST_LATENCY.labels(url_name or 'unmatched', method).observe(seconds)
+
+
+def refresh_process_metrics(force=False):
+    """Update gauges and counters derived from process state, rate limited."""
+    global _last_refresh
+    now = time.monotonic()
+    if not force and now - _last_refresh < settings.METRICS_REFRESH_SECONDS:
+        return
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        _last_refresh = now
+        _refresh_cache_counters()
+        _refresh_pool_gauges()
+    finally:
+        _refresh_lock.release()
+
+
+def _refresh_cache_counters():
+    for result, total in tiered_cache.stats.items():
+        delta = total - _last_cache_stats.get(result, 0)
+        if delta > 0:
+            CACHE_REQUESTS.labels(result).inc(delta)
+        _last_cache_stats[result] = total
+
+
+def _refresh_pool_gauges():
+    for alias in connections:
+        options = settings.DATABASES[alias].get('OPTIONS', {})
+        if not options.get('pool'):
+            continue
+        stats = connections[alias].pool.get_stats()
+        DB_POOL_CONNECTIONS.labels(alias, 'size').set(stats.get('pool_size', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'available').set(stats.get('pool_available', 0))
+        DB_POOL_CONNECTIONS.labels(alias, 'waiting').set(stats.get('requests_waiting', 0))
+
+
+def render_metrics():
+    """Return ``(body, content_type)`` for the exposition format."""
+    refresh_process_metrics(force=True)
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_queue_depths)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
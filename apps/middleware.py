@@ -0,0 +1,162 @@
+import random
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from apps import instrumentation
+from apps.routers import pin_to_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class SyncAndAsyncMiddleware:
+    """
+    Base for middleware that runs natively under both WSGI and ASGI.
+
+    Under ASGI Django then calls ``__acall__`` on the event loop instead of
+    adapting the middleware onto a thread, so an async view (e.g. the event
+    stream) is served end to end without one.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        raise NotImplementedError
+
+    async def __acall__(self, request):
+        raise NotImplementedError
+
+
+class ReplicaPinningMiddleware(SyncAndAsyncMiddleware):
+    """
+    Pin a user to the primary database after a successful write.
+
+    DRF authenticates inside the view and copies the user back onto the
+    Django request, so ``request.user`` is the JWT user by the time the
+    response comes back through here.
+    """
+
+    @staticmethod
+    def should_pin(request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def handle(self, request):
+        response = self.get_response(request)
+        if self.should_pin(request, response):
+            pin_to_primary(getattr(request, 'user', None), response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.should_pin(request, response):
+            # request.user may be a lazy session lookup, which is sync-only
+            await sync_to_async(pin_to_primary)(getattr(request, 'user', None), response)
+        return response
+
+
+class PerformanceMiddleware(SyncAndAsyncMiddleware):
+    """
+    Time each request: SQL count/time, serializer and other timed spans
+    and the total. Sampled requests (``PERF_SAMPLE_RATE``) get a JSON log
+    line; requests slower than ``PERF_SLOW_REQUEST_MS`` are always logged
+    with EXPLAIN plans of their slowest queries. Those responses carry a
+    ``Server-Timing`` header too, but only for staff (or with DEBUG on),
+    since it tells anyone who can read it how much SQL a view runs.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        timings, token = instrumentation.start_request()
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        total = perf_counter() - start
+
+        slow = total * 1000 >= settings.PERF_SLOW_REQUEST_MS
+        if slow or random.random() < settings.PERF_SAMPLE_RATE:
+            self.report(request, response, timings, total, slow)
+        return response
+
+    async def __acall__(self, request):
+        timings, token = instrumentation.start_request()
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+        total = perf_counter() - start
+
+        slow = total * 1000 >= settings.PERF_SLOW_REQUEST_MS
+        if slow or random.random() < settings.PERF_SAMPLE_RATE:
+            # EXPLAIN and the log handlers block: keep them off the event loop
+            await sync_to_async(self.report_and_close, thread_sensitive=False)(
+                request, response, timings, total, slow
+            )
+        return response
+
+    def report(self, request, response, timings, total, slow):
+        if settings.DEBUG or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = instrumentation.server_timing_header(timings, total)
+        record = instrumentation.timing_record(request, response, timings, total)
+        if slow:
+            instrumentation.log_slow_request(record, timings, settings.PERF_EXPLAIN_MAX_QUERIES)
+        else:
+            instrumentation.log_request(record)
+
+    def report_and_close(self, *args):
+        # A pool thread outlives the request: don't leave its EXPLAIN
+        # (or session lookup) connection open behind it
+        try:
+            self.report(*args)
+        finally:
+            connections.close_all()
+
+
+class MetricsMiddleware(SyncAndAsyncMiddleware):
+    """Record request latency per URL name for the /metrics endpoint."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        from apps import metrics
+
+        self.metrics = metrics
+        super().__init__(get_response)
+
+    def handle(self, request):
+        start = perf_counter()
+        response = self.get_response(request)
+        self.observe(request, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        response = await self.get_response(request)
+        # In-memory counters only, cheap enough for the event loop
+        self.observe(request, perf_counter() - start)
+        return response
+
+    def observe(self, request, seconds):
+        match = getattr(request, 'resolver_match', None)
+        self.metrics.observe_request(match.url_name if match else None, request.method, seconds)
+        self.metrics.refresh_process_metrics()
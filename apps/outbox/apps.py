@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class OutboxConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.outbox'
+
+    def ready(self):
+        from django.conf import settings
+        from django.utils.module_loading import autodiscover_modules
+
+        # Register every app's @handler functions (apps/<app>/handlers.py)
+        autodiscover_modules('handlers')
+
+        if settings.METRICS_ENABLED:
+            from apps import metrics
+            from apps.outbox import outbox
+
+            metrics.register_queue_depth('outbox', outbox.depth)
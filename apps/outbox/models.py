@@ -0,0 +1,28 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """A domain event, written in the transaction of the change it describes; see ``apps.outbox.outbox``."""
+    topic = models.CharField(max_length=100)
+    # What the event is about, e.g. a user's public_id
+    key = models.CharField(max_length=100)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Pushed back after a failed dispatch
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set when OUTBOX_MAX_ATTEMPTS ran out; kept for inspection, never dispatched again
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The dispatch scan: live events in the order they're taken
+            models.Index(fields=['available_at', 'id'], condition=Q(failed_at__isnull=True), name='outbox_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.key} #{self.pk}"
@@ -0,0 +1,134 @@
+"""
+Transactional outbox for domain events.
+
+A change records what happened with ``emit(topic, key, data)``: one
+INSERT into ``OutboxEvent`` in the same transaction as the change, so the
+event exists exactly when the change does. That is all the request pays
+for. A dispatcher (``python manage.py dispatch_outbox``) takes due
+events oldest first, a batch at a time with ``FOR UPDATE SKIP LOCKED``,
+hands each topic's events to its handlers together and deletes them, in
+one transaction per batch. Database work a handler does commits with
+that delete, so it happens once; cache invalidation and live events go
+out with ``on_commit`` after it.
+
+A handler that raises rolls back only its topic's share of the batch (a
+savepoint), and those events are then handled one at a time, each in its
+own savepoint, so one bad event can't hold back the rest of its topic.
+The events that still fail are retried after a backoff, and after
+OUTBOX_MAX_ATTEMPTS they are marked failed (``failed_at``) and kept, with
+their last error, for someone to look at. Several dispatchers may run at
+once, so handlers must not depend on the order of events: they act on
+current state (recompute, invalidate), not deltas.
+
+Handlers are registered with ``@handler(topic)`` in each app's
+``handlers.py``.
+"""
+import logging
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from apps.jobs.queue import MAX_ERROR_CHARS, backoff
+from apps.outbox.models import OutboxEvent
+
+logger = logging.getLogger('apps.performance')
+
+# topic -> handlers, each called with a list of that topic's events
+HANDLERS = defaultdict(list)
+
+
+def handler(topic):
+    """Register the decorated function for ``topic``; stack to handle several."""
+    def register(func):
+        HANDLERS[topic].append(func)
+        return func
+    return register
+
+
+def emit(topic, key, data=None):
+    """Record a ``topic`` event about ``key`` in the current transaction."""
+    OutboxEvent.objects.create(topic=topic, key=str(key), data=data or {})
+
+
+def _handle(topic, events):
+    """Run ``topic``'s handlers on ``events`` in a savepoint; rolled back if one raises."""
+    with transaction.atomic():
+        for func in HANDLERS.get(topic, ()):
+            func(events)
+
+
+def _retry_later(event, exc, now):
+    attempts = event.attempts + 1
+    changes = {
+        'attempts': attempts,
+        'last_error': ''.join(traceback.format_exception(exc))[-MAX_ERROR_CHARS:],
+    }
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error("Outbox event %s failed %d times; giving up", event, attempts)
+        changes['failed_at'] = now
+    else:
+        changes['available_at'] = now + timedelta(seconds=backoff(attempts))
+    OutboxEvent.objects.filter(pk=event.pk).update(**changes)
+
+
+def dispatch(limit=None):
+    """Hand one batch of due events to their handlers; returns how many were dispatched."""
+    limit = limit or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        pending = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=now, failed_at__isnull=True)
+            .order_by('available_at', 'id')[:limit]
+        )
+        if not pending:
+            return 0
+        by_topic = defaultdict(list)
+        for event in pending:
+            by_topic[event.topic].append(event)
+
+        done = []
+        for topic, events in by_topic.items():
+            try:
+                _handle(topic, events)
+            except Exception:
+                logger.exception("Outbox handlers for %s failed on %d events", topic, len(events))
+            else:
+                done.extend(event.pk for event in events)
+                continue
+            # Find the events that fail on their own; the others go through
+            for event in events:
+                try:
+                    _handle(topic, [event])
+                except Exception as exc:
+                    _retry_later(event, exc, now)
+                else:
+                    done.append(event.pk)
+        OutboxEvent.objects.filter(pk__in=done).delete()
+    return len(done)
+
+
+def run(stop, burst=False):
+    """Dispatch until ``stop`` (a ``threading.Event``) is set, or in burst mode until nothing is due."""
+    while not stop.is_set():
+        try:
+            dispatched = dispatch()
+        except Exception:
+            # Database restart or failover: back off and reconnect
+            logger.exception("Outbox dispatcher could not reach the database")
+            dispatched = 0
+        if not connection.in_atomic_block:
+            close_old_connections()
+        if not dispatched:
+            if burst:
+                return
+            stop.wait(settings.OUTBOX_POLL_SECONDS)
+
+
+def depth():
+    """Events waiting for the dispatcher (the ``queue_depth{queue="outbox"}`` gauge)."""
+    return OutboxEvent.objects.filter(failed_at__isnull=True).count()
@@ -0,0 +1,123 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.outbox import outbox
+from apps.outbox.models import OutboxEvent
+from apps.user.factories import make_user
+from apps.user.models import TrustBadge
+
+
+class OutboxTests(TestCase):
+    """
+    The transactional outbox. A save only writes an event row next to the
+    change; the dispatcher does the side effects later, in batches.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = make_user()
+        self.calls = []
+        handlers = mock.patch.dict(outbox.HANDLERS)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+        @outbox.handler('test.ok')
+        def record(batch):
+            self.calls.append([event.key for event in batch])
+
+        @outbox.handler('test.broken')
+        def broken(batch):
+            TrustBadge.objects.update(badge_level='diamond')
+            raise RuntimeError('broken')
+
+        @outbox.handler('test.poisoned')
+        def poisoned(batch):
+            keys = [event.key for event in batch]
+            if 'poison' in keys:
+                raise RuntimeError('poison')
+            self.calls.append(keys)
+
+    def test_saves_record_events_and_the_dispatcher_follows_up(self):
+        """Saves write one event each; the saved user's cache is dropped at commit, the badge follows on dispatch"""
+        url = f'/api/users/{self.user.public_id}/'
+        self.assertEqual(self.client.get(url).data['bio'], None)
+        OutboxEvent.objects.all().delete()
+
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/auth/profile/', {'bio': 'Plantain'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        badge = TrustBadge.objects.get(user=self.user)
+        badge.transaction_count = 6
+        badge.average_rating = Decimal('4.1')
+        badge.save()
+
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by('id').values_list('topic', 'data')),
+            [
+                ('user.saved', {'created': False, 'fields': ['bio', 'updated_at']}),
+                ('badge.saved', {'fields': ['average_rating', 'transaction_count', 'updated_at'], 'badge_level': 'new_user'}),
+            ]
+        )
+        # Read-your-writes: the cached detail is already gone; the badge level waits for dispatch
+        self.assertEqual(self.client.get(url).data['bio'], 'Plantain')
+        self.assertEqual(TrustBadge.objects.get(user=self.user).badge_level, 'new_user')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(outbox.dispatch(), 2)
+
+        self.assertEqual(self.client.get(url).data['bio'], 'Plantain')
+        self.assertEqual(TrustBadge.objects.get(user=self.user).badge_level, 'bronze')
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failing_handler_only_delays_its_topic(self):
+        """A handler that raises is rolled back and retried later; other topics still go out"""
+        OutboxEvent.objects.all().delete()
+        outbox.emit('test.ok', 'a')
+        outbox.emit('test.broken', 'b')
+        outbox.emit('test.ok', 'c')
+
+        self.assertEqual(outbox.dispatch(), 2)
+
+        self.assertEqual(self.calls, [['a', 'c']])
+        self.assertEqual(TrustBadge.objects.get(user=self.user).badge_level, 'new_user')
+        broken = OutboxEvent.objects.get()
+        self.assertEqual((broken.topic, broken.attempts), ('test.broken', 1))
+        self.assertGreater(broken.available_at, timezone.now())
+        self.assertIn('RuntimeError: broken', broken.last_error)
+        # Not due again yet
+        self.assertEqual(outbox.dispatch(), 0)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_poison_event_is_set_aside(self):
+        """An event that always fails doesn't hold back its topic and is marked failed after the last attempt"""
+        OutboxEvent.objects.all().delete()
+        outbox.emit('test.poisoned', 'a')
+        outbox.emit('test.poisoned', 'poison')
+        outbox.emit('test.poisoned', 'c')
+
+        self.assertEqual(outbox.dispatch(), 2)
+
+        # The batch failed, then each event was handled on its own
+        self.assertEqual(self.calls, [['a'], ['c']])
+        poison = OutboxEvent.objects.get()
+        self.assertEqual((poison.key, poison.attempts, poison.failed_at), ('poison', 1, None))
+        self.assertEqual(outbox.depth(), 1)
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch(), 0)
+
+        poison.refresh_from_db()
+        self.assertEqual(poison.attempts, 2)
+        self.assertIsNotNone(poison.failed_at)
+        self.assertIn('RuntimeError: poison', poison.last_error)
+        self.assertEqual(outbox.depth(), 0)
+        # Never picked up again
+        OutboxEvent.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.dispatch(), 0)
+        self.assertEqual(OutboxEvent.objects.get().attempts, 2)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class PricesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.prices'
+
+    def ready(self):
+        from apps.prices import signals  # noqa: F401
@@ -0,0 +1,63 @@
+"""
+Map free-text listing titles to a canonical commodity, so "White maize",
+"Yellow corn" and "Agbado" land in the same price series.
+"""
+import re
+
+# Phrase (singular, lowercase) -> commodity; includes common Yoruba, Hausa
+# and Igbo market names
+ALIASES = {
+    'maize': 'maize', 'corn': 'maize', 'agbado': 'maize', 'masara': 'maize',
+    'guinea corn': 'sorghum', 'sorghum': 'sorghum', 'dawa': 'sorghum',
+    'millet': 'millet', 'gero': 'millet',
+    'rice': 'rice', 'paddy': 'rice', 'shinkafa': 'rice', 'iresi': 'rice',
+    'yam': 'yam', 'isu': 'yam', 'doya': 'yam', 'ji': 'yam',
+    'cassava': 'cassava', 'rogo': 'cassava', 'ege': 'cassava',
+    'garri': 'garri', 'gari': 'garri',
+    'sweet potato': 'sweet potato', 'potato': 'potato',
+    'tomato': 'tomatoes', 'tomatoe': 'tomatoes', 'tumatur': 'tomatoes',
+    'pepper': 'pepper', 'ata rodo': 'pepper', 'tatashe': 'pepper', 'barkono': 'pepper',
+    'onion': 'onions', 'albasa': 'onions', 'alubosa': 'onions',
+    'okra': 'okra', 'okro': 'okra', 'ila': 'okra',
+    'orange': 'oranges', 'pineapple': 'pineapple', 'watermelon': 'watermelon',
+    'plantain': 'plantain', 'banana': 'banana',
+    'bean': 'beans', 'cowpea': 'beans', 'ewa': 'beans', 'wake': 'beans',
+    'groundnut': 'groundnut', 'peanut': 'groundnut', 'epa': 'groundnut', 'gyada': 'groundnut',
+    'soybean': 'soybeans', 'soya': 'soybeans',
+    'sesame': 'sesame', 'beniseed': 'sesame', 'ridi': 'sesame',
+    'cashew': 'cashew', 'cocoa': 'cocoa', 'palm oil': 'palm oil', 'ginger': 'ginger',
+    'egg': 'eggs', 'broiler': 'chicken', 'chicken': 'chicken', 'turkey': 'turkey',
+    'goat': 'goat', 'ram': 'ram', 'sheep': 'ram', 'cattle': 'cattle', 'cow': 'cattle',
+    'catfish': 'catfish', 'tilapia': 'tilapia', 'honey': 'honey',
+}
+
+
+def _singular(word):
+    if word.endswith('oes'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def commodity_for(title):
+    """Canonical commodity for a title: 'Fresh Roma tomatoes' -> 'tomatoes'."""
+    words = [_singular(w) for w in re.sub(r'[^a-z ]', ' ', title.lower()).split()]
+    # Two-word names ("guinea corn", "palm oil") before single words
+    for first, second in zip(words, words[1:]):
+        if f'{first} {second}' in ALIASES:
+            return ALIASES[f'{first} {second}']
+    for word in words:
+        if word in ALIASES:
+            return ALIASES[word]
+    return ' '.join(words[:3])[:60] or 'other'
+
+
+def title_terms(commodity):
+    """
+    Words every title of ``commodity`` contains (one of them, in any case),
+    to narrow a query in SQL before ``commodity_for`` decides. A title
+    names a commodity by one of its aliases, and plurals only add letters.
+    """
+    phrases = [alias for alias, name in ALIASES.items() if name == commodity] or [commodity]
+    return sorted({phrase.split()[0] for phrase in phrases if phrase != 'other'})
@@ -0,0 +1,104 @@
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import models
+
+from apps.listing.models import Listing
+
+
+class PriceObservation(models.Model):
+    """
+    One price seen in the market: a listing going live or being repriced,
+    or a completed sale. Append-only but for ``rolled_up``; rollups are
+    computed from these.
+    """
+    class Source(models.TextChoices):
+        LISTING = "listing", "Listing"
+        SALE = "sale", "Completed Sale"
+
+    commodity = models.CharField(max_length=60)
+    category = models.CharField(max_length=20, choices=Listing.Category.choices)
+    unit = models.CharField(max_length=10, choices=Listing.Unit.choices)
+    state = models.CharField(max_length=20, blank=True, default='')
+    # Naira per unit
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2)
+    source = models.CharField(max_length=10, choices=Source.choices)
+    listing = models.ForeignKey(
+        Listing,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='price_observations',
+    )
+    observed_at = models.DateTimeField()
+    # Set once a rollup batch has folded it in (apps.prices.rollups)
+    rolled_up = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Observations the next rollup batch takes, oldest first
+            models.Index(fields=['id'], condition=models.Q(rolled_up=False), name='price_obs_pending'),
+            # Rows arrive roughly in time order: a BRIN index is a few pages
+            # even at hundreds of millions of rows
+            BrinIndex(fields=['observed_at'], name='price_obs_observed_brin'),
+            # Batch jobs reload one series over a date range
+            models.Index(fields=['commodity', 'unit', 'observed_at'], name='price_obs_series'),
+        ]
+
+    def __str__(self):
+        return f"{self.commodity} ₦{self.price}/{self.unit} ({self.state or 'Nigeria'}, {self.observed_at:%Y-%m-%d})"
+
+
+class PriceRollup(models.Model):
+    """
+    Price statistics for one commodity and unit, per state ('' = all of
+    Nigeria) and per day or week. Written by ``rollup_prices``; read by
+    the /api/prices/ endpoints with one index range scan.
+    """
+    class Period(models.TextChoices):
+        DAY = "day", "Daily"
+        WEEK = "week", "Weekly"
+
+    commodity = models.CharField(max_length=60)
+    unit = models.CharField(max_length=10, choices=Listing.Unit.choices)
+    state = models.CharField(max_length=20, blank=True, default='')
+    period = models.CharField(max_length=4, choices=Period.choices)
+    # Day, or the Monday the week starts on
+    period_start = models.DateField()
+
+    median = models.DecimalField(max_digits=12, decimal_places=2)
+    p10 = models.DecimalField(max_digits=12, decimal_places=2)
+    p90 = models.DecimalField(max_digits=12, decimal_places=2)
+    # Total quantity on offer or sold
+    volume = models.DecimalField(max_digits=16, decimal_places=2)
+    observations = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also the index every chart query is a range scan of
+            models.UniqueConstraint(
+                fields=['commodity', 'unit', 'state', 'period', 'period_start'],
+                name='price_rollup_series',
+            ),
+        ]
+        indexes = [
+            # Latest week across all commodities, for the price board
+            models.Index(fields=['period', 'state', 'period_start'], name='price_rollup_latest'),
+        ]
+
+    def __str__(self):
+        return f"{self.commodity}/{self.unit} {self.state or 'Nigeria'} {self.period} {self.period_start}: ₦{self.median}"
+
+
+class RollupCheckpoint(models.Model):
+    """
+    One row per rollup job: its lock, so runs don't interleave, and the
+    highest PriceObservation id it has folded in (for monitoring; batches
+    take observations by ``rolled_up``).
+    """
+    name = models.CharField(max_length=40, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
@@ -0,0 +1,84 @@
+"""
+Price observations: every price the market has shown, as an append-only
+log the rollups are computed from.
+
+- A listing is observed when it goes live (including in a bulk import)
+  and each time it is repriced while live (see ``apps.prices.signals``).
+- ``record_sale`` logs what a completed sale actually went for.
+- ``backfill_from_listings`` observes listings that predate the log, at
+  their ``created_at``.
+"""
+from django.utils import timezone
+
+from apps.listing.models import Listing
+from apps.prices.commodities import commodity_for
+from apps.prices.models import PriceObservation
+
+BACKFILL_CHUNK = 10_000
+
+
+def _observation(listing, source, price, quantity, observed_at):
+    return PriceObservation(
+        commodity=commodity_for(listing.title),
+        category=listing.category,
+        unit=listing.unit,
+        state=listing.state,
+        price=price,
+        quantity=quantity,
+        source=source,
+        listing=listing,
+        observed_at=observed_at,
+    )
+
+
+def observe_listing(listing):
+    """Log ``listing``'s current asking price."""
+    observation = _observation(
+        listing, PriceObservation.Source.LISTING, listing.price, listing.quantity, timezone.now(),
+    )
+    observation.save()
+    return observation
+
+
+def observe_listings(listings):
+    """Log the asking price of each active listing in a bulk import."""
+    now = timezone.now()
+    return PriceObservation.objects.bulk_create([
+        _observation(listing, PriceObservation.Source.LISTING, listing.price, listing.quantity, now)
+        for listing in listings
+        if listing.status == Listing.Status.ACTIVE
+    ], batch_size=2000)
+
+
+def record_sale(listing, price, quantity, sold_at=None):
+    """Log a completed sale of ``quantity`` units from ``listing`` at ``price`` per unit."""
+    observation = _observation(
+        listing, PriceObservation.Source.SALE, price, quantity, sold_at or timezone.now(),
+    )
+    observation.save()
+    return observation
+
+
+def backfill_from_listings(chunk_size=BACKFILL_CHUNK):
+    """
+    Observe every published listing (anything but drafts) with no
+    observation yet, as of when it was created. Reads by primary key in
+    chunks; returns how many were added.
+    """
+    pending = (
+        Listing.objects.exclude(status=Listing.Status.DRAFT)
+        .filter(price_observations__isnull=True)
+        .only('public_id', 'title', 'category', 'unit', 'state', 'price', 'quantity', 'created_at')
+        .order_by('public_id')
+    )
+    added, last = 0, None
+    while True:
+        chunk = list((pending.filter(public_id__gt=last) if last else pending)[:chunk_size])
+        if not chunk:
+            return added
+        PriceObservation.objects.bulk_create([
+            _observation(listing, PriceObservation.Source.LISTING, listing.price, listing.quantity, listing.created_at)
+            for listing in chunk
+        ], batch_size=2000)
+        added += len(chunk)
+        last = chunk[-1].public_id
@@ -0,0 +1,185 @@
+"""
+Daily and weekly price rollups, computed in batch with pandas.
+
+Each run folds the observations not yet ``rolled_up`` into
+``PriceRollup`` and then flags them. A high-water id would not do:
+observations are inserted by concurrent requests, and a lower id can
+commit after a run has passed it. For every commodity/unit
+the batch touches, all observations in the affected weeks are reloaded
+and their median, p10/p90, volume and count recomputed per state and
+for Nigeria as a whole, then upserted. Untouched series and weeks are
+never read, so a run costs the size of the batch's weeks, not of the
+history. ``rebuild_all`` recomputes everything, one series at a time,
+after a backfill.
+
+pandas is imported per call: only the batch job needs it.
+"""
+import operator
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from apps.prices.models import PriceObservation, PriceRollup, RollupCheckpoint
+
+CHECKPOINT = 'price-rollups'
+BATCH_SIZE = 200_000
+MARK_CHUNK = 10_000
+QUANTILES = {'p10': 0.1, 'median': 0.5, 'p90': 0.9}
+OBSERVATION_FIELDS = ['commodity', 'unit', 'state', 'price', 'quantity', 'observed_at']
+SERIES_FIELDS = ['commodity', 'unit', 'state', 'period', 'period_start']
+STAT_FIELDS = ['median', 'p10', 'p90', 'volume', 'observations', 'updated_at']
+
+
+def week_start(day):
+    """The Monday of ``day``'s week."""
+    return day - timedelta(days=day.weekday())
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def load_frame(queryset):
+    """Observations from ``queryset`` as a DataFrame of OBSERVATION_FIELDS."""
+    import pandas as pd
+
+    rows = queryset.order_by().values_list(*OBSERVATION_FIELDS).iterator(chunk_size=20_000)
+    return pd.DataFrame.from_records(rows, columns=OBSERVATION_FIELDS)
+
+
+def rollup_frame(frame, period):
+    """
+    Rollup statistics for the observations in ``frame``: one row per
+    commodity, unit, state and ``period`` start, plus one per period with
+    state '' for all of Nigeria. Days and weeks are in UTC.
+    """
+    import pandas as pd
+
+    days = pd.to_datetime(frame['observed_at'], utc=True).dt.normalize().dt.tz_localize(None)
+    if period == PriceRollup.Period.WEEK:
+        days = days - pd.to_timedelta(days.dt.weekday, unit='D')
+    frame = frame.assign(
+        period_start=days.dt.date,
+        price=frame['price'].astype(float),
+        quantity=frame['quantity'].astype(float),
+    )
+    both = pd.concat([frame, frame.assign(state='')], ignore_index=True)
+    keys = ['commodity', 'unit', 'state', 'period_start']
+    grouped = both.groupby(keys, sort=False)
+    stats = grouped['price'].quantile(list(QUANTILES.values())).unstack()
+    stats.columns = list(QUANTILES)
+    totals = grouped.agg(volume=('quantity', 'sum'), observations=('price', 'size'))
+    return stats.join(totals).reset_index()
+
+
+def _money(value):
+    return Decimal(f'{value:.2f}')
+
+
+def _write(frame, period):
+    rollups = [
+        PriceRollup(
+            commodity=row.commodity,
+            unit=row.unit,
+            state=row.state,
+            period=period,
+            period_start=row.period_start,
+            median=_money(row.median),
+            p10=_money(row.p10),
+            p90=_money(row.p90),
+            volume=_money(row.volume),
+            observations=int(row.observations),
+        )
+        for row in frame.itertuples(index=False)
+    ]
+    PriceRollup.objects.bulk_create(
+        rollups,
+        batch_size=2000,
+        update_conflicts=True,
+        unique_fields=SERIES_FIELDS,
+        update_fields=STAT_FIELDS,
+    )
+    return len(rollups)
+
+
+def _roll_up(frame):
+    if frame.empty:
+        return 0
+    return sum(_write(rollup_frame(frame, period), period) for period in PriceRollup.Period.values)
+
+
+def _mark_rolled_up(ids):
+    # By id: a condition could also match rows that committed after the batch was read
+    for start in range(0, len(ids), MARK_CHUNK):
+        PriceObservation.objects.filter(pk__in=ids[start:start + MARK_CHUNK]).update(rolled_up=True)
+
+
+def _checkpoint():
+    checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT)
+    return checkpoint
+
+
+def run_batch(batch_size=BATCH_SIZE):
+    """
+    Fold up to ``batch_size`` new observations into the rollups. Returns
+    ``(observations, rollups written)``; 0 observations means caught up.
+    The checkpoint row lock keeps concurrent runs from interleaving.
+    """
+    with transaction.atomic():
+        checkpoint = _checkpoint()
+        # Read before the affected weeks are loaded, so every id flagged is in them
+        new = list(
+            PriceObservation.objects.filter(rolled_up=False).order_by('id')
+            .values_list('id', 'commodity', 'unit', 'observed_at')[:batch_size]
+        )
+        if not new:
+            return 0, 0
+
+        # First and last affected week per series
+        spans = {}
+        for _, commodity, unit, observed_at in new:
+            week = week_start(observed_at.astimezone(timezone.utc).date())
+            first, last = spans.get((commodity, unit), (week, week))
+            spans[commodity, unit] = (min(first, week), max(last, week))
+        affected = reduce(operator.or_, (
+            Q(
+                commodity=commodity,
+                unit=unit,
+                observed_at__gte=_midnight(first),
+                observed_at__lt=_midnight(last + timedelta(days=7)),
+            )
+            for (commodity, unit), (first, last) in spans.items()
+        ))
+
+        written = _roll_up(load_frame(PriceObservation.objects.filter(affected)))
+        _mark_rolled_up([row[0] for row in new])
+        checkpoint.last_id = max(checkpoint.last_id, new[-1][0])
+        checkpoint.save(update_fields=['last_id', 'updated_at'])
+    return len(new), written
+
+
+def rebuild_all(progress=None):
+    """
+    Recompute every rollup from all observations, one commodity/unit at a
+    time so memory stays bounded. Readers keep seeing the old rollups
+    until the new ones commit. Returns the number of rollups written.
+    """
+    with transaction.atomic():
+        checkpoint = _checkpoint()
+        PriceRollup.objects.all().delete()
+        written = 0
+        series = PriceObservation.objects.order_by('commodity', 'unit').values_list('commodity', 'unit').distinct()
+        for commodity, unit in series:
+            observations = PriceObservation.objects.filter(commodity=commodity, unit=unit)
+            # Read before the frame, so every id flagged is in it
+            pending = list(observations.filter(rolled_up=False).values_list('id', flat=True))
+            written += _roll_up(load_frame(observations))
+            _mark_rolled_up(pending)
+            if progress:
+                progress(commodity, unit, written)
+        checkpoint.last_id = PriceObservation.objects.aggregate(last=Max('id'))['last'] or 0
+        checkpoint.save(update_fields=['last_id', 'updated_at'])
+    return written
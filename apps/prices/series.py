@@ -0,0 +1,208 @@
+"""
+Price series for charts, read from ``PriceRollup``.
+
+A series is one index range scan over (commodity, unit, state, period,
+period_start). Long ranges are downsampled to at most ``points`` with
+Largest-Triangle-Three-Buckets on the median, which keeps the spikes and
+dips a plain every-nth sample drops; each kept point is a real rollup
+row. Responses are cached per query for PRICE_CACHE_SECONDS: rollups only
+change when ``rollup_prices`` runs.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from apps.cache import tiered_cache
+from apps.listing.models import Listing
+from apps.prices.commodities import commodity_for
+from apps.prices.models import PriceRollup
+
+DEFAULT_POINTS = 120
+MAX_POINTS = 500
+DEFAULT_SPAN = {
+    PriceRollup.Period.DAY: timedelta(days=90),
+    PriceRollup.Period.WEEK: timedelta(weeks=52),
+}
+STAT_FIELDS = ('median', 'p10', 'p90', 'volume', 'observations')
+
+
+class SeriesError(ValueError):
+    """Bad series parameter; ``args[0]`` is the ``{"field": ["message"]}`` error dict."""
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of ``threshold`` points of the series (``x``, ``y``) that keep
+    its shape: the first and last point, and from each bucket in between
+    the point making the largest triangle with the previous pick and the
+    next bucket's average.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket i covers edges[i]:edges[i + 1]; the first and last point are always kept
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    picked = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            following = slice(edges[i + 1], edges[i + 2])
+        else:
+            following = slice(n - 1, n)
+        next_x, next_y = x[following].mean(), y[following].mean()
+        a = picked[-1]
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        picked.append(start + int(np.argmax(area)))
+    picked.append(n - 1)
+    return np.array(picked)
+
+
+def _date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise SeriesError({name: ["Use the YYYY-MM-DD format."]})
+
+
+def parse_params(params):
+    """Validated series query: commodity, unit, state, period, start, end, points."""
+    raw_commodity = params.get('commodity', '').strip()
+    if not raw_commodity:
+        raise SeriesError({"commodity": ["This field is required."]})
+
+    unit = params.get('unit', '')
+    if unit and unit not in Listing.Unit.values:
+        raise SeriesError({"unit": [f"Choose one of: {', '.join(Listing.Unit.values)}."]})
+    state = params.get('state', '')
+    if state and state not in Listing.State.values:
+        raise SeriesError({"state": ["Unknown state; leave it out for all of Nigeria."]})
+    period = params.get('period', PriceRollup.Period.WEEK)
+    if period not in PriceRollup.Period.values:
+        raise SeriesError({"period": [f"Choose one of: {', '.join(PriceRollup.Period.values)}."]})
+
+    end = _date(params, 'end') or timezone.now().date()
+    start = _date(params, 'start') or end - DEFAULT_SPAN[period]
+    if start > end:
+        raise SeriesError({"start": ["Must not be after end."]})
+
+    try:
+        points = int(params.get('points', DEFAULT_POINTS))
+    except ValueError:
+        points = 0
+    if not 3 <= points <= MAX_POINTS:
+        raise SeriesError({"points": [f"Choose from 3 to {MAX_POINTS}."]})
+
+    return {
+        'commodity': commodity_for(raw_commodity),
+        'unit': unit,
+        'state': state,
+        'period': period,
+        'start': start,
+        'end': end,
+        'points': points,
+    }
+
+
+def default_unit(commodity, period):
+    """The unit ``commodity`` is most often sold in."""
+    return (
+        PriceRollup.objects.filter(commodity=commodity, state='', period=period)
+        .values('unit').annotate(n=Sum('observations')).order_by('-n')
+        .values_list('unit', flat=True).first()
+    )
+
+
+def load_series(query):
+    """The series for a parsed ``query``, downsampled to ``query['points']``."""
+    unit = query['unit'] or default_unit(query['commodity'], query['period'])
+    rows = []
+    if unit:
+        rows = list(
+            PriceRollup.objects.filter(
+                commodity=query['commodity'],
+                unit=unit,
+                state=query['state'],
+                period=query['period'],
+                period_start__range=(query['start'], query['end']),
+            ).order_by('period_start').values_list('period_start', *STAT_FIELDS)
+        )
+
+    total = len(rows)
+    if total > query['points']:
+        x = [row[0].toordinal() for row in rows]
+        y = [row[1] for row in rows]
+        rows = [rows[i] for i in lttb(x, y, query['points'])]
+    return {
+        'commodity': query['commodity'],
+        'unit': unit,
+        'state': query['state'],
+        'period': query['period'],
+        'start': query['start'],
+        'end': query['end'],
+        'total_points': total,
+        'downsampled': total > len(rows),
+        'points': [dict(zip(('date',) + STAT_FIELDS, row)) for row in rows],
+    }
+
+
+def price_series(params):
+    """Series for request ``params``, cached; raises SeriesError."""
+    query = parse_params(params)
+    key = ':'.join(str(query[name]) for name in ('commodity', 'unit', 'state', 'period', 'start', 'end', 'points'))
+    return tiered_cache.get_or_set(
+        f"price-series:{key}",
+        lambda: load_series(query),
+        timeout=settings.PRICE_CACHE_SECONDS,
+    )
+
+
+def latest_prices(state=''):
+    """
+    Latest weekly median per commodity and unit in ``state`` ('' = all of
+    Nigeria), with the change from the week before. Cached.
+    """
+    def compute():
+        weekly = PriceRollup.objects.filter(state=state, period=PriceRollup.Period.WEEK)
+        latest = weekly.aggregate(latest=Max('period_start'))['latest']
+        if latest is None:
+            return {'state': state, 'week': None, 'commodities': []}
+        rows = weekly.filter(period_start__gte=latest - timedelta(weeks=1)).values_list(
+            'commodity', 'unit', 'period_start', 'median', 'observations',
+        )
+        weeks = {}
+        for commodity, unit, week, median, count in rows:
+            weeks.setdefault((commodity, unit), {})[week] = (median, count)
+        commodities = []
+        for (commodity, unit), by_week in sorted(weeks.items()):
+            if latest not in by_week:
+                continue
+            median, count = by_week[latest]
+            previous = by_week.get(latest - timedelta(weeks=1))
+            change = None
+            if previous and previous[0]:
+                change = round(float((median - previous[0]) / previous[0] * 100), 1)
+            commodities.append({
+                'commodity': commodity,
+                'unit': unit,
+                'median': median,
+                'observations': count,
+                'change_pct': change,
+            })
+        return {'state': state, 'week': latest, 'commodities': commodities}
+
+    return tiered_cache.get_or_set(
+        f"price-latest:{state}",
+        compute,
+        timeout=settings.PRICE_CACHE_SECONDS,
+    )
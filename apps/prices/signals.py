@@ -0,0 +1,29 @@
+from decimal import Decimal
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.listing.models import Listing
+from apps.listing.signals import listings_imported
+from apps.prices import observations
+
+
+@receiver(post_save, sender=Listing)
+def observe_listing_price(sender, instance, raw=False, **kwargs):
+    """A listing going live, or repriced while live, is a price observation."""
+    if raw or instance.status != Listing.Status.ACTIVE:
+        return
+    # Set by the listing app's pre_save receiver
+    stored = getattr(instance, '_stored_row', None)
+    if (
+        stored
+        and stored['status'] == Listing.Status.ACTIVE
+        and stored['price'] == Decimal(str(instance.price))
+    ):
+        return
+    observations.observe_listing(instance)
+
+
+@receiver(listings_imported, sender=Listing)
+def observe_imported_prices(sender, listings, **kwargs):
+    observations.observe_listings(listings)
@@ -0,0 +1,10 @@
+from apps.jobs.queue import task
+
+
+@task('prices.rollup', priority=-10)
+def rollup_prices():
+    """Fold new price observations into the rollups, like `rollup_prices`."""
+    from apps.prices import rollups
+
+    while rollups.run_batch()[0]:
+        pass
@@ -0,0 +1,141 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.cache import tiered_cache
+from apps.listing.models import Listing
+from apps.prices import rollups
+from apps.prices.models import PriceObservation, PriceRollup
+from apps.user.factories import make_user
+
+
+class PriceIndexTests(TestCase):
+    """
+    The price index: rollups are computed in batches from an append-only
+    log of observations, so the tests record observations, run a batch
+    and check the numbers a chart would show.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        tiered_cache.clear()
+        self.farmer = make_user('farmer')
+
+    def make_listing(self, title='White maize', price=38000, **extra):
+        return Listing.objects.create(
+            owner=self.farmer,
+            title=title,
+            category='grains',
+            state=extra.pop('state', 'kano'),
+            quantity=10,
+            unit='bag',
+            price=price,
+            location=Point(8.5920, 12.0022, srid=4326),
+            **extra
+        )
+
+    def observe(self, price, day, state='kano', quantity=10):
+        return PriceObservation.objects.create(
+            commodity='maize', category='grains', unit='bag', state=state,
+            price=price, quantity=quantity, source=PriceObservation.Source.SALE,
+            observed_at=datetime(2024, 1, day, 12, tzinfo=dt_timezone.utc),
+        )
+
+    def test_listing_prices_are_observed(self):
+        """Going live and repricing are observed; drafts and unchanged saves are not"""
+        listing = self.make_listing()
+        self.make_listing(title='Yellow corn', status='draft')
+        listing.description = 'Dry, cleaned, 100kg bags'
+        listing.save()
+        listing.price = 41000
+        listing.save()
+
+        observed = list(PriceObservation.objects.order_by('id').values_list('commodity', 'price', 'state'))
+        self.assertEqual(observed, [('maize', Decimal('38000.00'), 'kano'), ('maize', Decimal('41000.00'), 'kano')])
+
+    def test_rollups_are_computed_incrementally(self):
+        """A batch computes median and p10/p90 per state and nationally; the next only adds what's new"""
+        # Monday 1 January 2024 to Sunday 7 January: one week
+        for price, day in [(30000, 1), (32000, 2), (34000, 3), (36000, 4)]:
+            self.observe(price, day)
+        self.observe(50000, 5, state='lagos')
+
+        self.assertEqual(rollups.run_batch()[0], 5)
+        week = PriceRollup.objects.get(commodity='maize', unit='bag', state='', period='week')
+        self.assertEqual(week.period_start, date(2024, 1, 1))
+        self.assertEqual(week.median, Decimal('34000.00'))
+        self.assertEqual(week.p10, Decimal('30800.00'))
+        self.assertEqual(week.p90, Decimal('44400.00'))
+        self.assertEqual((week.volume, week.observations), (Decimal('50.00'), 5))
+        kano = PriceRollup.objects.get(state='kano', period='week')
+        self.assertEqual(kano.median, Decimal('33000.00'))
+        self.assertEqual(PriceRollup.objects.filter(state='kano', period='day').count(), 4)
+
+        # Nothing new: nothing to do
+        self.assertEqual(rollups.run_batch(), (0, 0))
+
+        self.observe(40000, 9)
+        self.assertEqual(rollups.run_batch()[0], 1)
+        week.refresh_from_db()
+        self.assertEqual(week.observations, 5)
+        self.assertEqual(
+            PriceRollup.objects.get(state='', period='week', period_start=date(2024, 1, 8)).median,
+            Decimal('40000.00'),
+        )
+
+    def test_observation_committed_late_with_a_lower_id(self):
+        """A lower id that commits after a batch has run is still rolled up by the next"""
+        early = self.observe(30000, 1)
+        self.observe(34000, 2)
+        # The first insert's transaction is still open when the batch runs
+        late = PriceObservation.objects.filter(pk=early.pk)
+        late_row = late.values().get()
+        late.delete()
+
+        self.assertEqual(rollups.run_batch()[0], 1)
+        PriceObservation.objects.create(**late_row)
+        self.assertEqual(rollups.run_batch()[0], 1)
+
+        week = PriceRollup.objects.get(state='', period='week')
+        self.assertEqual((week.observations, week.median), (2, Decimal('32000.00')))
+        self.assertEqual(rollups.run_batch(), (0, 0))
+        self.assertFalse(PriceObservation.objects.filter(rolled_up=False).exists())
+
+    def test_series_range_and_downsampling(self):
+        """A long daily range comes back as `points` real rows that keep the spike; repeats are cached"""
+        start = date(2023, 1, 1)
+        PriceRollup.objects.bulk_create([
+            PriceRollup(
+                commodity='maize', unit='bag', state='', period='day',
+                period_start=start + timedelta(days=i),
+                median=90000 if i == 200 else 38000 + (i % 7) * 100,
+                p10=35000, p90=42000, volume=100, observations=5,
+            )
+            for i in range(400)
+        ])
+        params = {'commodity': 'Yellow corn', 'period': 'day', 'start': '2023-01-01', 'end': '2024-12-31', 'points': 50}
+
+        response = self.client.get('/api/prices/', params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['commodity'], response.data['unit']), ('maize', 'bag'))
+        self.assertEqual(response.data['total_points'], 400)
+        self.assertTrue(response.data['downsampled'])
+        points = response.data['points']
+        self.assertEqual(len(points), 50)
+        self.assertEqual((points[0]['date'], points[-1]['date']), (start, start + timedelta(days=399)))
+        self.assertIn(Decimal('90000.00'), [p['median'] for p in points])
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/prices/', params)
+
+        response = self.client.get('/api/prices/', {'commodity': 'maize', 'start': '2024-02-01', 'end': '2024-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('start', response.data['error'])
+
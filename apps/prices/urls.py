@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.series, name='price_series'),
+    path('commodities/', views.commodities, name='price_commodities'),
+]
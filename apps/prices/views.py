@@ -0,0 +1,41 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+
+from apps.listing.models import Listing
+from apps.prices.series import SeriesError, latest_prices, price_series
+from apps.routers import replica_reads
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@replica_reads
+def series(request):
+    """
+    GET /api/prices/?commodity=maize&unit=bag&state=kano&period=week&start=2024-01-01&end=2024-12-31&points=120
+    Median, p10/p90 and volume per day or week for a chart; state left out
+    means all of Nigeria. Long ranges are downsampled to ``points``.
+    """
+    try:
+        data = price_series(request.query_params)
+    except SeriesError as exc:
+        return Response({"error": exc.args[0]}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@replica_reads
+def commodities(request):
+    """
+    GET /api/prices/commodities/?state=lagos
+    Latest weekly median per commodity, with the change on the week before.
+    """
+    state = request.query_params.get('state', '')
+    if state and state not in Listing.State.values:
+        return Response(
+            {"error": {"state": ["Unknown state; leave it out for all of Nigeria."]}},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(latest_prices(state))
@@ -0,0 +1,118 @@
+"""
+Database routing between the primary and its read replicas.
+
+All writes, and by default all reads, go to ``default``. Views opt in to
+replica reads with the ``replica_reads`` decorator; inside such a view the
+router spreads reads across ``settings.REPLICA_DATABASES``.
+
+A user who has just written is "pinned" to the primary for
+``settings.REPLICA_PIN_SECONDS`` so they always read their own writes,
+even while the replicas are catching up.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_COOKIE_NAME = 'replica_pin'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def _pin_cache_key(user_pk):
+    return f"replica_pin:{user_pk}"
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Route reads made inside the block to a replica (when configured)."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary(user, response=None):
+    """Keep ``user`` reading from the primary for the pin window."""
+    seconds = settings.REPLICA_PIN_SECONDS
+    if seconds <= 0:
+        return
+    if user is not None and user.is_authenticated:
+        cache.set(_pin_cache_key(user.pk), True, timeout=seconds)
+    if response is not None:
+        response.set_cookie(PIN_COOKIE_NAME, '1', max_age=seconds, httponly=True)
+
+
+def is_pinned(request):
+    """True if the requesting user/client wrote within the pin window."""
+    if request.COOKIES.get(PIN_COOKIE_NAME):
+        return True
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return bool(cache.get(_pin_cache_key(user.pk)))
+    return False
+
+
+async def ais_pinned(request):
+    """Async variant of ``is_pinned`` for ASGI views."""
+    if request.COOKIES.get(PIN_COOKIE_NAME):
+        return True
+    # request.user may be a lazy session lookup, which is sync-only
+    if hasattr(request, 'auser'):
+        user = await request.auser()
+    else:
+        user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return bool(await cache.aget(_pin_cache_key(user.pk)))
+    return False
+
+
+def replica_reads(view_func):
+    """
+    Serve a read-only view from a replica unless the user is pinned.
+
+    Place it directly above the view function (below ``@api_view`` and
+    ``@permission_classes``) so ``request.user`` is already authenticated.
+    Works for both sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD', 'OPTIONS') or await ais_pinned(request):
+                return await view_func(request, *args, **kwargs)
+            with use_replica():
+                return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') or is_pinned(request):
+            return view_func(request, *args, **kwargs)
+        with use_replica():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    """Send writes to the primary and opted-in reads to a random replica."""
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        if replicas and _replica_reads.get():
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,112 @@
+"""
+Worker boot time: how long a fresh process takes to become ready to serve,
+and which imports it pays for.
+
+Both measurements run a new interpreter that does what a gunicorn worker
+does before its first request (settings, app registry, middleware, URLconf),
+so modules already imported by the calling process don't skew the result.
+
+Heavy optional dependencies (ML, dataframes, the Cloudinary uploader) must
+stay out of boot: import them inside the function that needs them.
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+# Modules that must not be imported while a worker boots
+HEAVY_MODULES = (
+    'torch',
+    'transformers',
+    'sentence_transformers',
+    'spacy',
+    'faiss',
+    'pandas',
+    'scipy',
+    'sklearn',
+    'cloudinary.uploader',
+)
+
+BOOT_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'heavy': [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$')
+
+
+def _run_boot(*flags):
+    return subprocess.run(
+        [sys.executable, *flags, '-c', BOOT_SCRIPT],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_boot(runs=3):
+    """
+    Boot a fresh worker ``runs`` times. Returns the median wall time
+    (interpreter start included), the median in-process time, and any
+    ``HEAVY_MODULES`` that got imported.
+    """
+    walls, inside, heavy = [], [], set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = _run_boot()
+        walls.append(time.perf_counter() - start)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        inside.append(report['seconds'])
+        heavy.update(report['heavy'])
+    return {
+        'wall_seconds': statistics.median(walls),
+        'boot_seconds': statistics.median(inside),
+        'heavy_modules': sorted(heavy),
+    }
+
+
+def profile_imports():
+    """
+    Per-module import cost of one boot, from ``python -X importtime``.
+    Returns dicts with ``module``, ``self_us``, ``cumulative_us`` and
+    ``depth`` (nesting level; 0 is a top-level import).
+    """
+    result = _run_boot('-X', 'importtime')
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        rows.append({
+            'module': module,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(indent) - 1) // 2,
+        })
+    return rows
+
+
+def package_totals(rows):
+    """Self time summed per top-level package."""
+    totals = {}
+    for row in rows:
+        package = row['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + row['self_us']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
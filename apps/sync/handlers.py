@@ -0,0 +1,16 @@
+"""Outbox handlers that leave tombstones for delta sync (see ``apps.sync.sync``)."""
+from apps.outbox.outbox import handler
+from apps.sync.models import Tombstone
+
+
+@handler('user.deleted')
+def record_deleted_users(batch):
+    """
+    One tombstone per conversation peer, the only clients that synced the
+    user. A redelivered event leaves a second one, dropped as a no-op.
+    """
+    Tombstone.objects.bulk_create([
+        Tombstone(entity='users', key=event.key, peer=peer)
+        for event in batch
+        for peer in event.data.get('peers', ())
+    ])
@@ -0,0 +1,25 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    A deleted record, kept so delta sync can tell one client to drop it;
+    see ``apps.sync.sync``. One row per user who had the record synced.
+    """
+    # Sync entity, e.g. 'users'
+    entity = models.CharField(max_length=50)
+    # The deleted record's id, e.g. a user's public_id
+    key = models.CharField(max_length=100)
+    # public_id of the user whose client drops it; not a foreign key, they may be gone too
+    peer = models.UUIDField(null=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Keyset scan of a user's deletions of an entity since a cursor
+            models.Index(fields=['entity', 'peer', 'deleted_at', 'id'], name='tombstone_sync'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} {self.key} deleted {self.deleted_at:%Y-%m-%d %H:%M} (for {self.peer})"
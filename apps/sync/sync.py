@@ -0,0 +1,202 @@
+"""
+Delta sync for offline-first clients (GET /api/sync/).
+
+A client keeps an opaque cursor holding, for each entity, a high-water
+mark: the ``(timestamp, id)`` of the last row it has. A sync returns the
+rows after each mark, oldest first and at most SYNC_PAGE_SIZE per entity,
+with the cursor to send next; ``has_more`` says another page is ready
+right away. Without a cursor the first sync is a full download.
+
+Every entity is a keyset scan on (timestamp, id):
+
+    WHERE ts >= mark_ts AND (ts > mark_ts OR id > mark_id) AND ts <= horizon
+    ORDER BY ts, id LIMIT n
+
+and before any of them, one query of ``EXISTS`` probes finds which
+entities changed at all, so an empty delta costs that query alone.
+
+A client sees the profile cards (``USER_CARD_FIELDS``) and badges of
+itself and the users it has a conversation with, never anyone else's.
+Their timestamp is ``synced_at``: the later of the row's ``updated_at``
+and the first conversation with that user, so someone who becomes a peer
+after the client's mark is still sent in full.
+
+Rows are served only up to the horizon, SYNC_SETTLE_SECONDS ago.
+``updated_at`` is set when a row is saved, not when its transaction
+commits, so a slow transaction can commit a row older than one a client
+already has; the window lets it land before the marks pass it. For the
+same reason syncs read the primary, never a lagging replica.
+
+Deleted users leave a ``Tombstone`` for each of their peers (from the
+``user.deleted`` outbox event), synced as ``deleted_users`` to those
+peers alone; their badges and activity go with them. Tombstones are kept SYNC_TOMBSTONE_DAYS, so a cursor that has not
+synced for longer raises ``CursorExpired`` and the client starts over.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.listing.pagination import InvalidCursor
+from apps.messaging.models import Participant
+from apps.sync.models import Tombstone
+from apps.user.models import TrustBadge, User, UserActivity
+from apps.user.serializers import BadgeStatusSerializer, UserActivitySerializer, UserCardSerializer
+
+
+class CursorExpired(ValueError):
+    pass
+
+
+class Entity:
+    __slots__ = ('rows', 'field', 'unique_field', 'unique_parse', 'result')
+
+    def __init__(self, rows, field, unique_field, unique_parse, result):
+        # rows(user) -> the queryset of rows this user syncs
+        self.rows = rows
+        self.field = field
+        self.unique_field = unique_field
+        self.unique_parse = unique_parse
+        self.result = result
+
+    def after(self, user, mark, horizon):
+        """This user's rows after ``mark`` and up to ``horizon``, unordered."""
+        rows = self.rows(user).filter(**{f'{self.field}__lte': horizon})
+        value, pk = mark
+        if value is None:
+            return rows
+        if pk is None:
+            # Caught up to a horizon: everything up to it was sent
+            return rows.filter(**{f'{self.field}__gt': value})
+        return rows.filter(
+            Q(**{f'{self.field}__gte': value}),
+            Q(**{f'{self.field}__gt': value}) | Q(**{f'{self.unique_field}__gt': pk}),
+        )
+
+
+def _known(user, rows, user_field):
+    """
+    ``rows`` of ``user`` and their conversation peers, with ``synced_at``
+    (see the module docstring); ``user_field`` is the rows' user id.
+    """
+    peers = Participant.objects.filter(user=user)
+    first_contact = (
+        peers.filter(peer=OuterRef(user_field))
+        .order_by('conversation__created_at')
+        .values('conversation__created_at')[:1]
+    )
+    return (
+        rows.filter(Q(**{user_field: user.pk}) | Q(**{f'{user_field}__in': peers.values('peer')}))
+        # GREATEST skips the NULL of a user without a conversation: the client itself
+        .annotate(synced_at=Greatest('updated_at', Subquery(first_contact)))
+    )
+
+
+def _badge(badge):
+    return {'user': badge.user_id, 'updated_at': badge.updated_at, **BadgeStatusSerializer(badge).data}
+
+
+# Response key -> Entity; a client's cursor has a mark for each
+ENTITIES = {
+    'users': Entity(
+        lambda user: _known(user, User.objects.select_related('badge'), 'pk'),
+        'synced_at', 'public_id', uuid.UUID, lambda row: UserCardSerializer(row).data,
+    ),
+    'badges': Entity(
+        lambda user: _known(user, TrustBadge.objects.all(), 'user_id'),
+        'synced_at', 'id', int, _badge,
+    ),
+    'activity': Entity(
+        lambda user: UserActivity.objects.filter(user=user),
+        'created_at', 'id', int, lambda row: UserActivitySerializer(row).data,
+    ),
+    'deleted_users': Entity(
+        lambda user: Tombstone.objects.filter(entity='users', peer=user.pk),
+        'deleted_at', 'id', int, lambda row: row.key,
+    ),
+}
+
+# Marks of a client starting from nothing: everything, but no past deletions
+INITIAL = {name: (None, None) for name in ENTITIES}
+
+
+def encode_cursor(marks):
+    payload = {
+        name: [value.isoformat(), None if pk is None else str(pk)]
+        for name, (value, pk) in marks.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(token):
+    """Marks from a cursor; entities it predates start from nothing."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        marks = dict(INITIAL)
+        for name, (value, pk) in payload.items():
+            entity = ENTITIES[name]
+            marks[name] = (
+                datetime.fromisoformat(value),
+                None if pk is None else entity.unique_parse(pk),
+            )
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor(token)
+    if any(value is not None and timezone.is_naive(value) for value, _ in marks.values()):
+        raise InvalidCursor(token)
+    return marks
+
+
+def delta(user, token=None):
+    """
+    One page of changes for ``user`` since the cursor ``token``:
+    ``{entity: [results], 'cursor': token, 'has_more': bool}``.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    if token:
+        marks = decode_cursor(token)
+        deleted_mark = marks['deleted_users'][0]
+        if deleted_mark is not None and deleted_mark < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+            raise CursorExpired(token)
+    else:
+        marks = dict(INITIAL)
+        # A full download has nothing to delete
+        marks['deleted_users'] = (horizon, None)
+
+    pending = {name: entity.after(user, marks[name], horizon) for name, entity in ENTITIES.items()}
+    changed = (
+        User.objects.filter(pk=user.pk)
+        .values(**{f'{name}_changed': Exists(rows) for name, rows in pending.items()})
+        .first()
+    ) or {}
+
+    limit = settings.SYNC_PAGE_SIZE
+    result = {'has_more': False}
+    for name, entity in ENTITIES.items():
+        if not changed.get(f'{name}_changed'):
+            result[name] = []
+            marks[name] = (horizon, None)
+            continue
+        # One extra row tells us whether there is more
+        rows = list(pending[name].order_by(entity.field, entity.unique_field)[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            marks[name] = (getattr(last, entity.field), getattr(last, entity.unique_field))
+            result['has_more'] = True
+        else:
+            marks[name] = (horizon, None)
+        result[name] = [entity.result(row) for row in rows]
+    result['cursor'] = encode_cursor(marks)
+    return result
+
+
+def purge_tombstones(days=None):
+    """Delete tombstones older than ``days`` (SYNC_TOMBSTONE_DAYS); returns how many."""
+    days = settings.SYNC_TOMBSTONE_DAYS if days is None else days
+    return Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()[0]
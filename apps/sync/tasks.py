@@ -0,0 +1,7 @@
+from apps.jobs import queue
+from apps.sync import sync
+
+
+@queue.task('sync.purge_tombstones', priority=-10)
+def purge_tombstones():
+    sync.purge_tombstones()
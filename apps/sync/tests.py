@@ -0,0 +1,132 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.messaging import conversations
+from apps.outbox import outbox
+from apps.sync import sync
+from apps.sync.models import Tombstone
+from apps.user.factories import make_user
+from apps.user.models import TrustBadge, UserActivity
+from apps.user.serializers import USER_CARD_FIELDS
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(TestCase):
+    """
+    Delta sync for offline clients (GET /api/sync/). The client sends back
+    the cursor it got and receives only what changed since; an empty delta
+    is one query of EXISTS probes. It sees itself and its conversation
+    peers, nobody else.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.users = [make_user() for _ in range(3)]
+        self.user = self.users[0]
+        self.stranger = make_user('buyer')
+        for peer in self.users[1:]:
+            conversations.start(peer, self.user, 'Hello')
+        UserActivity.objects.create(user=self.user, action_type='login', description='Logged in', metadata={})
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, cursor=None, **headers):
+        response = self.client.get('/api/sync/', {'cursor': cursor} if cursor else {}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return response.data
+
+    def test_first_sync_downloads_everything_then_nothing(self):
+        """Without a cursor the caller's and their peers' cards come down; with it, an empty delta costs one query"""
+        data = self.sync()
+        self.assertEqual({user['id'] for user in data['users']}, {str(user.public_id) for user in self.users})
+        self.assertTrue(all(set(user) == set(USER_CARD_FIELDS) for user in data['users']))
+        self.assertEqual({row['user'] for row in data['badges']}, {user.public_id for user in self.users})
+        self.assertEqual([row['description'] for row in data['activity']], ['Logged in'])
+        self.assertEqual(data['deleted_users'], [])
+        self.assertFalse(data['has_more'])
+
+        with self.assertNumQueries(1):
+            again = self.sync(data['cursor'])
+        self.assertEqual([again[name] for name in ('users', 'badges', 'activity', 'deleted_users')], [[]] * 4)
+
+    def test_only_changes_since_the_cursor_come_down(self):
+        """A saved peer, a new badge level and new activity are all that is sent"""
+        cursor = self.sync()['cursor']
+        self.users[1].first_name = 'Renamed'
+        self.users[1].save()
+        badge = TrustBadge.objects.get(user=self.users[2])
+        badge.transaction_count, badge.average_rating = 6, Decimal('4.1')
+        badge.calculate_badge_level()
+        UserActivity.objects.create(user=self.user, action_type='profile_update', description='Updated', metadata={})
+        # Someone else's activity isn't theirs to sync, nor a stranger's profile
+        UserActivity.objects.create(user=self.users[1], action_type='login', description='Other', metadata={})
+        self.stranger.first_name = 'Stranger'
+        self.stranger.save()
+
+        data = self.sync(cursor)
+        self.assertEqual(
+            [(user['id'], user['first_name']) for user in data['users']],
+            [(str(self.users[1].public_id), 'Renamed')]
+        )
+        self.assertEqual([(row['user'], row['badge_level']) for row in data['badges']], [(self.users[2].public_id, 'bronze')])
+        self.assertEqual([row['description'] for row in data['activity']], ['Updated'])
+
+        # Within the settle window a change waits for the next sync
+        with override_settings(SYNC_SETTLE_SECONDS=60):
+            cursor = data['cursor']
+            self.users[1].first_name = 'Again'
+            self.users[1].save()
+            self.assertEqual(self.sync(cursor)['users'], [])
+
+    def test_new_peer_comes_down_in_full(self):
+        """A user met after the cursor is sent though their profile is older than it"""
+        cursor = self.sync()['cursor']
+        conversations.start(self.stranger, self.user, 'Is the maize still for sale?')
+
+        data = self.sync(cursor)
+
+        self.assertEqual([user['id'] for user in data['users']], [str(self.stranger.public_id)])
+        self.assertEqual([row['user'] for row in data['badges']], [self.stranger.public_id])
+
+    def test_pages_resume_where_they_stopped(self):
+        """With more changes than a page holds, has_more pages through them once each"""
+        seen, cursor = [], None
+        with override_settings(SYNC_PAGE_SIZE=2):
+            while True:
+                data = self.sync(cursor)
+                self.assertLessEqual(len(data['users']), 2)
+                seen += [user['id'] for user in data['users']]
+                cursor = data['cursor']
+                if not data['has_more']:
+                    break
+        self.assertEqual(sorted(seen), sorted(str(user.public_id) for user in self.users))
+
+    def test_deletions_cursors_and_compression(self):
+        """Deleted peers come down as tombstones; bad or expired cursors are refused; responses are gzipped"""
+        conversations.start(self.stranger, self.users[1], 'Hello')
+        cursor = self.sync()['cursor']
+        gone, stranger = self.users[2].public_id, self.stranger.public_id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[2].delete()
+            self.stranger.delete()
+            outbox.dispatch()
+        self.assertEqual(
+            set(Tombstone.objects.values_list('key', 'peer')),
+            {(str(gone), self.user.public_id), (str(stranger), self.users[1].public_id)}
+        )
+        # The stranger's deletion is only for the peer who knew them
+        self.assertEqual(self.sync(cursor)['deleted_users'], [str(gone)])
+
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': 'nope'}).status_code, status.HTTP_400_BAD_REQUEST)
+        old = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1)
+        expired = sync.encode_cursor({name: (old, None) for name in sync.ENTITIES})
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': expired}).status_code, status.HTTP_410_GONE)
+
+        response = self.client.get('/api/sync/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(sync.purge_tombstones(days=0), 2)
@@ -0,0 +1,30 @@
+from django.views.decorators.gzip import gzip_page
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.listing.pagination import InvalidCursor
+from apps.sync import sync
+
+
+@gzip_page
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def delta(request):
+    """
+    GET /api/sync/?cursor=<cursor> - profile cards and badges of the caller
+    and their conversation peers, the caller's activity and deleted users
+    changed since the cursor (all of them without one), gzipped.
+    Call again with the returned cursor while ``has_more`` is true.
+    """
+    try:
+        data = sync.delta(request.user, request.query_params.get('cursor'))
+    except sync.CursorExpired:
+        return Response(
+            {"error": {"cursor": ["Cursor expired; sync again without one"]}},
+            status=status.HTTP_410_GONE
+        )
+    except InvalidCursor:
+        return Response({"error": {"cursor": ["Invalid cursor"]}}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data, status=status.HTTP_200_OK)
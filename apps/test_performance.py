@@ -0,0 +1,742 @@
+"""
+NaijaShield Performance Budget Tests
+====================================
+
+Guards the API against performance regressions. For every endpoint we check:
+
+1. Query budget - the exact number of SQL queries one request makes
+   (a stray lazy `obj.badge` in a serializer turns 1 query into N+1)
+2. Latency ceiling - the p95 wall time over several requests
+
+Data is seeded in bulk once per class: a few hundred users spread around
+Nigerian cities with a realistic role mix, their trust badges, produce
+listings for the sellers, and an activity history and 10k conversations
+for the user making the requests.
+
+After the run a JSON report is written (PERF_REPORT_PATH, default
+`perf_report.json` in the project root). Point PERF_BASELINE at a previous
+report to get per-endpoint deltas in the new one.
+
+If a budget changes on purpose (e.g. a new query for a new feature),
+update QUERY_BUDGETS in the same commit - that is the point of the suite.
+
+HOW TO RUN:
+    python manage.py test apps.test_performance
+
+    # Slower CI machine: scale every latency ceiling
+    PERF_BUDGET_SCALE=2 python manage.py test apps.test_performance
+"""
+import asyncio
+import gc
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.gis.geos import Point
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps import events
+from apps.cache import tiered_cache
+from apps.jobs import queue
+from apps.jobs.models import Job
+from apps.jobs.worker import Worker
+from apps.listing import facets
+from apps.listing.models import Listing
+from apps.matching import engine
+from apps.matching.models import Demand
+from apps.messaging.models import Conversation, Inbox, Participant
+from apps.prices.models import PriceRollup
+from apps.startup import measure_boot
+from apps.user.models import TrustBadge, User, UserActivity
+
+# Exact number of queries per request
+QUERY_BUDGETS = {
+    'users': 1,                  # users + badges in one JOIN
+    'user': 1,                   # cold: user + badge
+    'user_warm': 0,              # served from cache
+    'user_not_modified': 0,      # If-None-Match checked against the cached version
+    'user_not_modified_cold': 1, # one narrow updated_at query, nothing serialized
+    'me_not_modified': 1,        # auth only: the version is on the loaded user
+    'users_batch': 2,            # auth, the 100 users + badges in one query
+    'users_batch_warm': 1,       # auth only: every card cached
+    'search_users': 3,           # auth, count, page
+    'search_users_geo': 3,
+    'search_users_warm': 1,      # auth only
+    'badge_status': 1,           # auth loads the badge too
+    'user_activity': 3,          # auth, count, page
+    'dashboard': 4,              # auth, active listing count, this week's view counters, unread counter
+    'search_listings': 1,        # one keyset page, owners + badges JOINed
+    'search_listings_geo': 1,
+    'listing_detail': 1,
+    'listing_facets': 1,         # one read of the facet count table
+    'listing_facets_warm': 0,    # cached per normalized query
+    'listing_facets_geo': 6,     # per facet: bounded COUNT, then GROUP BY
+    'price_series': 1,           # one range scan of the rollups
+    'price_series_warm': 0,      # cached per query
+    'demand_matches': 3,         # auth, demand, matches with listings + sellers JOINed
+    'inbox': 2,                  # auth, one keyset page with peers + badges JOINed
+    'login_user': 4,             # user, outstanding token, badge, activity log
+    'update_profile': 4,         # auth, user UPDATE, outbox INSERT, activity log
+    'sync': 5,                   # auth, EXISTS probes, cards + badges, badges, own activity
+    'sync_empty': 2,             # auth, EXISTS probes
+    'update_profile_unchanged': 2,  # auth, activity log: nothing changed, nothing written
+}
+
+# p95 ceilings in milliseconds (cold cache); PERF_BUDGET_SCALE multiplies them
+LATENCY_CEILINGS_MS = {
+    'users': 400,
+    'user': 100,
+    'users_batch': 150,
+    'search_users': 150,
+    'search_users_geo': 150,
+    'badge_status': 100,
+    'user_activity': 150,
+    'dashboard': 100,
+    'search_listings': 100,
+    'search_listings_geo': 100,
+    'listing_detail': 100,
+    'listing_facets': 100,
+    'listing_facets_geo': 150,
+    'price_series': 100,
+    'demand_matches': 100,
+    'inbox': 100,
+    # PBKDF2 with Django's default iteration count dominates login
+    'login_user': 1500,
+    'update_profile': 150,
+    # A full first page: the caller's and their peers' cards and badges
+    'sync': 400,
+}
+
+# Idle live-event streams held by one process, opened through the ASGI
+# handler, and what each may cost: a whole request, with its user, the
+# response and the stream coroutine
+SOAK_SUBSCRIBERS = 2_000
+SOAK_USERS = 20
+IDLE_STREAM_BUDGET_BYTES = 48 * 1024
+FANOUT_CEILING_MS = 1000
+# Streams connecting at once; each has a thread and a connection until its first frame
+SOAK_CONNECT_CONCURRENCY = 50
+
+# Background job throughput: no-op jobs drained by one multi-threaded worker
+JOB_BENCH_JOBS = 20_000
+JOB_BENCH_THREADS = 4
+JOB_BENCH_BATCH = 100
+JOBS_PER_SECOND_FLOOR = 2000
+
+# Profile cards per POST /api/users/batch/ (a chat list or feed page)
+BATCH_USERS = 100
+
+SAMPLES = 20
+LOGIN_SAMPLES = 5
+
+# (city, lat, lng, share of users)
+CITIES = [
+    ('Lagos', 6.5244, 3.3792, 0.25),
+    ('Kano', 12.0022, 8.5920, 0.15),
+    ('Ibadan', 7.3775, 3.9470, 0.12),
+    ('Abuja', 9.0765, 7.3986, 0.10),
+    ('Jos', 9.8965, 8.8583, 0.10),
+    ('Kaduna', 10.5105, 7.4165, 0.10),
+    ('Enugu', 6.4584, 7.5464, 0.09),
+    ('Port Harcourt', 4.8156, 7.0498, 0.09),
+]
+ROLES = [('farmer', 0.6), ('buyer', 0.25), ('co-ops', 0.15)]
+SEED_USERS = 300
+SEED_ACTIVITIES = 40
+SEED_LISTINGS_PER_SELLER = 4
+SEED_PRICE_DAYS = 730
+SEED_CONVERSATIONS = 10_000
+PRODUCE = [
+    ('grains', 'Maize', 'bag', 38000),
+    ('tubers', 'Yam', 'tuber', 2500),
+    ('vegetables', 'Tomatoes', 'basket', 25000),
+    ('legumes', 'Beans', 'bag', 95000),
+    ('poultry', 'Eggs', 'crate', 5500),
+]
+
+RESULTS = {}
+
+
+def seed(rng, password_hash):
+    """Bulk-create users and their badges, sharing one precomputed password hash."""
+    users = []
+    for i in range(SEED_USERS):
+        city, lat, lng, _ = rng.choices(CITIES, weights=[c[3] for c in CITIES])[0]
+        role = rng.choices([r[0] for r in ROLES], weights=[r[1] for r in ROLES])[0]
+        complete = rng.random() < 0.6
+        users.append(User(
+            email=f'seed{i}@naijashield.test',
+            phone_number=f'+23480{i:08d}',
+            password=password_hash,
+            first_name=rng.choice(['Chinedu', 'Aisha', 'Tunde', 'Ngozi', 'Ibrahim', 'Funke', 'Emeka', 'Zainab']),
+            last_name=rng.choice(['Okafor', 'Bello', 'Adeyemi', 'Eze', 'Musa', 'Olawale', 'Nwosu', 'Abubakar']),
+            role=role,
+            location=Point(lng + rng.gauss(0, 0.15), lat + rng.gauss(0, 0.15), srid=4326) if complete else None,
+            location_text=city if complete else None,
+            farm_size=round(rng.uniform(0.5, 50), 2) if role == 'farmer' and complete else None,
+            business_name=f'{city} Produce Ltd' if role != 'farmer' and complete else None,
+            bio='Fresh produce, fair prices.' if complete else None,
+        ))
+    User.objects.bulk_create(users)
+    TrustBadge.objects.bulk_create([
+        TrustBadge(
+            user=u,
+            transaction_count=rng.randint(0, 120),
+            badge_level=rng.choice(['new_user', 'bronze', 'silver', 'gold', 'diamond']),
+        )
+        for u in users
+    ])
+    Listing.objects.bulk_create([
+        Listing(
+            owner=u,
+            title=title,
+            category=category,
+            quantity=rng.randint(1, 100),
+            unit=unit,
+            price=round(price * rng.uniform(0.7, 1.4), -1),
+            location=Point(rng.uniform(3.0, 9.0), rng.uniform(4.5, 12.5), srid=4326),
+            state=rng.choice(['lagos', 'kano', 'oyo', 'fct', 'plateau', 'kaduna', 'enugu', 'rivers']),
+            status=rng.choice(['active', 'active', 'active', 'sold']),
+        )
+        for u in users if u.role in Listing.SELLER_ROLES
+        for category, title, unit, price in rng.sample(PRODUCE, SEED_LISTINGS_PER_SELLER)
+    ])
+    # bulk_create skips the signals that keep facet counts
+    facets.rebuild()
+    start = date(2023, 1, 1)
+    PriceRollup.objects.bulk_create([
+        PriceRollup(
+            commodity='maize', unit='bag', state='', period='day',
+            period_start=start + timedelta(days=i),
+            median=round(38000 * rng.uniform(0.9, 1.1), -1), p10=32000, p90=45000,
+            volume=rng.randint(50, 500), observations=rng.randint(5, 50),
+        )
+        for i in range(SEED_PRICE_DAYS)
+    ])
+    return users
+
+
+def seed_inbox(rng, user, peers):
+    """SEED_CONVERSATIONS conversations for ``user``, one message apart, some unread."""
+    start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    conversations = Conversation.objects.bulk_create([
+        Conversation(
+            key=f'seed:{i}',
+            last_message='Is this still available?',
+            last_sender=peers[i % len(peers)],
+            last_message_at=start + timedelta(minutes=i),
+        )
+        for i in range(SEED_CONVERSATIONS)
+    ])
+    participants = []
+    for conversation in conversations:
+        peer = conversation.last_sender
+        participants += [
+            Participant(conversation=conversation, user=user, peer=peer,
+                        unread=rng.choice([0, 0, 0, 1, 3]), last_message_at=conversation.last_message_at),
+            Participant(conversation=conversation, user=peer, peer=user, last_message_at=conversation.last_message_at),
+        ]
+    Participant.objects.bulk_create(participants, batch_size=5000)
+    Inbox.objects.create(user=user, unread=sum(p.unread for p in participants if p.user_id == user.pk))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def clear_caches():
+    tiered_cache.clear()
+    cache.clear()
+
+
+# Buffered listing views are never flushed mid-measurement
+@override_settings(PERF_SLOW_REQUEST_MS=10 ** 9, PERF_SAMPLE_RATE=0.0, VIEW_FLUSH_SECONDS=10 ** 9)
+class EndpointPerformanceTests(TestCase):
+    """
+    Query budgets and p95 latency ceilings for every API endpoint
+
+    LEARNING: setUpTestData runs once per class (not per test), so the
+    bulk seed is paid only once
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        password_hash = make_password('testpass123')
+        users = seed(rng, password_hash)
+
+        cls.farmer = User.objects.create_user(
+            email='perf-farmer@test.com',
+            phone_number='08099990000',
+            password='testpass123',
+            first_name='Perf',
+            last_name='Farmer',
+            role='farmer',
+            location=Point(3.3792, 6.5244, srid=4326),
+            location_text='Lagos'
+        )
+        cls.buyer = User.objects.create_user(
+            email='perf-buyer@test.com',
+            phone_number='08099990001',
+            password='testpass123',
+            first_name='Perf',
+            last_name='Buyer',
+            role='buyer',
+        )
+        cls.demand = Demand.objects.create(
+            buyer=cls.buyer, commodity='maize', category='grains', quantity=40, unit='bag',
+            location=Point(3.3792, 6.5244, srid=4326), radius_km=500,
+        )
+        engine.match_demand(cls.demand)
+        seed_inbox(rng, cls.farmer, users)
+        UserActivity.objects.bulk_create([
+            UserActivity(
+                user=cls.farmer,
+                action_type=rng.choice([UserActivity.ActionTypes.LOGIN, UserActivity.ActionTypes.PROFILE_UPDATE]),
+                description='Seeded activity',
+                metadata={},
+            )
+            for _ in range(SEED_ACTIVITIES)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        token = AccessToken.for_user(self.farmer)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        clear_caches()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        write_report()
+
+    # ----------------------------- helpers ----------------------------- #
+    def request(self, method, url, data=None, auth=True, headers=None):
+        headers = {**(self.auth if auth else {}), **(headers or {})}
+        return getattr(self.client, method)(url, data, format='json' if method != 'get' else None, **headers)
+
+    def assert_query_budget(self, name, method, url, data=None, auth=True, headers=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request(method, url, data, auth, headers)
+        self.assertLess(response.status_code, 400, response.content)
+
+        budget = QUERY_BUDGETS[name]
+        RESULTS.setdefault(name, {}).update({'queries': len(queries), 'query_budget': budget})
+        self.assertEqual(
+            len(queries), budget,
+            f"{name}: {len(queries)} queries, budget {budget}:\n"
+            + "\n".join(q['sql'] for q in queries.captured_queries)
+        )
+
+    def assert_latency(self, name, method, url, data=None, auth=True, samples=SAMPLES):
+        timings = []
+        for _ in range(samples):
+            clear_caches()
+            start = time.perf_counter()
+            response = self.request(method, url, data, auth)
+            timings.append((time.perf_counter() - start) * 1000)
+            self.assertLess(response.status_code, 400, response.content)
+
+        p50, p95 = percentile(timings, 50), percentile(timings, 95)
+        ceiling = LATENCY_CEILINGS_MS[name] * float(os.environ.get('PERF_BUDGET_SCALE', 1))
+        RESULTS.setdefault(name, {}).update({
+            'samples': samples,
+            'p50_ms': round(p50, 2),
+            'p95_ms': round(p95, 2),
+            'p95_ceiling_ms': ceiling,
+        })
+        self.assertLessEqual(p95, ceiling, f"{name}: p95 {p95:.1f} ms exceeds {ceiling} ms")
+
+    # ------------------------------ tests ------------------------------ #
+    def test_users(self):
+        """GET /api/users/ - every user with their badge in one query"""
+        self.assert_query_budget('users', 'get', '/api/users/', auth=False)
+        self.assert_latency('users', 'get', '/api/users/', auth=False)
+
+    def test_user(self):
+        """GET /api/users/<public_id>/ - cold then cached"""
+        url = f'/api/users/{self.farmer.public_id}/'
+        self.assert_query_budget('user', 'get', url, auth=False)
+        self.assert_query_budget('user_warm', 'get', url, auth=False)
+        self.assert_latency('user', 'get', url, auth=False)
+
+    def test_user_not_modified(self):
+        """GET /api/users/<public_id>/ and /api/auth/me/ with a current ETag - 304s"""
+        url = f'/api/users/{self.farmer.public_id}/'
+        etag = {'HTTP_IF_NONE_MATCH': self.request('get', url, auth=False)['ETag']}
+        self.assert_query_budget('user_not_modified', 'get', url, auth=False, headers=etag)
+        clear_caches()
+        self.assert_query_budget('user_not_modified_cold', 'get', url, auth=False, headers=etag)
+
+        etag = {'HTTP_IF_NONE_MATCH': self.request('get', '/api/auth/me/')['ETag']}
+        self.assert_query_budget('me_not_modified', 'get', '/api/auth/me/', headers=etag)
+
+    def test_users_batch(self):
+        """POST /api/users/batch/ - 100 profile cards, cold then cached"""
+        ids = [str(pk) for pk in User.objects.order_by('?').values_list('public_id', flat=True)[:BATCH_USERS]]
+        data = {'ids': ids}
+        self.assert_query_budget('users_batch', 'post', '/api/users/batch/', data)
+        self.assert_query_budget('users_batch_warm', 'post', '/api/users/batch/', data)
+        self.assert_latency('users_batch', 'post', '/api/users/batch/', data)
+
+    def test_search_users(self):
+        """GET /api/users/search/ - by role, then cached"""
+        url = '/api/users/search/?role=farmer'
+        self.assert_query_budget('search_users', 'get', url)
+        self.assert_query_budget('search_users_warm', 'get', url)
+        self.assert_latency('search_users', 'get', url)
+
+    def test_search_users_geo(self):
+        """GET /api/users/search/ - within 50 km of Lagos, ordered by distance"""
+        url = '/api/users/search/?location_lat=6.5244&location_lng=3.3792&radius=50'
+        self.assert_query_budget('search_users_geo', 'get', url)
+        self.assert_latency('search_users_geo', 'get', url)
+
+    def test_badge_status(self):
+        """GET /api/users/badge-status/"""
+        self.assert_query_budget('badge_status', 'get', '/api/users/badge-status/')
+        self.assert_latency('badge_status', 'get', '/api/users/badge-status/')
+
+    def test_user_activity(self):
+        """GET /api/users/activity/"""
+        self.assert_query_budget('user_activity', 'get', '/api/users/activity/')
+        self.assert_latency('user_activity', 'get', '/api/users/activity/')
+
+    def test_dashboard(self):
+        """GET /api/dashboard/stats/"""
+        self.assert_query_budget('dashboard', 'get', '/api/dashboard/stats/')
+        self.assert_latency('dashboard', 'get', '/api/dashboard/stats/')
+
+    def test_search_listings(self):
+        """GET /api/listings/search/ - category + price range, cheapest first, then page 2"""
+        url = '/api/listings/search/?category=grains&min_price=20000&max_price=60000&sort=price'
+        self.assert_query_budget('search_listings', 'get', url, auth=False)
+        self.assert_latency('search_listings', 'get', url, auth=False)
+
+        next_url = self.client.get(url, {'page_size': 5}).json()['next']
+        self.assertIsNotNone(next_url)
+        self.assert_query_budget('search_listings', 'get', next_url, auth=False)
+
+    def test_search_listings_geo(self):
+        """GET /api/listings/search/ - within 100 km of Lagos, nearest first"""
+        url = '/api/listings/search/?location_lat=6.5244&location_lng=3.3792&radius=100'
+        self.assert_query_budget('search_listings_geo', 'get', url, auth=False)
+        self.assert_latency('search_listings_geo', 'get', url, auth=False)
+
+    def test_listing_facets(self):
+        """GET /api/listings/facets/ - from the count table, then cached"""
+        url = '/api/listings/facets/?category=grains&state=lagos'
+        self.assert_query_budget('listing_facets', 'get', url, auth=False)
+        self.assert_query_budget('listing_facets_warm', 'get', url, auth=False)
+        self.assert_latency('listing_facets', 'get', url, auth=False)
+
+    def test_listing_facets_geo(self):
+        """GET /api/listings/facets/ - within 100 km of Lagos: exact counts over a small set"""
+        url = '/api/listings/facets/?location_lat=6.5244&location_lng=3.3792&radius=100'
+        self.assert_query_budget('listing_facets_geo', 'get', url, auth=False)
+        self.assert_latency('listing_facets_geo', 'get', url, auth=False)
+
+    def test_price_series(self):
+        """GET /api/prices/ - two years of daily maize prices, downsampled to 120 points"""
+        url = '/api/prices/?commodity=maize&unit=bag&period=day&start=2023-01-01&end=2024-12-31'
+        self.assert_query_budget('price_series', 'get', url, auth=False)
+        self.assert_query_budget('price_series_warm', 'get', url, auth=False)
+        self.assert_latency('price_series', 'get', url, auth=False)
+
+    def test_demand_matches(self):
+        """GET /api/matching/demands/<public_id>/matches/"""
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.buyer)}'}
+        url = f'/api/matching/demands/{self.demand.public_id}/matches/'
+        self.assert_query_budget('demand_matches', 'get', url)
+        self.assert_latency('demand_matches', 'get', url)
+
+    def test_inbox(self):
+        """GET /api/messages/ - a page of 10k conversations, most recent first, then page 2"""
+        self.assert_query_budget('inbox', 'get', '/api/messages/')
+        self.assert_latency('inbox', 'get', '/api/messages/')
+
+        next_url = self.request('get', '/api/messages/').json()['next']
+        self.assertIsNotNone(next_url)
+        self.assert_query_budget('inbox', 'get', next_url)
+
+    def test_listing_detail(self):
+        """GET /api/listings/<public_id>/"""
+        listing = Listing.objects.filter(status='active').first()
+        url = f'/api/listings/{listing.public_id}/'
+        self.assert_query_budget('listing_detail', 'get', url, auth=False)
+        self.assert_latency('listing_detail', 'get', url, auth=False)
+
+    def test_login_user(self):
+        """POST /api/auth/login/"""
+        data = {'email': 'perf-farmer@test.com', 'password': 'testpass123'}
+        self.assert_query_budget('login_user', 'post', '/api/auth/login/', data, auth=False)
+        self.assert_latency('login_user', 'post', '/api/auth/login/', data, auth=False, samples=LOGIN_SAMPLES)
+
+    def test_sync(self):
+        """GET /api/sync/ - a full first download, then an empty delta"""
+        with self.settings(SYNC_SETTLE_SECONDS=0):
+            self.assert_query_budget('sync', 'get', '/api/sync/')
+            cursor = self.request('get', '/api/sync/').data['cursor']
+            self.assert_query_budget('sync_empty', 'get', f'/api/sync/?cursor={cursor}')
+            self.assert_latency('sync', 'get', '/api/sync/')
+
+    def test_update_profile(self):
+        """PATCH /api/auth/profile/"""
+        data = {'bio': 'Tomatoes and peppers from Epe', 'location_text': 'Epe, Lagos'}
+        self.assert_query_budget('update_profile', 'patch', '/api/auth/profile/', data)
+        self.assert_query_budget('update_profile_unchanged', 'patch', '/api/auth/profile/', data)
+        self.assert_latency('update_profile', 'patch', '/api/auth/profile/', data)
+
+
+class StartupTimeTests(SimpleTestCase):
+    """
+    Worker boot time and imports
+
+    LEARNING: the boot runs in a fresh interpreter, so modules this test
+    process already imported can't hide a slow import
+    """
+
+    def test_boot_within_budget_without_heavy_imports(self):
+        """Settings, apps, middleware and URLconf load fast and skip ML/dataframe packages"""
+        boot = measure_boot(runs=3)
+        budget = settings.STARTUP_BUDGET_SECONDS * float(os.environ.get('PERF_BUDGET_SCALE', 1))
+        RESULTS['startup'] = {
+            'wall_seconds': round(boot['wall_seconds'], 3),
+            'boot_seconds': round(boot['boot_seconds'], 3),
+            'budget_seconds': budget,
+        }
+
+        self.assertEqual(boot['heavy_modules'], [])
+        self.assertLessEqual(boot['wall_seconds'], budget)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        write_report()
+
+
+@override_settings(
+    EVENTS_BROKER='local', EVENTS_KEEPALIVE_SECONDS=60, PERF_SAMPLE_RATE=0.0, PERF_SLOW_REQUEST_MS=10 ** 9
+)
+class EventStreamSoakTests(TransactionTestCase):
+    """
+    Idle live-event streams
+
+    Streams are opened through the ASGI handler with real tokens, as a
+    server would. TransactionTestCase commits the users, so the handler's
+    per-request threads can authenticate them on their own connections.
+    """
+
+    def test_idle_streams_hold_no_threads_or_connections(self):
+        """2k idle streams in one process: KiB each, no threads or connections, one publish per user reaches all"""
+        password_hash = make_password('testpass123')
+        users = User.objects.bulk_create([
+            User(email=f'soak{i}@naijashield.test', phone_number=f'+23481{i:08d}', password=password_hash,
+                 first_name='Soak', last_name=str(i), role='buyer')
+            for i in range(SOAK_USERS)
+        ])
+
+        result = asyncio.run(soak_streams(users, SOAK_SUBSCRIBERS))
+        ceiling = FANOUT_CEILING_MS * float(os.environ.get('PERF_BUDGET_SCALE', 1))
+        RESULTS['event_streams'] = {
+            'subscribers': SOAK_SUBSCRIBERS,
+            'bytes_per_stream': round(result['bytes_per_stream']),
+            'bytes_budget': IDLE_STREAM_BUDGET_BYTES,
+            'extra_threads': result['extra_threads'],
+            'extra_db_connections': result['extra_connections'],
+            'fanout_ms': round(result['fanout_ms'], 2),
+            'fanout_ceiling_ms': ceiling,
+        }
+
+        self.assertEqual((result['open'], result['errors']), (SOAK_SUBSCRIBERS, 0))
+        self.assertLessEqual(result['bytes_per_stream'], IDLE_STREAM_BUDGET_BYTES)
+        self.assertLessEqual(result['extra_threads'], 0)
+        self.assertLessEqual(result['extra_connections'], 0)
+        self.assertLessEqual(result['fanout_ms'], ceiling)
+        self.assertEqual(result['left_open'], 0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        write_report()
+
+
+class JobQueueThroughputTests(TransactionTestCase):
+    """
+    Background job queue throughput
+
+    LEARNING: TransactionTestCase really commits, so the worker threads,
+    each on its own connection, race for the same rows as in production
+    """
+
+    def test_workers_drain_thousands_of_jobs_per_second(self):
+        """20k no-op jobs, 4 threads on SKIP LOCKED: every job runs once, thousands per second"""
+        started = time.perf_counter()
+        queue.enqueue_many('jobs.noop', [{'n': i} for i in range(JOB_BENCH_JOBS)], queue='bench')
+        enqueue_s = time.perf_counter() - started
+
+        worker = Worker(queues=['bench'], concurrency=JOB_BENCH_THREADS, batch_size=JOB_BENCH_BATCH, burst=True)
+        started = time.perf_counter()
+        worker.run()
+        run_s = time.perf_counter() - started
+
+        floor = JOBS_PER_SECOND_FLOOR / float(os.environ.get('PERF_BUDGET_SCALE', 1))
+        RESULTS['job_queue'] = {
+            'jobs': JOB_BENCH_JOBS,
+            'threads': JOB_BENCH_THREADS,
+            'enqueue_per_second': round(JOB_BENCH_JOBS / enqueue_s),
+            'jobs_per_second': round(worker.done / run_s),
+            'jobs_per_second_floor': floor,
+        }
+
+        # A job taken by two workers would be counted twice
+        self.assertEqual(worker.done, JOB_BENCH_JOBS)
+        self.assertEqual(Job.objects.filter(queue='bench', status=Job.Status.DONE).count(), JOB_BENCH_JOBS)
+        self.assertGreaterEqual(worker.done / run_s, floor)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        write_report()
+
+
+def open_connections():
+    """Connections to the test database (pg_stat_activity); closes its own."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def stream_scope(token):
+    """ASGI scope of a browser's EventSource request for the live event stream."""
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': '/api/async/events/',
+        'raw_path': b'/api/async/events/',
+        'query_string': f'token={token}'.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'accept', b'text/event-stream')],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+async def soak_streams(users, total):
+    """
+    Open ``total`` idle streams for ``users`` through the ASGI handler,
+    measure what they hold, then publish to every user once.
+    """
+    application = get_asgi_application()
+    tokens = [str(AccessToken.for_user(user)) for user in users]
+    connecting = asyncio.Semaphore(SOAK_CONNECT_CONCURRENCY)
+    disconnect = asyncio.Event()
+    counts = {'open': 0, 'errors': 0, 'received': 0}
+
+    async def connection(token):
+        responded = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                counts['open' if message['status'] == 200 else 'errors'] += 1
+            elif message['type'] == 'http.response.body':
+                responded.set()
+                if message.get('body', b'').startswith(b'event: stats'):
+                    counts['received'] += 1
+
+        async with connecting:
+            task = asyncio.create_task(application(stream_scope(token), receive, send))
+            await responded.wait()
+        await task
+
+    count_connections = sync_to_async(open_connections, thread_sensitive=False)
+    connections_before = await count_connections()
+    threads_before = threading.active_count()
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tasks = [asyncio.create_task(connection(tokens[i % len(tokens)])) for i in range(total)]
+    while counts['open'] + counts['errors'] < total:
+        await asyncio.sleep(0.01)
+    # Let the threads the streams gave back exit
+    await asyncio.sleep(0.5)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    open_streams = len(events.hub)
+    threads_idle = threading.active_count()
+    connections_idle = await count_connections()
+
+    start = time.perf_counter()
+    broker = events.get_broker()
+    for user in users:
+        broker.send(user.pk, events.encode('stats', {'messages_unread': 1}))
+    while counts['received'] < counts['open']:
+        await asyncio.sleep(0.001)
+    fanout_ms = (time.perf_counter() - start) * 1000
+
+    disconnect.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        'open': open_streams,
+        'errors': counts['errors'],
+        'bytes_per_stream': held / total,
+        'extra_threads': threads_idle - threads_before,
+        'extra_connections': connections_idle - connections_before,
+        'fanout_ms': fanout_ms,
+        'left_open': len(events.hub),
+    }
+
+
+def write_report():
+    """Write RESULTS as JSON, with deltas against PERF_BASELINE if given."""
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'seed_users': SEED_USERS,
+        'endpoints': RESULTS,
+    }
+
+    baseline_path = os.environ.get('PERF_BASELINE')
+    if baseline_path and Path(baseline_path).exists():
+        baseline = json.loads(Path(baseline_path).read_text())['endpoints']
+        for name, result in RESULTS.items():
+            previous = baseline.get(name, {})
+            if 'p95_ms' in result and previous.get('p95_ms'):
+                result['baseline_p95_ms'] = previous['p95_ms']
+                result['p95_delta_pct'] = round((result['p95_ms'] / previous['p95_ms'] - 1) * 100, 1)
+            if 'queries' in previous:
+                result['baseline_queries'] = previous['queries']
+
+    path = Path(os.environ.get('PERF_REPORT_PATH', settings.BASE_DIR / 'perf_report.json'))
+    path.write_text(json.dumps(report, indent=2, sort_keys=True))
@@ -21,4 +21,9 @@ urlpatterns = [
     path('users/', include('apps.user.urls')),
     path('auth/', include('apps.auth.urls')),
     path('dashboard/', include('apps.dashboard.urls')),
+    path('listings/', include('apps.listing.urls')),
+    path('prices/', include('apps.prices.urls')),
+    path('matching/', include('apps.matching.urls')),
+    path('messages/', include('apps.messaging.urls')),
+    path('sync/', include('apps.sync.urls')),
 ]
@@ -5,3 +5,7 @@ class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.user'
     # label = 'app_user'
+
+    def ready(self):
+        # Register the TrustBadge post_save receivers
+        from apps.user import signals  # noqa: F401
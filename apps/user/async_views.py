@@ -0,0 +1,118 @@
+"""
+Async (ASGI) variants of the hot read endpoints in ``apps.user.views``.
+
+They return the same payloads as their sync counterparts but use the
+async ORM, so a worker can keep many requests in flight while each one
+waits on the database. CPU-bound serialization runs in a thread pool.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.auth.authentication import async_jwt_required
+from apps.instrumentation import timed
+from apps.routers import replica_reads
+from apps.user.models import TrustBadge, User
+from apps.user.serializers import UserSerializer
+from apps.user.views import (
+    UserSearchPagination,
+    build_badge_status,
+    build_search_queryset,
+    search_result,
+)
+
+
+def api_response(data, status_code=status.HTTP_200_OK):
+    """JSON response using DRF's encoder (UUIDs, Decimals, datetimes, points)."""
+    return JsonResponse(data, status=status_code, encoder=JSONEncoder, safe=False)
+
+
+def _serialize_user(user):
+    with timed('serializer'):
+        return UserSerializer(user).data
+
+
+async def serialize_user(user):
+    """Run UserSerializer off the event loop."""
+    return await sync_to_async(_serialize_user, thread_sensitive=False)(user)
+
+
+async def apaginate(request, queryset, pagination_class=UserSearchPagination):
+    """
+    Async page-number pagination mirroring DRF's PageNumberPagination.
+    Returns ``(page, count, next_url, previous_url)`` or ``None`` for an invalid page.
+    """
+    page_size = pagination_class.page_size
+    try:
+        requested = int(request.GET.get(pagination_class.page_size_query_param, page_size))
+        if requested > 0:
+            page_size = min(requested, pagination_class.max_page_size)
+    except ValueError:
+        pass
+
+    try:
+        page_number = int(request.GET.get('page', 1))
+    except ValueError:
+        return None
+
+    count = await queryset.acount()
+    offset = (page_number - 1) * page_size
+    if page_number < 1 or (offset >= count and page_number != 1):
+        return None
+
+    page = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page_number + 1) if offset + page_size < count else None
+    if page_number <= 1:
+        previous_url = None
+    elif page_number == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page_number - 1)
+    return page, count, next_url, previous_url
+
+
+@require_GET
+@replica_reads
+async def user_async(request, public_id):
+    user = await User.objects.select_related('badge').filter(public_id=public_id).afirst()
+    if user is None:
+        return api_response({"detail": "No User matches the given query."}, status_code=status.HTTP_404_NOT_FOUND)
+    return api_response(await serialize_user(user))
+
+
+@require_GET
+@async_jwt_required
+@replica_reads
+async def search_users_async(request):
+    try:
+        queryset, user_point = build_search_queryset(request.user, request.GET)
+    except ValueError:
+        return api_response({"error": {"location": ["Invalid lat/lng format"]}}, status_code=status.HTTP_400_BAD_REQUEST)
+
+    paginated = await apaginate(request, queryset)
+    if paginated is None:
+        return api_response({"detail": "Invalid page."}, status_code=status.HTTP_404_NOT_FOUND)
+    page, count, next_url, previous_url = paginated
+
+    return api_response({
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
+        "results": [search_result(u, user_point) for u in page]
+    })
+
+
+@require_GET
+@async_jwt_required
+async def badge_status_async(request):
+    # The badge was loaded with the user by async_jwt_required
+    try:
+        badge = request.user.badge
+    except TrustBadge.DoesNotExist:
+        return api_response({"error": "Badge not found for user"}, status_code=status.HTTP_404_NOT_FOUND)
+    return api_response(build_badge_status(badge))
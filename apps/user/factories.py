@@ -0,0 +1,27 @@
+"""
+Users for the test suites of every app.
+"""
+import itertools
+
+from django.contrib.auth import get_user_model
+
+PASSWORD = 'testpass123'
+
+_sequence = itertools.count(1)
+
+
+def make_user(role='farmer', **fields):
+    """
+    Create a user with a unique email and phone number. ``fields``
+    override the defaults (``email``, ``first_name``, ``password``...).
+    """
+    n = next(_sequence)
+    return get_user_model().objects.create_user(**{
+        'email': f'user{n}@test.com',
+        'phone_number': f'0809{n:07d}',
+        'password': PASSWORD,
+        'first_name': 'Test',
+        'last_name': f'User{n}',
+        'role': role,
+        **fields,
+    })
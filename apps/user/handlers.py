@@ -0,0 +1,81 @@
+"""
+Outbox handlers for User and TrustBadge events (see ``apps.outbox.outbox``).
+
+Each gets a batch of one topic's events, so a burst of saves costs one
+badge query and one cache invalidation, not one per save. An event's
+``fields`` are the columns its save wrote, and handlers skip saves of
+fields they don't depend on. User search pages and dashboards are cached
+under ``user_tag``, so invalidating it is also what keeps search results
+current.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from apps import events
+from apps.cache import tiered_cache, user_tag
+from apps.outbox.outbox import handler
+from apps.user.models import TrustBadge
+
+# What TrustBadge.level_for depends on
+BADGE_INPUTS = {'transaction_count', 'average_rating'}
+
+
+def _invalidate(user_ids):
+    tags = [user_tag(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: tiered_cache.invalidate(*tags))
+
+
+def _publish_badge(user_id, level):
+    events.publish(user_id, 'badge', {
+        'badge_level': level,
+        'display_name': TrustBadge(badge_level=level).get_badge_display_name(),
+    })
+
+
+@handler('user.saved')
+@handler('user.deleted')
+def invalidate_users(batch):
+    """
+    Drop cached detail, search pages and dashboards showing these users
+    again. The save already dropped them at commit (``apps.user.signals``);
+    this catches pages a concurrent read refilled from a replica that had
+    not caught up yet.
+    """
+    _invalidate({event.key for event in batch})
+
+
+def _saved(event, fields):
+    """Did ``event``'s save write any of ``fields``? (None: a full save wrote everything)"""
+    written = event.data.get('fields')
+    return written is None or not fields.isdisjoint(written)
+
+
+@handler('badge.saved')
+def recompute_badges(batch):
+    """Levels follow transaction counts and ratings"""
+    user_ids = {event.key for event in batch if _saved(event, BADGE_INPUTS)}
+    if not user_ids:
+        return
+    changed = []
+    now = timezone.now()
+    for badge in TrustBadge.objects.filter(user_id__in=user_ids):
+        level = TrustBadge.level_for(badge.transaction_count, badge.average_rating)
+        if level != badge.badge_level:
+            badge.badge_level = level
+            # bulk_update skips auto_now; profile ETags are built from it
+            badge.updated_at = now
+            changed.append(badge)
+    if changed:
+        TrustBadge.objects.bulk_update(changed, ['badge_level', 'updated_at'])
+        _invalidate({badge.user_id for badge in changed})
+        for badge in changed:
+            _publish_badge(badge.user_id, badge.badge_level)
+
+
+@handler('badge.saved')
+def badges_saved(batch):
+    """Badge changes show up wherever the user does; new levels go to their open streams"""
+    _invalidate({event.key for event in batch})
+    for event in batch:
+        if _saved(event, {'badge_level'}):
+            _publish_badge(event.key, event.data['badge_level'])
@@ -0,0 +1,34 @@
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from apps.metrics import PASSWORD_HASH_TIME
+
+# verify() hashes through encode(); label that work as a verification
+_operation = ContextVar('password_hash_operation', default='encode')
+
+
+class TimedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher, reporting its run time to /metrics.
+
+    It keeps the ``pbkdf2_sha256`` algorithm name, so existing hashes verify
+    unchanged and new ones stay readable by the stock hasher.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        start = perf_counter()
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            if settings.METRICS_ENABLED:
+                PASSWORD_HASH_TIME.labels(_operation.get()).observe(perf_counter() - start)
+
+    def verify(self, password, encoded):
+        token = _operation.set('verify')
+        try:
+            return super().verify(password, encoded)
+        finally:
+            _operation.reset(token)
@@ -6,6 +6,8 @@ import uuid
 from django.shortcuts import get_object_or_404
 from django.contrib.gis.db import models as gis_models
 
+from apps.changes import TrackChanges
+
 
 
 class UserManager(BaseUserManager):
@@ -32,7 +34,7 @@ class UserManager(BaseUserManager):
         return get_object_or_404(self, public_id=public_id)
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(TrackChanges, AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = (
         ('farmer', 'Farmer'),
         ('buyer', 'Buyer'),
@@ -129,7 +131,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         return total  # integer
 
 
-class TrustBadge(models.Model):
+class TrustBadge(TrackChanges):
     BADGE_CHOICES = [
         ('new_user', 'New User'),
         ('bronze', 'Bronze'),
@@ -165,26 +167,30 @@ class TrustBadge(models.Model):
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.get_badge_display_name()}"
 
-    def calculate_badge_level(self):
-        """
-        Determine the badge level based on the user's
-        transaction history and rating.
-        """
-        rating = (self.average_rating or 0)
-        count = self.transaction_count
+    @staticmethod
+    def level_for(transaction_count, average_rating):
+        """The badge level earned by a transaction history and rating."""
+        rating = (average_rating or 0)
+        count = transaction_count
 
         if count >= 100 and rating >= 4.8:
-            self.badge_level = 'diamond'
+            return 'diamond'
         elif count >= 50 and rating >= 4.7:
-            self.badge_level = 'gold'
+            return 'gold'
         elif count >= 20 and rating >= 4.3:
-            self.badge_level = 'silver'
+            return 'silver'
         elif count >= 5 and rating >= 4.0:
-            self.badge_level = 'bronze'
-        else:
-            self.badge_level = 'new_user'
-        
-        self.save(update_fields=['badge_level'])
+            return 'bronze'
+        return 'new_user'
+
+    def calculate_badge_level(self):
+        """
+        Determine the badge level based on the user's
+        transaction history and rating.
+        """
+        self.badge_level = self.level_for(self.transaction_count, self.average_rating)
+        if 'badge_level' in self.changed_fields():
+            self.save(update_fields=['badge_level', 'updated_at'])
     
     def get_badge_display_name(self):
         """Return human-friendly badge name"""
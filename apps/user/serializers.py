@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import User, TrustBadge, UserActivity
 from apps.user.validator import validate_image_file
@@ -39,7 +40,14 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_staff', 'is_superuser', 'is_active']
     
     def get_badge(self, obj):
-        return obj.badge
+        try:
+            badge = obj.badge
+        except TrustBadge.DoesNotExist:
+            return None
+        return {
+            'level': badge.badge_level,
+            'display': badge.get_badge_display_name(),
+        }
     
     def get_location_lat(self, obj):
         return obj.location.y if obj.location else None
@@ -47,6 +55,17 @@ class UserSerializer(serializers.ModelSerializer):
     def get_location_lng(self, obj):
         return obj.location.x if obj.location else None
 
+
+# What a profile card shows: a subset of the UserSerializer data
+USER_CARD_FIELDS = ('id', 'first_name', 'last_name', 'role', 'badge', 'location_text', 'profile_photo')
+
+
+class UserCardSerializer(UserSerializer):
+    """Another user's public profile card, without contact details."""
+    class Meta(UserSerializer.Meta):
+        fields = USER_CARD_FIELDS
+
+
 class ProfileUpdateSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(
         required=True,
@@ -120,6 +139,16 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class UserBatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.USERS_BATCH_MAX:
+            raise serializers.ValidationError(f"At most {settings.USERS_BATCH_MAX} ids per request")
+        # Duplicates are looked up once; the order is the caller's
+        return list(dict.fromkeys(value))
+
+
 class BadgeStatusSerializer(serializers.ModelSerializer):
     badge_display = serializers.SerializerMethodField()
     
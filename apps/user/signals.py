@@ -1,14 +1,63 @@
-from django.db.models.signals import post_save
+"""
+User and TrustBadge changes record outbox events here, in the
+transaction of the change; ``apps.user.handlers`` does the rest
+(search and dashboard invalidation, badge recompute, live events) off the
+request path. Only the saved user's own cache entries are dropped right
+at commit, so the next read, their own included, sees the save.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
+from apps.cache import tiered_cache, user_tag
+from apps.messaging.models import Participant
+from apps.outbox import outbox
 from apps.user.models import TrustBadge, User
 
+# Saved without anything cached or searchable changing
+USER_INTERNAL_FIELDS = {'password', 'last_login', 'updated_at'}
+BADGE_INTERNAL_FIELDS = {'updated_at'}
+
+
+def _invalidate_on_commit(user_id):
+    tag = user_tag(user_id)
+    transaction.on_commit(lambda: tiered_cache.invalidate(tag))
+
 @receiver(post_save, sender=User)
 def create_trust_badge(sender, instance, created, **kwargs):
+    # Part of the user, not a side effect: callers read user.badge right away
     if created:
         TrustBadge.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_trust_badge(sender, instance, **kwargs):
-    """Ensure badge is saved when user is updated"""
-    if hasattr(instance, 'badge'):
-        instance.badge.save()
+def record_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Saves write only changed columns (apps.changes); some need no follow-up
+    if update_fields is not None and not set(update_fields) - USER_INTERNAL_FIELDS:
+        return
+    _invalidate_on_commit(instance.pk)
+    outbox.emit('user.saved', instance.pk, {
+        'created': created,
+        'fields': sorted(update_fields) if update_fields else None,
+    })
+
+@receiver(pre_delete, sender=User)
+def remember_peers(sender, instance, **kwargs):
+    # Their conversations are deleted along with them
+    instance._peers = list(
+        Participant.objects.filter(user=instance).values_list('peer', flat=True).distinct()
+    )
+
+@receiver(post_delete, sender=User)
+def record_user_deleted(sender, instance, **kwargs):
+    _invalidate_on_commit(instance.pk)
+    # Whose clients synced this user and must drop them (apps.sync)
+    outbox.emit('user.deleted', instance.pk, {'peers': getattr(instance, '_peers', [])})
+
+@receiver(post_save, sender=TrustBadge)
+def record_badge_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A new badge is announced by its user's event
+    if created or (update_fields is not None and not set(update_fields) - BADGE_INTERNAL_FIELDS):
+        return
+    outbox.emit('badge.saved', instance.user_id, {
+        'fields': sorted(update_fields) if update_fields else None,
+        'badge_level': instance.badge_level,
+    })
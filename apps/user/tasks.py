@@ -0,0 +1,29 @@
+"""
+Profile work that update_profile hands to the job queue instead of
+doing inside the request.
+"""
+import io
+
+from django.utils import timezone
+
+from apps import events
+from apps.jobs.queue import task
+from apps.user.models import User
+from apps.user.utils import upload_profile_photo
+
+
+@task('user.upload_profile_photo', priority=10)
+def upload_photo(user_id, payload=None, url=None):
+    """Upload a photo sent to update_profile (bytes, or a URL) and point the profile at it."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        # Deleted since
+        return
+    result = upload_profile_photo(user, io.BytesIO(payload) if payload is not None else url)
+    secure_url = result.get('secure_url')
+    if not secure_url:
+        raise RuntimeError(f"Cloudinary returned no secure_url: {result!r}")
+    user.profile_photo = secure_url
+    user.updated_at = timezone.now()
+    user.save(update_fields=['profile_photo', 'updated_at'])
+    events.publish(user.pk, 'profile', {'profile_photo': secure_url})
@@ -30,14 +30,39 @@ class TestClassName(TestCase):
         # Test name MUST start with "test_"
 """
 
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point
+from django.db import connection
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import io
+import json
+import re
+import time
+import uuid
+from unittest import mock
 
 from apps.user.models import TrustBadge, UserActivity
+from apps.user.factories import make_user
+from apps.jobs.worker import Worker
+from apps.outbox import outbox
+from apps.outbox.models import OutboxEvent
+from apps.listing.models import Listing
+from apps import warmup
+from apps.cache import MISSING, LocalLRU, TieredCache, tiered_cache
+from apps.routers import PIN_COOKIE_NAME, PrimaryReplicaRouter, is_pinned, use_replica
 
 User = get_user_model()
 
@@ -762,6 +787,718 @@ class EdgeCaseTests(TestCase):
         self.assertEqual(badge.badge_level, 'new_user')
 
 
+class ReplicaRoutingTests(TestCase):
+    """
+    Test Read-Replica Routing
+
+    LEARNING: override_settings lets us pretend a replica is configured
+    without a second database (replicas mirror `default` in tests)
+    """
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.user = User.objects.create_user(
+            email='replica@test.com',
+            phone_number='08012345679',
+            password='testpass123',
+            first_name='Replica',
+            last_name='User',
+            role='buyer'
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_reads_use_primary_by_default(self):
+        """
+        TEST 31: Reads outside replica-enabled views stay on the primary
+        """
+        with override_settings(REPLICA_DATABASES=['replica_1']):
+            self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_replica_reads_and_primary_writes(self):
+        """
+        TEST 32: Inside use_replica(), reads go to a replica, writes never do
+        """
+        with override_settings(REPLICA_DATABASES=['replica_1']):
+            with use_replica():
+                self.assertEqual(self.router.db_for_read(User), 'replica_1')
+                self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_no_replicas_configured(self):
+        """
+        TEST 33: Without replicas everything uses the primary
+        """
+        with override_settings(REPLICA_DATABASES=[]):
+            with use_replica():
+                self.assertEqual(self.router.db_for_read(User), 'default')
+
+    def test_write_pins_user_to_primary(self):
+        """
+        TEST 34: After a successful write the user reads their own writes
+
+        LEARNING: ReplicaPinningMiddleware pins the user after PATCH/POST
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        response = client.patch('/api/auth/profile/', {'bio': 'Fresh yams'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+        request = RequestFactory().get('/api/users/')
+        request.user = self.user
+        self.assertTrue(is_pinned(request))
+
+
+class AsyncEndpointTests(TestCase):
+    """
+    Test the Async (ASGI) Variants of the Read Endpoints
+
+    LEARNING: async test methods run on an event loop and use
+    self.async_client; the async views authenticate with a real JWT
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='async@test.com',
+            phone_number='08012345680',
+            password='testpass123',
+            first_name='Async',
+            last_name='Farmer',
+            role='farmer'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.auth_header = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    async def test_async_badge_status_matches_sync(self):
+        """
+        TEST 35: The async badge view returns the same payload as the sync one
+        """
+        async_response = await self.async_client.get('/api/async/users/badge-status/', **self.auth_header)
+        self.client.force_authenticate(user=self.user)
+        sync_response = await sync_to_async(self.client.get)('/api/users/badge-status/')
+
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+    async def test_async_dashboard(self):
+        """
+        TEST 36: Async dashboard returns role-specific stats
+        """
+        response = await self.async_client.get('/api/async/dashboard/stats/', **self.auth_header)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['role'], 'farmer')
+
+    async def test_async_endpoints_require_token(self):
+        """
+        TEST 37: Async endpoints reject requests without a token
+        """
+        response = await self.async_client.get('/api/async/auth/me/')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TieredCacheTests(TestCase):
+    """
+    Test the Two-Tier Cache (local LRU + shared Django cache)
+
+    LEARNING: The shared tier is the locmem backend in tests, so these
+    run without Redis or any network service
+    """
+
+    def setUp(self):
+        self.cache = TieredCache()
+        self.user = User.objects.create_user(
+            email='cache@test.com',
+            phone_number='08012345681',
+            password='testpass123',
+            first_name='Cache',
+            last_name='User',
+            role='farmer'
+        )
+
+    def tearDown(self):
+        self.cache.clear()
+        cache.clear()
+
+    def test_local_lru_evicts_least_recently_used(self):
+        """
+        TEST 38: The per-process tier keeps at most max_entries
+        """
+        lru = LocalLRU(max_entries=2)
+        lru.set('a', 1, [], ttl=60)
+        lru.set('b', 2, [], ttl=60)
+        lru.get('a')  # 'a' is now most recently used
+        lru.set('c', 3, [], ttl=60)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIs(lru.get('b'), MISSING)
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_invalidate_tag_misses_in_both_tiers(self):
+        """
+        TEST 39: Invalidating a tag drops every entry carrying it
+        """
+        other = TieredCache()  # stands in for another worker process
+        self.cache.set('detail', 'v1', tags=['user:1'])
+        self.cache.set('search', 'page', tags=['user:1', 'user:2'])
+        self.assertEqual(other.get('search'), 'page')
+
+        self.cache.invalidate('user:1')
+
+        self.assertIs(self.cache.get('detail'), MISSING)
+        self.assertIs(self.cache.get('search'), MISSING)
+        other.clear()  # its local copy would expire after LOCAL_CACHE_TTL
+        self.assertIs(other.get('search'), MISSING)
+
+    def test_single_flight_computes_once(self):
+        """
+        TEST 40: Concurrent misses for the same key compute the value once
+
+        LEARNING: The slow compute keeps the other threads waiting on the
+        per-key lock; they then read the stored value
+        """
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self.cache.get_or_set('hot', compute), range(8)))
+
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_user_save_invalidates_cached_detail(self):
+        """
+        TEST 41: Saving a user refreshes their cached detail
+
+        LEARNING: The save drops the user's cache tag on commit, which
+        captureOnCommitCallbacks triggers inside a TestCase; no dispatcher
+        has to run first
+        """
+        client = APIClient()
+        url = f'/api/users/{self.user.public_id}/'
+        self.assertEqual(client.get(url).data['bio'], None)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.bio = 'Cassava and maize'
+            self.user.save()
+
+        self.assertEqual(client.get(url).data['bio'], 'Cassava and maize')
+
+
+class PerformanceInstrumentationTests(TestCase):
+    """
+    Test Per-Request Instrumentation (Server-Timing + structured logs)
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='timing@test.com',
+            phone_number='08012345682',
+            password='testpass123',
+            first_name='Timing',
+            last_name='User',
+            role='buyer'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_server_timing_header(self):
+        """
+        TEST 42: Sampled responses carry a Server-Timing header for staff only
+        """
+        with self.assertLogs('apps.performance', level='INFO'):
+            response = self.client.get('/api/users/activity/')
+        self.assertNotIn('Server-Timing', response)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/users/activity/')
+
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'serializer;dur=', 'total;dur='):
+            self.assertIn(metric, header)
+
+    @override_settings(PERF_SAMPLE_RATE=0.0, PERF_SLOW_REQUEST_MS=100000)
+    def test_unsampled_requests_have_no_header(self):
+        """
+        TEST 43: A zero sample rate emits nothing for fast requests
+        """
+        response = self.client.get('/api/users/activity/')
+
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERF_SAMPLE_RATE=0.0, PERF_SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_explain_plans(self):
+        """
+        TEST 44: Slow requests are logged with EXPLAIN plans of their SQL
+
+        LEARNING: assertLogs captures log records so we can inspect them
+        """
+        with self.assertLogs('apps.performance', level='WARNING') as logs:
+            self.client.get('/api/users/activity/')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['event'], 'slow_request')
+        self.assertEqual(record['url_name'], 'user-activity')
+        self.assertGreater(record['db_queries'], 0)
+        self.assertTrue(record['queries'][0]['plan'])
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsEndpointTests(TestCase):
+    """
+    Test the Prometheus /metrics Endpoint
+    """
+    scrape_auth = {'HTTP_AUTHORIZATION': 'Bearer scrape-secret'}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='metrics@test.com',
+            phone_number='08012345683',
+            password='testpass123',
+            first_name='Metrics',
+            last_name='User',
+            role='buyer'
+        )
+
+    def test_request_latency_is_exported_per_url_name(self):
+        """
+        TEST 45: Requests show up in the latency histogram by URL name
+        """
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/api/users/badge-status/')
+
+        body = self.client.get('/metrics', **self.scrape_auth).content.decode()
+
+        self.assertIn('http_request_duration_seconds_count{method="GET",url_name="badge-status"}', body)
+        self.assertIn('cache_requests_total', body)
+
+    def test_login_records_password_hash_time(self):
+        """
+        TEST 46: Password checks during login feed the hash-time histogram
+        """
+        self.client.post('/api/auth/login/', {'email': 'metrics@test.com', 'password': 'testpass123'}, format='json')
+
+        body = self.client.get('/metrics', **self.scrape_auth).content.decode()
+
+        self.assertIn('password_hash_duration_seconds_count{operation="verify"}', body)
+
+    def test_metrics_token_is_enforced(self):
+        """
+        TEST 47: Scrapes must present METRICS_TOKEN; without one /metrics is DEBUG-only
+        """
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', **self.scrape_auth)
+        self.assertEqual(response.status_code, 200)
+
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class SeedDataCommandTests(TestCase):
+    """
+    Test the seed_data Management Command
+
+    LEARNING: call_command() runs a management command in-process, so the
+    rows it COPYs land in the test database and are rolled back afterwards
+    """
+
+    def seed(self, **options):
+        call_command('seed_data', batch_size=20, stdout=io.StringIO(), **options)
+
+    def test_seeds_users_badges_and_activity(self):
+        """
+        TEST 48: Every seeded user gets a badge and can log in; only sellers get listings
+        """
+        self.seed(users=50, seed=7)
+
+        seeded = User.objects.filter(email__endswith='@seed.naijashield.test')
+        self.assertEqual(seeded.count(), 50)
+        self.assertEqual(TrustBadge.objects.filter(user__in=seeded).count(), 50)
+        self.assertGreater(UserActivity.objects.filter(user__in=seeded).count(), 0)
+        self.assertFalse(Listing.objects.filter(owner__in=seeded, owner__role='buyer').exists())
+        self.assertTrue(seeded.get(email='user0@seed.naijashield.test').check_password('password123'))
+
+    def test_same_seed_gives_same_rows(self):
+        """
+        TEST 49: The data only depends on the seed and options
+        """
+        self.seed(users=30, seed=7)
+        first = list(User.objects.filter(email__endswith='@seed.naijashield.test')
+                     .order_by('email').values_list('public_id', 'role', 'location_text'))
+        User.objects.filter(email__endswith='@seed.naijashield.test').delete()
+
+        self.seed(users=30, seed=7)
+        second = list(User.objects.filter(email__endswith='@seed.naijashield.test')
+                      .order_by('email').values_list('public_id', 'role', 'location_text'))
+
+        self.assertEqual(first, second)
+
+    def test_refuses_to_reseed_same_range(self):
+        """
+        TEST 50: Seeding an existing range fails; --offset appends instead
+        """
+        self.seed(users=10, seed=7)
+
+        with self.assertRaises(CommandError):
+            self.seed(users=10, seed=7)
+
+        self.seed(users=10, seed=7, offset=10)
+        self.assertEqual(User.objects.filter(email__endswith='@seed.naijashield.test').count(), 20)
+
+
+class StubbedPhotoUploadTests(TestCase):
+    """
+    Test Offline Profile Photo Uploads (CLOUDINARY_STUB_UPLOADS)
+
+    LEARNING: load tests run without network access, so the Cloudinary
+    upload can be swapped for a stub through a setting
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='photo@test.com',
+            phone_number='08012345684',
+            password='testpass123',
+            first_name='Photo',
+            last_name='User',
+            role='farmer'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(CLOUDINARY_STUB_UPLOADS=True)
+    def test_photo_upload_is_stubbed(self):
+        """
+        TEST 51: With the stub on, a photo upload succeeds without Cloudinary
+        """
+        png = base64.b64decode(
+            'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+        )
+        photo = SimpleUploadedFile('photo.png', png, content_type='image/png')
+
+        response = self.client.patch('/api/auth/profile/', {'profile_photo': photo}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The upload itself runs in the job queue
+        Worker(concurrency=1, burst=True).run()
+        self.user.refresh_from_db()
+        self.assertIn('res.cloudinary.com/stub', self.user.profile_photo.name)
+
+
+class WorkerWarmupTests(TestCase):
+    """
+    Test Worker Warm-up and the Readiness Endpoint
+
+    LEARNING: gunicorn runs warm_up() in post_worker_init; here we call it
+    directly and watch /health/ready flip from 503 to 200
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        warmup.reset()
+
+    def tearDown(self):
+        warmup.reset()
+
+    def test_ready_only_after_warmup(self):
+        """
+        TEST 52: /health/ready answers 503 until warm-up has finished
+        """
+        self.assertEqual(self.client.get('/health/live').status_code, 200)
+        self.assertEqual(self.client.get('/health/ready').status_code, 503)
+
+        warmup.warm_up()
+
+        response = self.client.get('/health/ready')
+        self.assertEqual(response.status_code, 200)
+        steps = response.json()['steps']
+        self.assertEqual(set(steps), {'gis', 'metadata', 'synthetic_request', 'databases', 'semantic'})
+        self.assertTrue(all(step['error'] is None for step in steps.values()), steps)
+
+    def test_entry_point_warms_up_without_a_server_hook(self):
+        """
+        TEST 54: Outside gunicorn the WSGI/ASGI entry point starts the warm-up, so readiness doesn't wait forever
+        """
+        with mock.patch.object(warmup, 'warm_up_in_background') as background:
+            with override_settings(WARMUP_IN_BACKGROUND=True):
+                warmup.warm_up_on_start()
+            self.assertEqual(background.call_count, 1)
+
+            # Under gunicorn, post_worker_init does it instead
+            with override_settings(WARMUP_IN_BACKGROUND=False):
+                warmup.warm_up_on_start()
+            with override_settings(WARMUP_ENABLED=False):
+                warmup.warm_up_on_start()
+            self.assertEqual(background.call_count, 1)
+
+    def test_synthetic_request_keeps_connections_open(self):
+        """
+        TEST 53: The synthetic request goes through the URLconf without closing DB connections
+        """
+        statuses = warmup.synthetic_request()
+
+        self.assertEqual(len(statuses), len(settings.WARMUP_PATHS))
+        self.assertTrue(all(not s.startswith('5') for s in statuses), statuses)
+        # Still inside the test transaction on the same connection
+        self.assertEqual(User.objects.filter(email='nobody@test.com').count(), 0)
+
+
+def writes(queries):
+    """(statement, table, columns set) for each write in ``queries``; INSERTs list no columns"""
+    found = []
+    for query in queries.captured_queries:
+        sql = query['sql']
+        if sql.startswith('UPDATE'):
+            table, assignments = re.match(r'UPDATE "(\w+)" SET (.*) WHERE ', sql).groups()
+            found.append(('UPDATE', table, set(re.findall(r'"(\w+)" = ', assignments))))
+        elif sql.startswith(('INSERT', 'DELETE')):
+            found.append((sql.split()[0], re.search(r'"(\w+)"', sql).group(1), None))
+    return found
+
+
+class ProfileWriteTests(TestCase):
+    """
+    The SQL a profile update writes (apps.changes). A save writes only the
+    columns that changed, and nothing at all when nothing did, so no
+    outbox event and no cache invalidation either.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = make_user()
+        self.client.force_authenticate(user=self.user)
+        self.activity = ('INSERT', UserActivity._meta.db_table, None)
+        self.event = ('INSERT', OutboxEvent._meta.db_table, None)
+
+    def patch(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/api/auth/profile/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return writes(queries)
+
+    def test_update_writes_only_changed_columns(self):
+        """Changing the bio updates bio and updated_at, and records one event"""
+        self.assertEqual(
+            self.patch({'bio': 'Cassava', 'email': self.user.email}),
+            [('UPDATE', User._meta.db_table, {'bio', 'updated_at'}), self.event, self.activity]
+        )
+        self.assertEqual(OutboxEvent.objects.filter(topic='user.saved').last().data['fields'], ['bio', 'updated_at'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.bio, 'Cassava')
+
+    def test_unchanged_update_writes_nothing(self):
+        """Sending the current values again only logs the activity"""
+        data = {'bio': 'Cassava', 'location_text': 'Ibadan', 'farm_size': '12.50',
+                'location_lat': 7.3775, 'location_lng': 3.947}
+        self.patch(data)
+        updated_at = User.objects.get(pk=self.user.pk).updated_at
+
+        # '12.5' is the stored 12.50; the point is rebuilt from the same coordinates
+        self.assertEqual(self.patch({**data, 'farm_size': '12.5'}), [self.activity])
+        self.assertEqual(User.objects.get(pk=self.user.pk).updated_at, updated_at)
+
+    def test_unchanged_saves_skip_the_database(self):
+        """Saving an unchanged user or badge, or recomputing an unchanged level, runs no query"""
+        user = User.objects.get(pk=self.user.pk)
+        badge = TrustBadge.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            user.save()
+            user.bio = None
+            user.save()
+            badge.calculate_badge_level()
+            badge.save()
+
+        # A real change writes just that column
+        badge.transaction_count = 6
+        with CaptureQueriesContext(connection) as queries:
+            badge.save()
+        self.assertEqual(
+            writes(queries),
+            [('UPDATE', TrustBadge._meta.db_table, {'transaction_count', 'updated_at'}),
+             ('INSERT', OutboxEvent._meta.db_table, None)]
+        )
+
+
+class UserBatchTests(TestCase):
+    """
+    Batch profile lookup (POST /api/users/batch/): one request and one
+    query for many profile cards instead of one GET per user. Warm users
+    come from the same cache as the detail endpoint.
+    """
+
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear()
+        self.client = APIClient()
+        self.users = [make_user() for _ in range(3)]
+        self.client.force_authenticate(user=self.users[0])
+
+    def tearDown(self):
+        cache.clear()
+        tiered_cache.clear()
+
+    def batch(self, ids):
+        return self.client.post('/api/users/batch/', {'ids': [str(i) for i in ids]}, format='json')
+
+    def test_returns_cards_in_order_from_one_query(self):
+        """Cards come back in the order asked, with badges; unknown ids are listed apart"""
+        first, second, third = (user.public_id for user in self.users)
+        unknown = uuid.uuid4()
+        # A warm detail entry is reused
+        self.client.get(f'/api/users/{second}/')
+
+        with self.assertNumQueries(1):
+            response = self.batch([third, unknown, second, first, third])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([card['id'] for card in response.data['results']], [str(third), str(second), str(first)])
+        self.assertEqual(response.data['not_found'], [unknown])
+        card = response.data['results'][0]
+        self.assertEqual(set(card), {'id', 'first_name', 'last_name', 'role', 'badge', 'location_text', 'profile_photo'})
+        self.assertEqual(card['badge'], {'level': 'new_user', 'display': 'New User'})
+
+        # Now every card is warm, and the detail endpoint shares the entries
+        with self.assertNumQueries(0):
+            self.batch([first, second, third])
+            self.client.get(f'/api/users/{first}/')
+
+    def test_saved_user_is_reloaded(self):
+        """A saved user's card is reloaded; the others stay cached"""
+        ids = [user.public_id for user in self.users]
+        self.batch(ids)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[1].first_name = 'Renamed'
+            self.users[1].save()
+            outbox.dispatch()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch(ids)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['results'][1]['first_name'], 'Renamed')
+
+    def test_rejects_bad_requests(self):
+        """Too many ids, malformed ids and anonymous callers are refused"""
+        with override_settings(USERS_BATCH_MAX=2):
+            response = self.batch([user.public_id for user in self.users])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ids', response.data['error'])
+
+        response = self.client.post('/api/users/batch/', {'ids': ['not-a-uuid']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/users/batch/', {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.batch([self.users[0].public_id]).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    ETag / Last-Modified on profile reads (GET /api/users/<id>/,
+    /api/auth/me/). A client that sends back the ETag it got
+    (If-None-Match) gets an empty 304 while the profile is unchanged: no
+    serialization, and at most one narrow query.
+    """
+
+    def setUp(self):
+        cache.clear()
+        tiered_cache.clear()
+        self.client = APIClient()
+        self.user = make_user()
+        self.url = f'/api/users/{self.user.public_id}/'
+
+    def tearDown(self):
+        cache.clear()
+        tiered_cache.clear()
+
+    def test_unchanged_profile_is_not_sent_again(self):
+        """A matching If-None-Match gets a 304, from the cache or one narrow query"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        # Contact details: browsers may keep it, shared caches may not
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        # Cold cache: answered from updated_at alone, nothing cached
+        tiered_cache.clear()
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"updated_at"', queries[0]['sql'])
+        self.assertNotIn('"bio"', queries[0]['sql'])
+
+        self.assertEqual(self.client.get(f'/api/users/{uuid.uuid4()}/', HTTP_IF_NONE_MATCH=etag).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_user_and_badge_changes_change_the_etag(self):
+        """Saving the user or their badge level makes the old ETag stale"""
+        first = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.bio = 'Groundnuts'
+            self.user.save()
+            outbox.dispatch()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Groundnuts')
+        second = response['ETag']
+        self.assertNotEqual(second, first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            badge = TrustBadge.objects.get(user=self.user)
+            badge.transaction_count, badge.average_rating = 6, Decimal('4.1')
+            badge.calculate_badge_level()
+            outbox.dispatch()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=second)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['badge']['level'], 'bronze')
+
+    def test_me_revalidates_without_queries(self):
+        """/api/auth/me/ answers a 304 from the authenticated user alone, and never serves an older copy"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/auth/me/')
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Saved, but the outbox hasn't invalidated the cached copy yet
+        self.user.bio = 'Sorghum'
+        self.user.save()
+        response = self.client.get('/api/auth/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Sorghum')
+        self.assertNotEqual(response['ETag'], etag)
+
+
 """
 HOW TO RUN THESE TESTS:
 ======================
@@ -1,4 +1,173 @@
-from apps.user.models import UserActivity
+import calendar
+
+from django.conf import settings
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from apps.user.models import TrustBadge, User, UserActivity
+from apps.user.serializers import UserSerializer
+from apps.cache import MISSING, tiered_cache, user_tag
+from apps.instrumentation import timed
+
+USER_CACHE_TIMEOUT = 300
+
+
+def user_detail_key(public_id):
+    return f"user:{public_id}:profile"
+
+
+def user_version(user):
+    """What a user's profile data depends on: ``(user.updated_at, badge.updated_at)``."""
+    try:
+        badge_updated_at = user.badge.updated_at
+    except TrustBadge.DoesNotExist:
+        badge_updated_at = None
+    return (user.updated_at, badge_updated_at)
+
+
+def _profile(user):
+    with timed('serializer'):
+        return {'data': UserSerializer(user).data, 'version': user_version(user)}
+
+
+def cached_user_profile(public_id, loader):
+    """
+    ``{'data': UserSerializer data, 'version': user_version}`` for
+    ``public_id`` from the tiered cache. ``loader`` returns the User on a
+    miss; the entry is dropped whenever the user or their badge is saved.
+    """
+    return tiered_cache.get_or_set(
+        user_detail_key(public_id),
+        lambda: _profile(loader()),
+        tags=[user_tag(public_id)],
+        timeout=USER_CACHE_TIMEOUT,
+    )
+
+
+def cached_users_data(public_ids, loader):
+    """
+    ``{public_id: UserSerializer data}`` for many users, sharing
+    ``cached_user_profile``'s entries. ``loader(public_ids)`` returns the
+    missing Users in one query; ids of users that don't exist are left out.
+    """
+    keys = {user_detail_key(public_id): public_id for public_id in public_ids}
+
+    def serialize(missing):
+        users = loader([keys[key] for key in missing])
+        return {user_detail_key(user.public_id): _profile(user) for user in users}
+
+    found = tiered_cache.get_or_set_many(
+        {key: [user_tag(public_id)] for key, public_id in keys.items()},
+        serialize,
+        timeout=USER_CACHE_TIMEOUT,
+    )
+    return {keys[key]: entry['data'] for key, entry in found.items()}
+
+
+# ---------------- Conditional GET ----------------
+
+def _validators(version):
+    """``(etag, last_modified timestamp)`` for a ``user_version``."""
+    stamps = [stamp for stamp in version if stamp is not None]
+    micros = (calendar.timegm(stamp.utctimetuple()) * 10**6 + stamp.microsecond for stamp in stamps)
+    # Weak: the same version renders differently per format (JSON, browsable API)
+    etag = 'W/"%s"' % '-'.join(f"{value:x}" for value in micros)
+    return etag, calendar.timegm(max(stamps).utctimetuple())
+
+
+def _not_modified(request, version):
+    etag, last_modified = _validators(version)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def _revalidated(request, response, version):
+    etag, last_modified = _validators(version)
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    # Clients may keep it but must check back (If-None-Match) before reuse.
+    # Never in a shared cache: a profile carries its email and phone number.
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def profile_response(request, public_id, loader):
+    """
+    A user's profile (GET /api/users/<public_id>/) with ETag and
+    Last-Modified from ``user_version``, or a bodiless 304 when the
+    client's copy is current. The version comes with the cached entry;
+    when that is cold, a conditional request is answered from one narrow
+    ``values_list`` query before anything is loaded or serialized.
+    """
+    entry = tiered_cache.get(user_detail_key(public_id), [user_tag(public_id)])
+    if entry is MISSING:
+        meta = request.META
+        if 'HTTP_IF_NONE_MATCH' in meta or 'HTTP_IF_MODIFIED_SINCE' in meta:
+            version = (
+                User.objects.filter(public_id=public_id)
+                .values_list('updated_at', 'badge__updated_at').first()
+            )
+            if version is None:
+                raise Http404
+            not_modified = _not_modified(request, version)
+            if not_modified is not None:
+                return _revalidated(request, not_modified, version)
+        entry = cached_user_profile(public_id, loader)
+
+    response = _not_modified(request, entry['version'])
+    if response is None:
+        response = Response(entry['data'])
+    return _revalidated(request, response, entry['version'])
+
+
+def own_profile_response(request):
+    """
+    ``profile_response`` for the authenticated user (GET /api/auth/me/).
+    Their row and badge are already loaded, so a 304 costs no query; a
+    cache entry older than them is not served.
+    """
+    user = request.user
+    version = user_version(user)
+    not_modified = _not_modified(request, version)
+    if not_modified is not None:
+        return _revalidated(request, not_modified, version)
+
+    entry = cached_user_profile(user.public_id, lambda: user)
+    if entry['version'] != version:
+        # Saved since it was cached; the invalidation hasn't landed yet
+        entry = _profile(user)
+    return _revalidated(request, Response(entry['data']), version)
+
+
+def upload_profile_photo(user, photo_file):
+    """
+    Upload a profile photo to Cloudinary and return the upload result.
+    With ``CLOUDINARY_STUB_UPLOADS`` the file is read and a stable fake
+    URL returned instead, for offline load tests and local development.
+    """
+    folder = f"users/{user.public_id}/profile_photo"
+    public_id = f"profile_{user.public_id}"
+    if settings.CLOUDINARY_STUB_UPLOADS:
+        if hasattr(photo_file, 'read'):
+            photo_file.read()
+        return {'secure_url': f"https://res.cloudinary.com/stub/image/upload/{folder}/{public_id}.jpg"}
+
+    # Imported on first upload; the uploader and its HTTP stack stay out of worker boot
+    import cloudinary.uploader
+
+    return cloudinary.uploader.upload(
+        photo_file,
+        folder=folder,
+        public_id=public_id,
+        overwrite=True,
+        resource_type="image",
+        use_filename=False,
+        unique_filename=True,
+        invalidate=True
+    )
+
 
 def log_user_activity(request, user, action_type, description, metadata=None):
     ip = (
@@ -7,11 +176,7 @@ def log_user_activity(request, user, action_type, description, metadata=None):
     )
     if ip and ',' in ip:
         ip = ip.split(',')[0].strip()
-    
-    print('\n' * 10)
-    print(user)
-    print(ip)
-    print('\n' * 10)
+
     UserActivity.log_activity(
         user=user if user.is_authenticated else None,
         action_type=action_type,
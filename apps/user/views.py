@@ -10,23 +10,28 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
-import cloudinary.uploader
-
 from django.utils import timezone
 
 from apps.user.serializers import ProfileUpdateSerializer
-from apps.user.serializers import BadgeStatusSerializer
+from apps.user.serializers import UserBatchSerializer, USER_CARD_FIELDS
 
 from django.contrib.gis.geos import Point
 
+from django.db import transaction
 from django.db.models import Q
+from django.shortcuts import get_object_or_404
 from rest_framework.pagination import PageNumberPagination
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.measure import D
 
 from apps.user.models import UserActivity
 from apps.user.serializers import UserActivitySerializer
-from apps.user.utils import log_user_activity
+from apps.user.utils import log_user_activity, cached_users_data, profile_response
+from apps.user.tasks import upload_photo
+from apps.routers import replica_reads
+from apps.cache import tiered_cache, user_tag
+from apps.instrumentation import timed
+import hashlib
 
 VERIFICATION_STEPS = [
     {
@@ -71,18 +76,52 @@ BADGE_ORDER = ["new_user", "bronze", "silver", "gold", "diamond"]
 
 
 @api_view(['GET'])
+@replica_reads
 def user(request, public_id):
     if public_id:
-        user = User.objects.get_object_by_public_id(public_id)
-        serializer = UserSerializer(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # A miss fills a shared cache entry for USER_CACHE_TIMEOUT, so it
+        # must not come from a replica that hasn't seen the latest save yet
+        return profile_response(
+            request,
+            public_id,
+            lambda: get_object_or_404(User.objects.using('default').select_related('badge'), public_id=public_id)
+        )
     return Response({"error": "Public ID not found"}, status=status.HTTP_404_NOT_FOUND)
 
 @api_view(['GET'])
+@replica_reads
 def users(request):
-    users = User.objects.all()
-    serializer = UserSerializer(users, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    users = User.objects.select_related('badge')
+    with timed('serializer'):
+        data = UserSerializer(users, many=True).data
+    return Response(data, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def users_batch(request):
+    """
+    POST /api/users/batch/ {"ids": [public_id, ...]}
+    Profile cards for up to USERS_BATCH_MAX users, in the order asked for.
+    Warm users come from the per-user cache; the rest are loaded in one
+    query with their badges and cached for the detail endpoint too.
+    """
+    serializer = UserBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+    ids = serializer.validated_data['ids']
+
+    found = cached_users_data(
+        ids,
+        lambda missing: User.objects.select_related('badge').filter(public_id__in=missing)
+    )
+    return Response({
+        "results": [
+            {field: found[public_id][field] for field in USER_CARD_FIELDS}
+            for public_id in ids if public_id in found
+        ],
+        "not_found": [public_id for public_id in ids if public_id not in found],
+    }, status=status.HTTP_200_OK)
+
 
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
@@ -150,40 +189,29 @@ def update_profile(request):
     if "email" in data:
         user.email = data.get("email")
     
-    # ------------------- handle profile_photo upload to Cloudinary --------------------------#
+    # ------------------- queue profile_photo upload to Cloudinary --------------------------#
+    # The upload runs in the job queue; the new photo shows up once it's done
     photo_file = request.FILES.get('profile_photo') or data.get('profile_photo')
-    if photo_file:
-        try:
-            # Upload to cloudinary
-            result = cloudinary.uploader.upload(
-                photo_file,
-                folder=f"users/{user.public_id}/profile_photo",
-                public_id=f"profile_{user.public_id}",
-                overwrite=True,
-                resource_type="image",
-                use_filename=False,
-                unique_filename=True,
-                invalidate=True
-            )
-            secure_url = result.get('secure_url')
-            if not secure_url:
-                return Response({"error": {"profile_photo": ["Upload failed"]}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            user.profile_photo = secure_url
-        except Exception as exc:
-            # Cloudinary upload failed
-            return Response({"error": {"profile_photo": [str(exc)]}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    # Save user
-    user.updated_at = timezone.now()
-    user.save()
+
+    # Writes only the changed columns, or nothing; its outbox event and
+    # the upload job commit with it
+    with transaction.atomic(savepoint=False):
+        user.save()
+
+        if photo_file:
+            if hasattr(photo_file, 'read'):
+                upload_photo.enqueue({'user_id': user.pk}, payload=photo_file.read())
+            else:
+                upload_photo.enqueue({'user_id': user.pk, 'url': str(photo_file)})
 
     # Build response payload
-    serializer = UserSerializer(user)
+    with timed('serializer'):
+        data = UserSerializer(user).data
 
     log_user_activity(
         request,
         user=user,
-        action_type=UserActivity.ActionTypes.UPDATE,
+        action_type=UserActivity.ActionTypes.PROFILE_UPDATE,
         description="User updated successfully",
         metadata={
             "user_id": str(user.public_id),
@@ -193,7 +221,7 @@ def update_profile(request):
         }
     )
 
-    return Response(serializer.data, status=status.HTTP_200_OK)    
+    return Response(data, status=status.HTTP_200_OK)
 
 
 class UserSearchPagination(PageNumberPagination):
@@ -201,15 +229,28 @@ class UserSearchPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 50
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def search_users(request):
-    user = request.user
-    role = request.query_params.get('role', '')
-    search_query = request.query_params.get('search', '')
-    lat = request.query_params.get('location_lat')
-    lng = request.query_params.get('location_lng')
-    radius = request.query_params.get('radius', 50)
+
+# Search pages are tagged with the users they list; the short timeout
+# bounds how long a user who newly matches a query can be missing from it.
+SEARCH_CACHE_TIMEOUT = 30
+
+
+def search_cache_key(request):
+    params = sorted(request.query_params.lists())
+    digest = hashlib.sha1(repr((request.get_host(), params)).encode()).hexdigest()
+    return f"search:{request.user.pk}:{digest}"
+
+def build_search_queryset(user, params):
+    """
+    Apply the `role`, `search` and geo filters from ``params``.
+    Returns ``(queryset, user_point)``; raises ValueError for bad coordinates.
+    Shared by the sync and async search views.
+    """
+    role = params.get('role', '')
+    search_query = params.get('search', '')
+    lat = params.get('location_lat')
+    lng = params.get('location_lng')
+    radius = params.get('radius', 50)
 
     queryset = User.objects.all().exclude(public_id=user.public_id)
 
@@ -224,69 +265,81 @@ def search_users(request):
     # ---------------- Geo Search --------------------
     user_point = None
     if lat and lng:
-        try:
-            user_point = Point(float(lng), float(lat), srid=4326)
+        user_point = Point(float(lng), float(lat), srid=4326)
 
-            queryset = (
-                queryset.filter(location__distance_lte=(user_point, D(km=float(radius))))
-                .annotate(distance=Distance('location', user_point))
-                .order_by('distance')
-            )
-        except ValueError:
-            return Response({"error": {"location": ["Invalid lat/lng format"]}}, status=400)
+        queryset = (
+            queryset.filter(location__distance_lte=(user_point, D(km=float(radius))))
+            .annotate(distance=Distance('location', user_point))
+            .order_by('distance')
+        )
+    return queryset, user_point
+
+
+def search_result(u, user_point=None):
+    """Compact search row for a single user."""
+    res = {
+        'id': u.public_id,
+        'full_name': u.get_full_name(),
+        'role': u.role,
+        'location_text': u.location_text,
+        'profile_photo': u.profile_photo.name or None,
+        'trust_badge': 'New User',
+        # Same EWKT representation UserSerializer uses
+        'location': str(u.location) if u.location else None,
+        'profile_completion': u.profile_completion,
+        'days_since_joined': (timezone.now() - u.created_at).days
+    }
 
-    # ----- Pagination -----
-    paginator = UserSearchPagination()
-    page = paginator.paginate_queryset(queryset, request)
-
-    results = []
-
-    for u in page:
-        res = {
-            'id': u.public_id,
-            'full_name': u.get_full_name(),
-            'role': u.role,
-            'location_text': u.location_text,
-            'profile_photo': u.profile_photo,
-            'trust_badge': 'New User',
-            'location': u.location,
-            'profile_completion': u.profile_completion,
-            'days_since_joined': (timezone.now() - u.created_at).days
-        }
+    # Include distance only if present
+    if user_point and hasattr(u, 'distance'):
+        res['distance'] = round(u.distance.km, 3)
+    return res
 
-        # Include distance only if present
-        if user_point and hasattr(u, 'distance'):
-            res['distance'] = u.distance
-        results.append(res)
-    
-    return paginator.get_paginated_response(results)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def badge_status(request):
-    user = request.user
-
+@replica_reads
+def search_users(request):
     try:
-        badge = user.badge
-    except TrustBadge.DoesNotExist:
-        return Response({"error": "Badge not found for user"}, status=404)
-    
-    serializer = BadgeStatusSerializer(badge)
+        queryset, user_point = build_search_queryset(request.user, request.query_params)
+    except ValueError:
+        return Response({"error": {"location": ["Invalid lat/lng format"]}}, status=400)
+
+    def search_page():
+        # ----- Pagination -----
+        paginator = UserSearchPagination()
+        page = paginator.paginate_queryset(queryset, request)
+
+        with timed('serializer'):
+            results = [search_result(u, user_point) for u in page]
+        return paginator.get_paginated_response(results).data
+
+    data = tiered_cache.get_or_set(
+        search_cache_key(request),
+        search_page,
+        value_tags=lambda data: [user_tag(r['id']) for r in data['results']],
+        timeout=SEARCH_CACHE_TIMEOUT,
+    )
+    return Response(data)
+
+
+# For demonstration, define transactions required for next badge
+TRANSACTION_REQUIREMENTS = {
+    "new_user": 5,
+    "bronze": 20,
+    "silver": 50,
+    "gold": 100,
+    "diamond": 200
+}
+
 
+def build_badge_status(badge):
+    """Badge progress payload shared by the sync and async badge views."""
     # Calculate the next badge and transactions needed
     badge_level = badge.badge_level
     current_index = BADGE_ORDER.index(badge_level)
     next_badge = BADGE_ORDER[current_index + 1] if current_index < len(BADGE_ORDER) - 1 else badge_level
 
-    # For demonstration, define transactions required for next badge
-    TRANSACTION_REQUIREMENTS = {
-        "new_user": 5,
-        "bronze": 20,
-        "silver": 50,
-        "gold": 100,
-        "diamond": 200
-    }
-
     transactions_needed = max(0, TRANSACTION_REQUIREMENTS.get(next_badge) - badge.transaction_count)
 
     steps = []
@@ -299,7 +352,7 @@ def badge_status(request):
             s['status'] = "completed" if badge.is_location_verified else "pending"
         steps.append(s)
     
-    response_data = {
+    return {
         "current_badge": badge.badge_level,
         "badge_display": badge.get_badge_display_name(),
         "verifications": {
@@ -318,11 +371,23 @@ def badge_status(request):
         "benefits": BADGE_BENEFITS.get(badge.badge_level, {"current": [], "next_level": []})
     }
 
-    return Response(response_data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def badge_status(request):
+    user = request.user
+
+    try:
+        badge = user.badge
+    except TrustBadge.DoesNotExist:
+        return Response({"error": "Badge not found for user"}, status=404)
+
+    return Response(build_badge_status(badge))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def user_activity(request):
     """
     GET /api/users/activity/?page=1&action_type=login
@@ -333,10 +398,9 @@ def user_activity(request):
     # --------------- FILTERING --------------- #
     action_type = request.query_params.get('action_type', '')
 
-    queryset = UserActivity.objects.filter(
-        user=user,
-        action_type=action_type if action_type else None
-    )
+    queryset = UserActivity.objects.filter(user=user)
+    if action_type:
+        queryset = queryset.filter(action_type=action_type)
     # Most recent first
     queryset = queryset.order_by('-created_at')
     
@@ -345,8 +409,9 @@ def user_activity(request):
     paginator.page_size = 50
     paginated_qs = paginator.paginate_queryset(queryset, request)
 
-    serializer = UserActivitySerializer(paginated_qs, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    with timed('serializer'):
+        data = UserActivitySerializer(paginated_qs, many=True).data
+    return paginator.get_paginated_response(data)
 
 
 
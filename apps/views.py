@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from apps import warmup
+from apps.metrics import render_metrics
+
+
+@require_GET
+def metrics(request):
+    """
+    GET /metrics
+    Prometheus exposition of request latency, DB pool, cache and queue metrics.
+    Scrapes present ``Authorization: Bearer <METRICS_TOKEN>``; without a
+    token configured the endpoint only exists with DEBUG on.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not constant_time_compare(request.headers.get('Authorization', ''), expected):
+            return HttpResponse(status=401)
+    elif not settings.DEBUG:
+        raise Http404
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+@require_GET
+def health_live(request):
+    """
+    GET /health/live
+    The process is up and serving requests.
+    """
+    return JsonResponse({"status": "ok"})
+
+
+@require_GET
+def health_ready(request):
+    """
+    GET /health/ready
+    503 until this worker's warm-up has finished, then 200 with step timings.
+    """
+    if settings.WARMUP_ENABLED and not warmup.is_ready():
+        return JsonResponse({"status": "warming_up", **warmup.status()}, status=503)
+    return JsonResponse({"status": "ready", **warmup.status()})
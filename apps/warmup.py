@@ -0,0 +1,198 @@
+"""
+Worker warm-up: pay the first-request costs before the worker takes traffic.
+
+- GEOS/GDAL: GeoDjango loads both C libraries on first use
+- metadata: URL resolver, DRF settings, password hashers, serializer fields
+- a synthetic request through the full middleware stack and URLconf
+- semantic search: the embedding model and the memory-mapped FAISS index
+- database: one connection per alias, or the pool's minimum size
+
+Under gunicorn, ``post_worker_init`` (config/gunicorn.conf.py) runs this
+before the worker accepts connections, and the config file turns
+``WARMUP_IN_BACKGROUND`` off. Everywhere else (uvicorn, runserver) the
+WSGI/ASGI entry point starts it in a thread with ``warm_up_on_start``.
+``/health/ready`` answers 503 until it has finished.
+"""
+import io
+import json
+import logging
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger('apps.performance')
+
+_ready = threading.Event()
+_lock = threading.Lock()
+# step -> {"ms": float, "error": str | None}
+_steps = {}
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def status():
+    return {"ready": is_ready(), "steps": dict(_steps)}
+
+
+def reset():
+    """Forget a previous warm-up (tests)."""
+    _ready.clear()
+    _steps.clear()
+
+
+def warm_gis():
+    from django.contrib.gis.gdal import SpatialReference
+    from django.contrib.gis.geos import Point
+
+    point = Point(3.3792, 6.5244, srid=4326)
+    point.transform(3857)           # GDAL coordinate transformation
+    point.buffer(10).area           # GEOS operation
+    SpatialReference(4326).name
+
+
+def warm_metadata():
+    from django.contrib.auth.hashers import get_hashers
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    from apps.user.serializers import UserActivitySerializer, UserSerializer
+
+    get_resolver().url_patterns
+    get_hashers()
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    api_settings.DEFAULT_RENDERER_CLASSES
+    UserSerializer().fields
+    UserActivitySerializer().fields
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def synthetic_request():
+    """
+    GET each ``WARMUP_PATHS`` entry through the WSGI handler. Connection
+    cleanup signals are held back (as Django's test client does) so the
+    request doesn't close connections opened by other steps.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+    host = _host()
+    statuses = []
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        for path in settings.WARMUP_PATHS:
+            path, _, query = path.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': query,
+                'SERVER_NAME': host,
+                'SERVER_PORT': '80',
+                'HTTP_HOST': host,
+                'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(b''),
+                'wsgi.errors': io.StringIO(),
+            }
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+    return statuses
+
+
+def warm_databases():
+    """
+    Connections are per thread: this one is reused by a sync worker's
+    requests, while in a background thread only a pool's warm-up carries over.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        if settings.DATABASES[alias].get('OPTIONS', {}).get('pool'):
+            # Blocks until the pool holds its minimum number of connections
+            connection.pool.wait(timeout=settings.WARMUP_DB_TIMEOUT)
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def warm_semantic():
+    from apps.listing import semantic
+
+    semantic.warm()
+
+
+STEPS = (
+    ('gis', warm_gis),
+    ('metadata', warm_metadata),
+    ('synthetic_request', synthetic_request),
+    ('databases', warm_databases),
+    ('semantic', warm_semantic),
+)
+
+
+def warm_up():
+    """
+    Run every step once, log how long each took and mark the worker
+    ready. A failing step is logged and skipped: the worker still
+    becomes ready, and the error shows in ``/health/ready``.
+    """
+    with _lock:
+        if is_ready():
+            return status()
+        started = perf_counter()
+        for name, step in STEPS:
+            step_started = perf_counter()
+            error = None
+            try:
+                step()
+            except Exception as exc:
+                logger.exception("Warm-up step %s failed", name)
+                error = f"{type(exc).__name__}: {exc}"
+            _steps[name] = {"ms": round((perf_counter() - step_started) * 1000, 1), "error": error}
+
+        _ready.set()
+        logger.info(json.dumps({
+            "event": "warmup",
+            "total_ms": round((perf_counter() - started) * 1000, 1),
+            "steps": _steps,
+        }))
+        return status()
+
+
+def _warm_up_and_close():
+    try:
+        warm_up()
+    finally:
+        connections.close_all()
+
+
+def warm_up_in_background():
+    thread = threading.Thread(target=_warm_up_and_close, name='warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_up_on_start():
+    """
+    Called by config/wsgi.py and config/asgi.py once the application is
+    loaded: warm up in a thread unless a server hook does it instead.
+    """
+    if settings.WARMUP_ENABLED and settings.WARMUP_IN_BACKGROUND:
+        return warm_up_in_background()
+    return None
@@ -3,6 +3,14 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the async API (``api/async/``) through it, including the live event
+stream at ``api/async/events/``. An idle stream costs a coroutine: it gives
+back the thread and database connection Django served its request with
+(``apps.events.release_request_thread``), so one process holds thousands.
+Keep middleware async-capable so requests don't hop onto threads, and run
+with ``EVENTS_BROKER=postgres`` when there is more than one worker so
+events reach streams held by any of them.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +22,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from apps.warmup import warm_up_on_start  # noqa: E402  (needs the apps loaded)
+
+warm_up_on_start()
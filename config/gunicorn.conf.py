@@ -0,0 +1,34 @@
+"""
+Gunicorn settings.
+
+    PROMETHEUS_MULTIPROC_DIR=/tmp/naijashield-metrics gunicorn -c config/gunicorn.conf.py config.wsgi
+
+The metrics directory must exist and be emptied before the master starts;
+it is where every worker writes its /metrics samples.
+"""
+import multiprocessing
+import os
+
+# post_worker_init warms each worker up; the entry point need not (apps.warmup)
+os.environ.setdefault('WARMUP_IN_BACKGROUND', 'False')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+
+def post_worker_init(worker):
+    """Warm the worker up; it only accepts connections once this returns."""
+    from django.conf import settings
+
+    if settings.WARMUP_ENABLED:
+        from apps.warmup import warm_up
+
+        warm_up()
+
+
+def child_exit(server, worker):
+    """Drop the exited worker's live gauges from the aggregated metrics."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
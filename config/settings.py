@@ -11,9 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
-import cloudinary
-import cloudinary_storage
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,9 +52,18 @@ INSTALLED_APPS = [
     'apps',
     'apps.user',
     'apps.auth',
+    'apps.listing',
+    'apps.prices',
+    'apps.matching',
+    'apps.messaging',
+    'apps.jobs',
+    'apps.outbox',
+    'apps.sync',
 ]
 
 MIDDLEWARE = [
+    'apps.middleware.MetricsMiddleware',
+    'apps.middleware.PerformanceMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -65,6 +72,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.middleware.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -101,11 +109,104 @@ DATABASES = {
     }
 }
 
+# Connection pooling (psycopg_pool), e.g. DB_POOL_MAX_SIZE=10 per worker
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        }
+    }
+
+# Read replicas
+# Comma-separated "host[:port][/name]" entries, e.g.
+#   DB_REPLICAS=replica1.internal,localhost:5432/naijashield_replica
+# Each entry becomes a `replica_<n>` alias sharing the primary's credentials.
+DB_REPLICAS = config('DB_REPLICAS', default='', cast=Csv())
+
+for index, replica in enumerate(DB_REPLICAS, start=1):
+    host_port, _, replica_name = replica.partition('/')
+    replica_host, _, replica_port = host_port.partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host or DATABASES['default']['HOST'],
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'NAME': replica_name or DATABASES['default']['NAME'],
+        # Tests run against the primary only
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['apps.routers.PrimaryReplicaRouter']
+
+# How long a user's reads stay on the primary after they write (seconds)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+
+# Cache
+# Shared tier of apps.cache.TieredCache. Defaults to an in-process locmem
+# cache; point it at Redis in production so workers share entries, e.g.
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='naijashield'),
+    }
+}
+
+# Per-process LRU in front of the shared cache
+LOCAL_CACHE_MAX_ENTRIES = config('LOCAL_CACHE_MAX_ENTRIES', default=1024, cast=int)
+# Upper bound (seconds) on how stale another worker's local copy can be
+LOCAL_CACHE_TTL = config('LOCAL_CACHE_TTL', default=2, cast=float)
+# Lease (seconds) held by the process computing a missing entry
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=10, cast=int)
+
+# Per-request performance instrumentation (apps.middleware.PerformanceMiddleware)
+PERF_INSTRUMENTATION = config('PERF_INSTRUMENTATION', default=True, cast=bool)
+# Fraction of requests that get a timing log line (and, for staff or with
+# DEBUG on, a Server-Timing header)
+PERF_SAMPLE_RATE = config('PERF_SAMPLE_RATE', default=0.01, cast=float)
+# Requests slower than this are always logged, with EXPLAIN plans
+PERF_SLOW_REQUEST_MS = config('PERF_SLOW_REQUEST_MS', default=500, cast=float)
+PERF_EXPLAIN_MAX_QUERIES = config('PERF_EXPLAIN_MAX_QUERIES', default=5, cast=int)
+
+# Prometheus metrics at /metrics (apps.metrics)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Bearer token required to scrape /metrics; without one it is DEBUG-only
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# How often each worker refreshes pool, cache and queue gauges (seconds)
+METRICS_REFRESH_SECONDS = config('METRICS_REFRESH_SECONDS', default=5, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps.performance': {
+            'handlers': ['console'],
+            'level': config('PERF_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Same PBKDF2 hasher as Django's default, timed for /metrics
+PASSWORD_HASHERS = [
+    'apps.user.hashers.TimedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -156,7 +257,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 AUTH_USER_MODEL = 'user.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.auth.authentication.BadgeJWTAuthentication',
     ),
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
@@ -176,3 +277,113 @@ CLOUDINARY_STORAGE = {
     "API_SECRET": config('API_SECRET'),
 }
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Skip the real profile photo upload (offline load tests, local development)
+CLOUDINARY_STUB_UPLOADS = config('CLOUDINARY_STUB_UPLOADS', default=False, cast=bool)
+
+# Worker boot (settings, apps, middleware, URLconf) must finish within this;
+# see `python manage.py import_profile`
+STARTUP_BUDGET_SECONDS = config('STARTUP_BUDGET_SECONDS', default=3.0, cast=float)
+
+# Warm-up before a worker takes traffic. By default the WSGI/ASGI entry
+# point runs it in a thread (uvicorn, runserver); config/gunicorn.conf.py
+# turns that off because its post_worker_init hook runs it instead
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=True, cast=bool)
+WARMUP_IN_BACKGROUND = config('WARMUP_IN_BACKGROUND', default=True, cast=bool)
+WARMUP_PATHS = config(
+    'WARMUP_PATHS',
+    default='/api/users/search/?role=farmer,/api/users/00000000-0000-0000-0000-000000000000/',
+    cast=Csv(),
+)
+WARMUP_DB_TIMEOUT = config('WARMUP_DB_TIMEOUT', default=10.0, cast=float)
+
+# Semantic listing search (apps.listing.semantic). Build the index with
+# `python manage.py build_listing_index`; workers memory-map it.
+SEMANTIC_SEARCH_ENABLED = config('SEMANTIC_SEARCH_ENABLED', default=True, cast=bool)
+# 'sentence-transformers', or 'hashing' for offline tests and load tests
+SEMANTIC_EMBEDDER = config('SEMANTIC_EMBEDDER', default='sentence-transformers')
+# Multilingual, so pidgin and Hausa/Yoruba/Igbo product names land near English ones
+SEMANTIC_MODEL = config('SEMANTIC_MODEL', default='sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+SEMANTIC_INDEX_DIR = Path(config('SEMANTIC_INDEX_DIR', default=str(BASE_DIR / 'var' / 'semantic')))
+SEMANTIC_BATCH_SIZE = config('SEMANTIC_BATCH_SIZE', default=128, cast=int)
+# Nearest neighbours fetched before filters; widened (up to the max) when filters drop too many
+SEMANTIC_CANDIDATES = config('SEMANTIC_CANDIDATES', default=200, cast=int)
+SEMANTIC_MAX_CANDIDATES = config('SEMANTIC_MAX_CANDIDATES', default=3200, cast=int)
+SEMANTIC_NPROBE = config('SEMANTIC_NPROBE', default=16, cast=int)
+# With a location: score = (1 - w) * similarity + w * proximity
+SEMANTIC_GEO_WEIGHT = config('SEMANTIC_GEO_WEIGHT', default=0.3, cast=float)
+# Proximity halves at this distance
+SEMANTIC_GEO_SCALE_KM = config('SEMANTIC_GEO_SCALE_KM', default=25.0, cast=float)
+# How often a worker checks for a rebuilt index file (seconds)
+SEMANTIC_RELOAD_SECONDS = config('SEMANTIC_RELOAD_SECONDS', default=60.0, cast=float)
+
+# Listing facets (apps.listing.facets): responses are cached per normalized
+# query; filters the count table can't answer get exact GROUP BY counts up
+# to this many matching listings
+FACET_CACHE_SECONDS = config('FACET_CACHE_SECONDS', default=60, cast=int)
+FACET_EXACT_LIMIT = config('FACET_EXACT_LIMIT', default=5000, cast=int)
+
+# Bulk listing import (apps.listing.imports): ~25 MB is about 150k CSV rows.
+# Uploads over FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk, not held in memory
+LISTING_IMPORT_MAX_BYTES = config('LISTING_IMPORT_MAX_BYTES', default=25 * 2 ** 20, cast=int)
+
+# Listing view counters (apps.listing.tracking): each worker buffers views
+# in memory and writes them this often, or sooner once this many listings
+# are pending (about 1 KiB of sketch each)
+VIEW_FLUSH_SECONDS = config('VIEW_FLUSH_SECONDS', default=10.0, cast=float)
+VIEW_BUFFER_MAX_KEYS = config('VIEW_BUFFER_MAX_KEYS', default=5000, cast=int)
+
+# Live events (apps.events, GET /api/async/events/): 'local' delivers within
+# one process; 'postgres' fans out to every worker with LISTEN/NOTIFY.
+# Streams send a keepalive comment this often so proxies keep them open
+EVENTS_BROKER = config('EVENTS_BROKER', default='local')
+EVENTS_CHANNEL = config('EVENTS_CHANNEL', default='naijashield_events')
+EVENTS_KEEPALIVE_SECONDS = config('EVENTS_KEEPALIVE_SECONDS', default=25.0, cast=float)
+
+# Background jobs (apps.jobs, `python manage.py run_jobs`): worker threads,
+# jobs claimed per query, and how long an idle worker sleeps between polls.
+# Failed jobs retry after RETRY_BASE * 2^(attempt-1) seconds (capped, with
+# jitter); a job locked longer than LOCK_TIMEOUT is assumed to have lost its
+# worker and runs again
+JOBS_QUEUES = config('JOBS_QUEUES', default='default', cast=Csv())
+JOBS_CONCURRENCY = config('JOBS_CONCURRENCY', default=4, cast=int)
+JOBS_BATCH_SIZE = config('JOBS_BATCH_SIZE', default=50, cast=int)
+JOBS_POLL_SECONDS = config('JOBS_POLL_SECONDS', default=1.0, cast=float)
+JOBS_TICK_SECONDS = config('JOBS_TICK_SECONDS', default=15.0, cast=float)
+JOBS_RETRY_BASE_SECONDS = config('JOBS_RETRY_BASE_SECONDS', default=10.0, cast=float)
+JOBS_RETRY_MAX_SECONDS = config('JOBS_RETRY_MAX_SECONDS', default=3600.0, cast=float)
+JOBS_LOCK_TIMEOUT_SECONDS = config('JOBS_LOCK_TIMEOUT_SECONDS', default=900, cast=int)
+JOBS_KEEP_FINISHED_DAYS = config('JOBS_KEEP_FINISHED_DAYS', default=7, cast=int)
+# Cron entries the workers enqueue (minute hour day-of-month month day-of-week, TIME_ZONE)
+JOBS_SCHEDULE = {
+    'rollup-prices': {'cron': '*/5 * * * *', 'task': 'prices.rollup'},
+    'match-demands': {'cron': '0 2 * * *', 'task': 'matching.match_demands'},
+    'purge-jobs': {'cron': '30 3 * * *', 'task': 'jobs.purge'},
+    'purge-tombstones': {'cron': '45 3 * * *', 'task': 'sync.purge_tombstones'},
+}
+
+# Most public_ids one POST /api/users/batch/ may ask for
+USERS_BATCH_MAX = config('USERS_BATCH_MAX', default=300, cast=int)
+
+# Outbox (apps.outbox, `python manage.py dispatch_outbox`): domain events
+# handed to handlers per batch; an idle dispatcher polls this often, which
+# bounds how long a saved user's cached pages can lag; an event whose
+# handlers failed this many times is marked failed and left alone
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=500, cast=int)
+OUTBOX_POLL_SECONDS = config('OUTBOX_POLL_SECONDS', default=0.5, cast=float)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=10, cast=int)
+
+# Delta sync (apps.sync, GET /api/sync/): rows per entity per page; rows
+# newer than the settle window wait for the next sync so transactions
+# still in flight can't be skipped; tombstones (and so cursors) expire
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=5, cast=float)
+SYNC_TOMBSTONE_DAYS = config('SYNC_TOMBSTONE_DAYS', default=90, cast=int)
+
+# Price index (apps.prices): rollups change only when `rollup_prices` (or its scheduled job) runs,
+# so chart responses can be cached for a while
+PRICE_CACHE_SECONDS = config('PRICE_CACHE_SECONDS', default=300, cast=int)
+
+# Buyer-supplier matching (apps.matching): ranked suppliers kept per demand,
+# and threads the nightly `match_demands` batch queries its KD-trees on
+MATCHES_PER_DEMAND = config('MATCHES_PER_DEMAND', default=10, cast=int)
+MATCH_WORKERS = config('MATCH_WORKERS', default=4, cast=int)
@@ -16,8 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from apps.views import health_live, health_ready, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include('apps.async_urls')),
     path('api/', include('apps.urls')),
+    path('metrics', metrics, name='metrics'),
+    path('health/live', health_live, name='health_live'),
+    path('health/ready', health_ready, name='health_ready'),
 ]
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+from apps.warmup import warm_up_on_start  # noqa: E402  (needs the apps loaded)
+
+warm_up_on_start()